@@ -0,0 +1,80 @@
+"""
+Синтетические ZIP-архивы для бенчмарков.
+
+Архивы детерминированы (фиксированный seed) и строятся в памяти. scale
+масштабирует число файлов и объём данных: 1.0 — полный прогон, 0.1 —
+быстрая проверка.
+"""
+
+import io
+import random
+import zipfile
+from typing import Callable
+
+MiB = 1024 * 1024
+
+
+def build_zip(
+    entries: dict[str, bytes], compression: int = zipfile.ZIP_DEFLATED
+) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def tiny_files(scale: float = 1.0) -> bytes:
+    """Много маленьких файлов: нагрузка на центральный каталог."""
+    rng = random.Random(1)
+    count = max(int(20_000 * scale), 1)
+    return build_zip(
+        {f"src/file_{i}.py": rng.randbytes(rng.randint(16, 256)) for i in range(count)}
+    )
+
+
+def huge_file(scale: float = 1.0) -> bytes:
+    """Один большой несжимаемый файл."""
+    rng = random.Random(2)
+    return build_zip({"data.bin": rng.randbytes(max(int(64 * MiB * scale), 1))})
+
+
+def compressible(scale: float = 1.0) -> bytes:
+    """Сильно сжимаемые данные: маленький архив, большой объём распаковки."""
+    line = b"def handler(request):\n    return process(request)\n"
+    size = max(int(256 * MiB * scale), len(line))
+    return build_zip({"generated.py": line * (size // len(line))})
+
+
+def nested_directories(scale: float = 1.0) -> bytes:
+    """Глубокая вложенность каталогов с файлами на каждом уровне."""
+    rng = random.Random(3)
+    depth = 32
+    breadth = max(int(200 * scale), 1)
+    entries = {}
+    for branch in range(breadth):
+        path = f"project/module_{branch}"
+        for level in range(depth):
+            path += f"/level_{level}"
+            entries[f"{path}/__init__.py"] = rng.randbytes(64)
+    return build_zip(entries)
+
+
+def random_archive(size: int, seed: int = 4) -> bytes:
+    """Архив примерно заданного размера: один несжимаемый файл."""
+    return build_zip(
+        {"data.bin": random.Random(seed).randbytes(max(size, 1))},
+        compression=zipfile.ZIP_STORED,
+    )
+
+
+CORPUS: dict[str, Callable[[float], bytes]] = {
+    "tiny_files": tiny_files,
+    "huge_file": huge_file,
+    "compressible": compressible,
+    "nested_directories": nested_directories,
+}
+
+
+def build_corpus(scale: float = 1.0) -> dict[str, bytes]:
+    return {name: generate(scale) for name, generate in CORPUS.items()}
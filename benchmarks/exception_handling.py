@@ -0,0 +1,77 @@
+"""
+Накладные расходы обработки исключений на запрос.
+
+Сравнивает прежний BaseHTTPMiddleware с цепочкой except и обработчики,
+зарегистрированные через register_exception_handlers, на успешном запросе
+и на запросе с TaskNotFoundException.
+
+Запуск: PYTHONPATH=src python benchmarks/exception_handling.py
+"""
+
+import asyncio
+import time
+from typing import Callable
+
+from fastapi import FastAPI
+from fastapi.requests import Request
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import JSONResponse, Response
+
+from exceptions import BaseExceptionWithMessage
+from task.exceptions import TaskNotFoundException
+from task.exceptions.handlers import register_exception_handlers
+
+REQUESTS = 5000
+
+
+async def legacy_middleware(request: Request, call_next: Callable) -> Response:
+    try:
+        return await call_next(request)
+    except BaseExceptionWithMessage as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.message})
+    except Exception:
+        return JSONResponse(status_code=500, content={})
+
+
+def create_app(legacy: bool) -> FastAPI:
+    app = FastAPI()
+    if legacy:
+        app.middleware("http")(legacy_middleware)
+    else:
+        register_exception_handlers(app)
+
+    @app.get("/ok")
+    async def ok():
+        return {"status": "ok"}
+
+    @app.get("/not_found")
+    async def not_found():
+        raise TaskNotFoundException()
+
+    return app
+
+
+async def measure(app: FastAPI, path: str) -> float:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(100):
+            await client.get(path)
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await client.get(path)
+        return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+async def main() -> None:
+    for path in ("/ok", "/not_found"):
+        legacy = await measure(create_app(legacy=True), path)
+        handlers = await measure(create_app(legacy=False), path)
+        print(
+            f"{path:<12} BaseHTTPMiddleware {legacy:8.1f} мкс/запрос, "
+            f"обработчики {handlers:8.1f} мкс/запрос "
+            f"({legacy - handlers:+.1f} мкс)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
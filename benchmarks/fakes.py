@@ -0,0 +1,196 @@
+"""
+Заменители внешних зависимостей в памяти процесса для бенчмарков.
+
+Повторяют интерфейсы, которыми пользуется TaskService, без сети и БД:
+хранилище MinIO (в словаре), репозиторий задач Postgres,
+Keycloak (JWKS и выпуск токенов), SonarQube с задержкой и Redis
+(InMemoryBackend fastapi-cache).
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Collection, Iterable, NamedTuple, Optional
+
+import orjson
+from fastapi import UploadFile
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from jwcrypto.jwk import JWK, JWKSet
+from jwcrypto.jwt import JWT
+
+from base.cache_coder import build_coder
+from gateways.sonarqube import SonarQubeResults
+from gateways.sonarqube.sonarqube import SonarqubeService
+from settings import get_settings
+from task.enums import TaskStatus
+from task.models import Task
+
+ISSUER = "http://keycloak.bench/realms/zip-service"
+CLIENT_ID = "zip-service-client"
+
+
+class FakeStorageRepository:
+    """Объекты бакета в словаре."""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+
+    async def save_file(self, file: UploadFile, file_name: str) -> None:
+        self.objects[file_name] = await file.read()
+
+    async def download_file(self, file_name: str, target: BinaryIO) -> None:
+        target.write(self.objects[file_name])
+
+    async def remove_files(self, file_names: Iterable[str]) -> list[str]:
+        for name in file_names:
+            self.objects.pop(name, None)
+        return []
+
+
+class FakeSonarqubeService(SonarqubeService):
+    """Фиктивный анализатор с настраиваемой задержкой внешнего сервиса."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+
+    async def _check_zip(self, zip_file: BinaryIO) -> SonarQubeResults:
+        await asyncio.sleep(self.latency)
+        return await super()._check_zip(zip_file)
+
+
+class FakeSession:
+    """
+    Сессия без БД. info каждый раз новый: события задач, которые
+    TaskService откладывает до commit, не накапливаются.
+    """
+
+    @property
+    def info(self) -> dict[str, Any]:
+        return {}
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+
+class TransitionRow(NamedTuple):
+    owner_id: Optional[str]
+    created_at: datetime
+
+
+class FakeTaskRepository:
+    """Строки таблицы tasks в словаре; результаты хранятся текстом JSON."""
+
+    def __init__(self) -> None:
+        self.session = FakeSession()
+        self.rows: dict[str, dict[str, Any]] = {}
+
+    def add_pending(self, task_id: str, owner_id: Optional[str] = None) -> None:
+        self.rows[task_id] = {
+            "status": TaskStatus.PENDING,
+            "results": None,
+            "owner_id": owner_id,
+            "created_at": datetime.now(timezone.utc),
+        }
+
+    async def create(self, task: Task) -> None:
+        task.created_at = datetime.now(timezone.utc)
+        self.add_pending(task.task_id, task.owner_id)
+
+    async def transition_status(
+        self,
+        task_id: str,
+        expected: Collection[TaskStatus],
+        status: TaskStatus,
+        results: Optional[dict[str, Any]] = None,
+        created_at: Optional[datetime] = None,
+    ) -> Optional[TransitionRow]:
+        row = self.rows.get(task_id)
+        if row is None or row["status"] not in expected:
+            return None
+        if created_at is not None and row["created_at"] != created_at:
+            return None
+        row["status"] = status
+        if results is not None:
+            # Как JSONB: результат сериализуется при записи
+            row["results"] = orjson.dumps(results).decode()
+        return TransitionRow(row["owner_id"], row["created_at"])
+
+    async def get(self, task_id: str) -> Optional[Task]:
+        row = self.rows.get(task_id)
+        if row is None:
+            return None
+        return Task(
+            task_id=task_id,
+            file_path=f"{task_id}.zip",
+            status=row["status"],
+            owner_id=row["owner_id"],
+            created_at=row["created_at"],
+            results=orjson.loads(row["results"]) if row["results"] else None,
+        )
+
+    async def get_result_json(self, task_id: str) -> Optional[tuple]:
+        row = self.rows.get(task_id)
+        if row is None:
+            return None
+        return row["status"], row["results"]
+
+
+class FakeKeycloak:
+    """Realm с одним ключом RS256: JWKS для TokenVerifier и выпуск токенов."""
+
+    def __init__(self) -> None:
+        self.key = JWK.generate(kty="RSA", size=2048, kid="bench-key")
+
+    async def fetch_jwks(self) -> dict:
+        jwks = JWKSet()
+        jwks.add(self.key)
+        return orjson.loads(jwks.export(private_keys=False))
+
+    def issue_token(self, sub: Optional[str] = None) -> str:
+        now = int(time.time())
+        token = JWT(
+            header={"alg": "RS256", "kid": self.key["kid"]},
+            claims={
+                "sub": sub or str(uuid.uuid4()),
+                "iss": ISSUER,
+                "azp": CLIENT_ID,
+                "iat": now,
+                "exp": now + 300,
+            },
+        )
+        token.make_signed_token(self.key)
+        return token.serialize()
+
+
+class FakeRedisBackend(InMemoryBackend):
+    """
+    InMemoryBackend, который, как DEL в Redis, не считает отсутствующий ключ
+    ошибкой: иначе каждый сброс кэша результата в process_task уходил бы в
+    обработку исключения и журнал, и это попадало бы в замер.
+    """
+
+    async def clear(
+        self, namespace: Optional[str] = None, key: Optional[str] = None
+    ) -> int:
+        if namespace is None and key is not None:
+            return int(self._store.pop(key, None) is not None)
+        return await super().clear(namespace, key)
+
+
+def init_fake_redis() -> None:
+    """FastAPICache поверх словаря с тем же кодером, что и в сервисе."""
+    settings = get_settings()
+    FastAPICache.init(
+        FakeRedisBackend(),
+        prefix="fastapi-cache",
+        coder=build_coder(
+            settings.CACHE_CODER,
+            settings.CACHE_COMPRESSION,
+            settings.CACHE_COMPRESSION_THRESHOLD,
+        ),
+    )
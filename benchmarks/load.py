@@ -0,0 +1,329 @@
+"""
+Нагрузочный прогон всего приложения FastAPI.
+
+Виртуальные пользователи в цикле загружают архив через /upload и опрашивают
+/results/{task_id}, пока задача не завершится. Для каждой пары
+(конкурентность, размер архива) выводятся RPS, p50/p90/p99, доля ошибок по
+эндпоинтам и пиковый RSS процесса.
+
+Postgres и Redis настоящие: docker compose up db redis и alembic upgrade
+head, адреса берутся из .env. Остальные зависимости заменены локальными:
+MinIO — хранилище STORAGE_BACKEND=local во временном каталоге, Keycloak —
+локальный выпуск JWT (benchmarks/fakes.py), SonarQube — анализатор с
+задержкой --sonarqube-latency. Ограничения частоты на время прогона сняты, уровень
+журнала приложения задаётся как обычно, через LOG_LEVEL.
+
+По умолчанию приложение вызывается в процессе через ASGITransport httpx,
+без сети; фоновая обработка задачи при этом выполняется до возврата ответа
+/upload и входит в его задержку. С --port приложение поднимается в uvicorn
+на локальном порту в том же процессе, и ответ /upload уходит до обработки.
+В обоих режимах RSS включает и приложение, и генератор нагрузки.
+
+Запуск:
+    PYTHONPATH=src python benchmarks/load.py --concurrency 1,8,32 --sizes 0.1,1,10
+    PYTHONPATH=src python benchmarks/load.py --port 8001 --output load.json
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Optional
+
+import httpx
+import orjson
+from dotenv import load_dotenv
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+for name in (
+    "RATE_LIMIT_UPLOADS_PER_MINUTE",
+    "RATE_LIMIT_UPLOAD_MB_PER_HOUR",
+    "RATE_LIMIT_READS_PER_MINUTE",
+):
+    os.environ[name] = str(10**9)
+STORAGE_ROOT = tempfile.mkdtemp(prefix="zip-service-load-")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["STORAGE_LOCAL_PATH"] = STORAGE_ROOT
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from auth.keycloak_config import token_verifier  # noqa: E402
+from corpus import MiB, random_archive  # noqa: E402
+from fakes import (  # noqa: E402
+    CLIENT_ID,
+    ISSUER,
+    FakeKeycloak,
+    FakeSonarqubeService,
+)
+from main import app  # noqa: E402
+from task.api.deps import get_sonarqube_service  # noqa: E402
+
+# Журнал запросов генератора нагрузки не относится к измеряемому приложению
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+TERMINAL_STATUSES = ("SUCCESS", "FAILED")
+PAGE_SIZE = resource.getpagesize()
+
+
+class EndpointStats:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.errors = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.latencies.append(latency)
+        if not ok:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> dict[str, float]:
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        return {
+            "requests": requests,
+            "rps": round(requests / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(self.errors / requests, 4) if requests else 0.0,
+            **{
+                f"p{q}_ms": round(percentile(latencies, q / 100) * 1000, 2)
+                for q in (50, 90, 99)
+            },
+        }
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу отсортированного списка."""
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        # Вне Linux доступен только максимум за всё время процесса (в КБ)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRSS:
+    """Пиковый RSS за время сценария: опрос раз в interval секунд."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.peak = current_rss()
+
+    async def run(self) -> None:
+        while True:
+            self.peak = max(self.peak, current_rss())
+            await asyncio.sleep(self.interval)
+
+
+async def timed(
+    stats: EndpointStats, request: Awaitable[httpx.Response]
+) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError:
+        stats.record(time.perf_counter() - start, ok=False)
+        return None
+    stats.record(time.perf_counter() - start, ok=response.is_success)
+    return response
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    token: str,
+    archive: bytes,
+    deadline: float,
+    stats: dict[str, EndpointStats],
+    poll_interval: float,
+    max_polls: int,
+) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.monotonic() < deadline:
+        response = await timed(
+            stats["upload"],
+            client.post(
+                "/upload",
+                headers=headers,
+                files={"file": ("archive.zip", archive, "application/zip")},
+            ),
+        )
+        if response is None or response.status_code != 201:
+            continue
+        task_id = response.json()["task_id"]
+
+        for _ in range(max_polls):
+            response = await timed(
+                stats["results"], client.get(f"/results/{task_id}", headers=headers)
+            )
+            if (
+                response is None
+                or response.status_code != 200
+                or response.json()["status"] in TERMINAL_STATUSES
+            ):
+                break
+            await asyncio.sleep(poll_interval)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    keycloak: FakeKeycloak,
+    archive: bytes,
+    concurrency: int,
+    args: argparse.Namespace,
+) -> dict:
+    stats = {"upload": EndpointStats(), "results": EndpointStats()}
+    rss = PeakRSS()
+    sampler = asyncio.create_task(rss.run())
+
+    start = time.monotonic()
+    await asyncio.gather(
+        *(
+            virtual_user(
+                client,
+                keycloak.issue_token(),
+                archive,
+                start + args.duration,
+                stats,
+                args.poll_interval,
+                args.max_polls,
+            )
+            for _ in range(concurrency)
+        )
+    )
+    elapsed = time.monotonic() - start
+    sampler.cancel()
+
+    return {
+        "concurrency": concurrency,
+        "archive_mb": round(len(archive) / MiB, 3),
+        "elapsed_s": round(elapsed, 2),
+        "peak_rss_mb": round(rss.peak / MiB, 1),
+        "endpoints": {name: s.summary(elapsed) for name, s in stats.items()},
+    }
+
+
+def install_stand_ins(application: FastAPI, sonarqube_latency: float) -> FakeKeycloak:
+    keycloak = FakeKeycloak()
+    token_verifier.fetch_jwks = keycloak.fetch_jwks
+    token_verifier.issuer = ISSUER
+    token_verifier.audience = CLIENT_ID
+
+    sonarqube_service = FakeSonarqubeService(sonarqube_latency)
+    application.dependency_overrides[get_sonarqube_service] = lambda: sonarqube_service
+    return keycloak
+
+
+@asynccontextmanager
+async def in_process_client(
+    application: FastAPI, timeout: float
+) -> AsyncIterator[httpx.AsyncClient]:
+    # ASGITransport не запускает lifespan, он выполняется здесь
+    async with application.router.lifespan_context(application):
+        transport = httpx.ASGITransport(app=application, raise_app_exceptions=False)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load", timeout=timeout
+        ) as client:
+            yield client
+
+
+@asynccontextmanager
+async def local_port_client(
+    application: FastAPI, port: int, timeout: float, connections: int
+) -> AsyncIterator[httpx.AsyncClient]:
+    server = uvicorn.Server(
+        uvicorn.Config(application, host="127.0.0.1", port=port, log_level="warning")
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.05)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}",
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=connections),
+        ) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    keycloak = install_stand_ins(app, args.sonarqube_latency)
+    client_context = (
+        local_port_client(app, args.port, args.timeout, max(args.concurrency))
+        if args.port
+        else in_process_client(app, args.timeout)
+    )
+
+    reports = []
+    try:
+        async with client_context as client:
+            for size in args.sizes:
+                archive = random_archive(int(size * MiB))
+                for concurrency in args.concurrency:
+                    report = await run_scenario(
+                        client, keycloak, archive, concurrency, args
+                    )
+                    print_report(report)
+                    reports.append(report)
+    finally:
+        shutil.rmtree(STORAGE_ROOT, ignore_errors=True)
+    return reports
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"concurrency={report['concurrency']} archive={report['archive_mb']} МБ "
+        f"за {report['elapsed_s']} с, пиковый RSS {report['peak_rss_mb']} МБ"
+    )
+    for name, stats in report["endpoints"].items():
+        print(
+            f"  {name:8} {stats['requests']:7d} запросов {stats['rps']:9.2f} RPS"
+            f"  ошибки {stats['error_rate']:7.2%}"
+            f"  p50 {stats['p50_ms']:9.2f}  p90 {stats['p90_ms']:9.2f}"
+            f"  p99 {stats['p99_ms']:9.2f} мс"
+        )
+
+
+def comma_separated(cast: type):
+    return lambda value: [cast(item) for item in value.split(",") if item]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--concurrency", type=comma_separated(int), default=[1, 8, 32])
+    parser.add_argument(
+        "--sizes", type=comma_separated(float), default=[0.1, 1, 10], help="МБ"
+    )
+    parser.add_argument("--duration", type=float, default=10, help="секунд на сценарий")
+    parser.add_argument("--port", type=int, help="поднять приложение на порту")
+    parser.add_argument("--sonarqube-latency", type=float, default=0.5)
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    parser.add_argument("--max-polls", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="записать отчёт в JSON")
+    args = parser.parse_args()
+
+    reports = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(orjson.dumps(reports, option=orjson.OPT_INDENT_2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Время холодного старта: импорт приложения и первый запрос.
+
+Каждый прогон — отдельный процесс: импорт main (настройки, модели, роутеры,
+middleware) и первый GET /openapi.json через ASGI без сети. Внешние сервисы
+не нужны: клиенты БД, Redis, MinIO и Keycloak создаются лениво.
+
+Запуск из корня репозитория: python benchmarks/startup.py [прогонов]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+from dotenv import load_dotenv
+load_dotenv(".env")
+import main
+imported = time.perf_counter()
+from httpx import ASGITransport, AsyncClient
+
+async def first_request():
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        response = await client.get("/openapi.json")
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+first = asyncio.run(first_request())
+print(json.dumps({"import": imported - start, "first_request": first}))
+"""
+
+
+def main() -> None:
+    env = {**os.environ, "PYTHONPATH": "src"}
+    runs = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            env=env,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    for key in ("import", "first_request"):
+        values = [run[key] * 1000 for run in runs]
+        print(
+            f"{key:<14} медиана {statistics.median(values):8.1f} мс, "
+            f"мин {min(values):8.1f} мс, макс {max(values):8.1f} мс"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Микробенчмарки горячих путей TaskService без сети и контейнеров.
+
+MinIO, Postgres, Keycloak и Redis заменены заменителями в памяти
+(benchmarks/fakes.py), архивы строит benchmarks/corpus.py. Измеряются
+create_task, validate_zip и process_task на каждом архиве корпуса, чтение
+результата (get_task_result, get_task_result_json, get_task_result_cached
+с промахом и попаданием в кэш) и проверка токена TokenVerifier.
+
+Результаты (медиана и p95 в мс) можно сохранить в базовый файл и сравнить
+с ним следующий прогон; при замедлении медианы больше порога скрипт
+завершается с кодом 1. Сравнивать имеет смысл прогоны на одной машине
+с одинаковыми --scale и --repeat.
+
+Запуск:
+    PYTHONPATH=src python benchmarks/task_service.py --save benchmarks/baseline.json
+    PYTHONPATH=src python benchmarks/task_service.py --compare benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import io
+import platform
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+import orjson
+from dotenv import load_dotenv
+from fastapi import UploadFile
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from fastapi_cache import FastAPICache  # noqa: E402
+
+from auth.jwt_verifier import TokenVerifier  # noqa: E402
+from corpus import build_corpus  # noqa: E402
+from fakes import (  # noqa: E402
+    CLIENT_ID,
+    ISSUER,
+    FakeKeycloak,
+    FakeStorageRepository,
+    FakeTaskRepository,
+    init_fake_redis,
+)
+from gateways.sonarqube.sonarqube import SonarqubeService  # noqa: E402
+from task.enums import TaskStatus  # noqa: E402
+from task.services.task_service import TaskService  # noqa: E402
+
+Operation = Callable[[], Awaitable[Any]]
+
+
+async def measure(
+    operation: Operation, repeat: int, setup: Optional[Operation] = None
+) -> dict[str, float]:
+    """Медиана и p95 в мс; setup выполняется перед каждым замером и не учитывается."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            await setup()
+        start = time.perf_counter()
+        await operation()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 4),
+        "p95_ms": round(timings[min(int(len(timings) * 0.95), len(timings) - 1)], 4),
+    }
+
+
+def upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), size=len(data), filename="archive.zip")
+
+
+async def bench_archive(
+    service: TaskService, data: bytes, repeat: int
+) -> dict[str, dict[str, float]]:
+    storage_repo = service.storage_repo
+    task_repo = service.task_repo
+    task_id = ""
+
+    async def create_task() -> None:
+        await service.create_task(str(uuid.uuid4()), upload(data))
+
+    async def validate_zip() -> None:
+        service.validate_zip(io.BytesIO(data))
+
+    async def prepare_pending() -> None:
+        nonlocal task_id
+        task_id = str(uuid.uuid4())
+        task_repo.add_pending(task_id)
+        storage_repo.objects[f"{task_id}.zip"] = data
+
+    async def process_task() -> None:
+        await service.process_task(task_id)
+
+    results = {
+        "create_task": await measure(create_task, repeat),
+        "validate_zip": await measure(validate_zip, repeat),
+        "process_task": await measure(process_task, repeat, setup=prepare_pending),
+    }
+    # Заменители не должны копить архивы между операциями
+    storage_repo.objects.clear()
+    task_repo.rows.clear()
+    return results
+
+
+async def bench_results(
+    service: TaskService, repeat: int
+) -> dict[str, dict[str, float]]:
+    task_id = str(uuid.uuid4())
+    service.task_repo.add_pending(task_id)
+    service.storage_repo.objects[f"{task_id}.zip"] = b""
+    await service.process_task(task_id)
+    assert service.task_repo.rows[task_id]["status"] is TaskStatus.SUCCESS
+
+    return {
+        "get_task_result": await measure(
+            lambda: service.get_task_result(task_id), repeat
+        ),
+        "get_task_result_json": await measure(
+            lambda: service.get_task_result_json(task_id), repeat
+        ),
+        "get_task_result_cached_miss": await measure(
+            lambda: service.get_task_result_cached(task_id),
+            repeat,
+            setup=lambda: FastAPICache.clear(),
+        ),
+        "get_task_result_cached_hit": await measure(
+            lambda: service.get_task_result_cached(task_id), repeat
+        ),
+    }
+
+
+async def bench_token(repeat: int) -> dict[str, dict[str, float]]:
+    keycloak = FakeKeycloak()
+    verifier = TokenVerifier(keycloak.fetch_jwks, issuer=ISSUER, audience=CLIENT_ID)
+    await verifier.refresh()
+    token = ""
+
+    async def new_token() -> None:
+        nonlocal token
+        token = keycloak.issue_token()
+
+    async def verify() -> None:
+        await verifier.verify(token)
+
+    return {
+        # Проверка подписи нового токена по загруженному JWKS
+        "verify_token_cold": await measure(verify, repeat, setup=new_token),
+        # Повторный запрос с тем же токеном: LRU проверенных токенов
+        "verify_token_warm": await measure(verify, repeat),
+    }
+
+
+async def run(scale: float, repeat: int) -> dict[str, dict[str, float]]:
+    init_fake_redis()
+    service = TaskService(
+        FakeStorageRepository(), FakeTaskRepository(), SonarqubeService()
+    )
+
+    results = {}
+    for name, data in build_corpus(scale).items():
+        for operation, stats in (await bench_archive(service, data, repeat)).items():
+            results[f"{operation}/{name}"] = stats
+    results.update(await bench_results(service, repeat))
+    results.update(await bench_token(repeat))
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+    min_delta_ms: float,
+) -> list[str]:
+    """
+    Операции, медиана которых выросла больше чем на threshold. Разница
+    меньше min_delta_ms не считается регрессией: у операций короче
+    миллисекунды такой разброс даёт шум измерения.
+    """
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = stats["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+        regressed = (
+            ratio > 1 + threshold
+            and stats["median_ms"] - base["median_ms"] > min_delta_ms
+        )
+        mark = " РЕГРЕССИЯ" if regressed else ""
+        print(
+            f"{name:45} {base['median_ms']:10.3f} -> {stats['median_ms']:10.3f} мс"
+            f"  x{ratio:.2f}{mark}"
+        )
+        if mark:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scale", type=float, default=0.25)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--save", help="записать результаты в базовый файл")
+    parser.add_argument("--compare", help="сравнить с базовым файлом")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--min-delta-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.scale, args.repeat))
+    for name, stats in results.items():
+        print(
+            f"{name:45} median {stats['median_ms']:10.3f}  p95 {stats['p95_ms']:10.3f} мс"
+        )
+
+    if args.save:
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "scale": args.scale,
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.save, "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+
+    if args.compare:
+        with open(args.compare, "rb") as f:
+            baseline = orjson.loads(f.read())
+        meta = baseline["meta"]
+        if (meta["scale"], meta["repeat"]) != (args.scale, args.repeat):
+            print("Параметры прогона отличаются от базового файла", file=sys.stderr)
+        print()
+        if compare(results, baseline["results"], args.threshold, args.min_delta_ms):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,9 @@ from sqlalchemy import pool
 from alembic import context
 
 from base import Base
-from settings import Settings
+from settings import get_settings
 
-settings = Settings()  # type: ignore
+settings = get_settings()
 
 
 # this is the Alembic Config object, which provides
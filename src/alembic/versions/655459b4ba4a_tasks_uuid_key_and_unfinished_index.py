@@ -0,0 +1,71 @@
+"""Tasks native uuid key, updated_at and unfinished index
+
+Revision ID: 655459b4ba4a
+Revises: c54110d97247
+Create Date: 2025-04-14 10:12:41.308527
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "655459b4ba4a"
+down_revision: Union[str, None] = "c54110d97247"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Первичный ключ уже индексирует task_id, второй индекс только
+    # удваивал работу при каждой вставке
+    op.drop_index("ix_tasks_task_id", table_name="tasks")
+    # Перезапись таблицы: первичный ключ и ix_tasks_owner_id_created_at
+    # перестраиваются по 16-байтовым значениям вместо 36-символьных строк
+    op.alter_column(
+        "tasks",
+        "task_id",
+        type_=sa.Uuid(),
+        existing_type=sa.String(),
+        existing_nullable=False,
+        postgresql_using="task_id::uuid",
+    )
+    # now() вычисляется один раз при ALTER, поэтому столбец добавляется без
+    # второй перезаписи таблицы; у старых задач updated_at — время миграции
+    op.add_column(
+        "tasks",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_tasks_unfinished_created_at",
+        "tasks",
+        ["created_at"],
+        unique=False,
+        postgresql_where=sa.text("status IN ('PENDING', 'IN_PROGRESS')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_tasks_unfinished_created_at",
+        table_name="tasks",
+        postgresql_where=sa.text("status IN ('PENDING', 'IN_PROGRESS')"),
+    )
+    op.drop_column("tasks", "updated_at")
+    op.alter_column(
+        "tasks",
+        "task_id",
+        type_=sa.String(),
+        existing_type=sa.Uuid(),
+        existing_nullable=False,
+        postgresql_using="task_id::text",
+    )
+    op.create_index(op.f("ix_tasks_task_id"), "tasks", ["task_id"], unique=False)
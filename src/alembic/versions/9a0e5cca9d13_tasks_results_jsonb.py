@@ -0,0 +1,42 @@
+"""Convert tasks.results to JSONB
+
+Revision ID: 9a0e5cca9d13
+Revises: 96aa4169751a
+Create Date: 2025-04-02 10:12:41.503218
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9a0e5cca9d13"
+down_revision: Union[str, None] = "96aa4169751a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        "tasks",
+        "results",
+        existing_type=sa.String(),
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=True,
+        postgresql_using="results::jsonb",
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "tasks",
+        "results",
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        type_=sa.String(),
+        existing_nullable=True,
+        postgresql_using="results::text",
+    )
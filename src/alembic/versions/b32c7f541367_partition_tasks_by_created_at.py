@@ -0,0 +1,188 @@
+"""Partition tasks by created_at
+
+Revision ID: b32c7f541367
+Revises: 655459b4ba4a
+Create Date: 2025-04-16 09:41:08.512337
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b32c7f541367"
+down_revision: Union[str, None] = "655459b4ba4a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Секции, создаваемые заранее; дальше их добавляет RetentionService
+PARTITIONS_AHEAD = 2
+
+# Верхняя граница секции tasks_legacy: начало следующего месяца по UTC
+LEGACY_UPPER_BOUND = (
+    "(date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month') "
+    "AT TIME ZONE 'UTC'"
+)
+
+
+def task_columns() -> list[sa.Column]:
+    return [
+        sa.Column("task_id", sa.Uuid(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(
+                "PENDING",
+                "IN_PROGRESS",
+                "SUCCESS",
+                "FAILED",
+                name="taskstatus",
+                create_type=False,
+            ),
+            nullable=True,
+        ),
+        sa.Column("file_path", sa.String(), nullable=True),
+        sa.Column("results", postgresql.JSONB(), nullable=True),
+        sa.Column("owner_id", sa.String(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    ]
+
+
+def create_task_indexes() -> None:
+    op.create_index(
+        "ix_tasks_owner_id_created_at",
+        "tasks",
+        ["owner_id", "created_at", "task_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_tasks_unfinished_created_at",
+        "tasks",
+        ["created_at"],
+        unique=False,
+        postgresql_where=sa.text("status IN ('PENDING', 'IN_PROGRESS')"),
+    )
+
+
+def upgrade() -> None:
+    # Первичный ключ секционированной таблицы обязан включать ключ
+    # секционирования. Существующие строки не копируются: прежняя таблица
+    # целиком становится первой секцией и удаляется политикой хранения,
+    # когда истечёт срок самой новой её строки.
+    #
+    # Всё, что читает таблицу целиком, выполняется до транзакции миграции и
+    # не блокирует запись: индекс нового первичного ключа строится
+    # CONCURRENTLY, а CHECK с границей первой секции добавляется NOT VALID и
+    # проверяется VALIDATE CONSTRAINT под SHARE UPDATE EXCLUSIVE. С ними ни
+    # замена ключа, ни ATTACH PARTITION под эксклюзивной блокировкой не
+    # сканируют строки
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY tasks_legacy_pkey "
+            "ON tasks (task_id, created_at)"
+        )
+        op.execute(
+            f"""
+            DO $$
+            BEGIN
+                EXECUTE format(
+                    'ALTER TABLE tasks ADD CONSTRAINT tasks_legacy_created_at_check '
+                    'CHECK (created_at < %L) NOT VALID',
+                    {LEGACY_UPPER_BOUND}
+                );
+            END $$
+            """
+        )
+        op.execute(
+            "ALTER TABLE tasks VALIDATE CONSTRAINT tasks_legacy_created_at_check"
+        )
+
+    op.execute("ALTER TABLE tasks DROP CONSTRAINT tasks_pkey")
+    op.execute(
+        "ALTER TABLE tasks ADD CONSTRAINT tasks_legacy_pkey "
+        "PRIMARY KEY USING INDEX tasks_legacy_pkey"
+    )
+    op.execute("ALTER TABLE tasks RENAME TO tasks_legacy")
+    op.execute(
+        "ALTER INDEX ix_tasks_owner_id_created_at "
+        "RENAME TO tasks_legacy_owner_id_created_at_idx"
+    )
+    op.execute(
+        "ALTER INDEX ix_tasks_unfinished_created_at "
+        "RENAME TO tasks_legacy_unfinished_created_at_idx"
+    )
+
+    op.create_table(
+        "tasks",
+        *task_columns(),
+        sa.PrimaryKeyConstraint("task_id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    create_task_indexes()
+
+    # Индексы прежней таблицы совпадают с индексами родительской и
+    # присоединяются к ним без перестроения. Границы секций — начала
+    # месяцев по UTC, имена — tasks_pГГГГММ. Если граница сдвинулась на месяц
+    # после VALIDATE, CHECK всё равно строже границы секции и проверку
+    # заменяет
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month_start timestamp := {LEGACY_UPPER_BOUND} AT TIME ZONE 'UTC';
+        BEGIN
+            EXECUTE format(
+                'ALTER TABLE tasks ATTACH PARTITION tasks_legacy '
+                'FOR VALUES FROM (MINVALUE) TO (%L)',
+                month_start AT TIME ZONE 'UTC'
+            );
+            FOR i IN 1..{PARTITIONS_AHEAD} LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF tasks FOR VALUES FROM (%L) TO (%L)',
+                    'tasks_p' || to_char(month_start, 'YYYYMM'),
+                    month_start AT TIME ZONE 'UTC',
+                    (month_start + interval '1 month') AT TIME ZONE 'UTC'
+                );
+                month_start := month_start + interval '1 month';
+            END LOOP;
+        END $$
+        """
+    )
+    # После присоединения CHECK дублирует ограничение секции
+    op.execute("ALTER TABLE tasks_legacy DROP CONSTRAINT tasks_legacy_created_at_check")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "tasks_plain",
+        *task_columns(),
+        sa.PrimaryKeyConstraint("task_id", name="tasks_plain_pkey"),
+    )
+    op.execute(
+        """
+        INSERT INTO tasks_plain (
+            task_id, status, file_path, results, owner_id, created_at, updated_at
+        )
+        SELECT
+            task_id, status, file_path, results, owner_id, created_at, updated_at
+        FROM tasks
+        """
+    )
+    op.drop_table("tasks")
+    op.rename_table("tasks_plain", "tasks")
+    op.execute("ALTER TABLE tasks RENAME CONSTRAINT tasks_plain_pkey TO tasks_pkey")
+    create_task_indexes()
@@ -0,0 +1,44 @@
+"""Add tasks owner and creation time
+
+Revision ID: b845dbf04bdd
+Revises: 9a0e5cca9d13
+Create Date: 2025-04-07 15:48:03.119562
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b845dbf04bdd"
+down_revision: Union[str, None] = "9a0e5cca9d13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("owner_id", sa.String(), nullable=True))
+    op.add_column(
+        "tasks",
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_tasks_owner_id_created_at",
+        "tasks",
+        ["owner_id", "created_at", "task_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_owner_id_created_at", table_name="tasks")
+    op.drop_column("tasks", "created_at")
+    op.drop_column("tasks", "owner_id")
@@ -0,0 +1,79 @@
+"""Create task_stats table
+
+Revision ID: c54110d97247
+Revises: b845dbf04bdd
+Create Date: 2025-04-10 11:37:25.870114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c54110d97247"
+down_revision: Union[str, None] = "b845dbf04bdd"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_stats",
+        sa.Column("bucket", sa.String(), nullable=False),
+        sa.Column("tasks", sa.BigInteger(), nullable=False),
+        sa.Column("coverage_sum", sa.Float(), nullable=False),
+        sa.Column("bugs_total", sa.BigInteger(), nullable=False),
+        sa.Column("bugs_critical", sa.BigInteger(), nullable=False),
+        sa.Column("code_smells_total", sa.BigInteger(), nullable=False),
+        sa.Column("code_smells_critical", sa.BigInteger(), nullable=False),
+        sa.Column("vulnerabilities_total", sa.BigInteger(), nullable=False),
+        sa.Column("vulnerabilities_critical", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("bucket"),
+    )
+
+    # Однократный пересчёт агрегатов по уже сохранённым результатам,
+    # дальше они обновляются при записи каждого результата
+    op.execute(
+        """
+        INSERT INTO task_stats (
+            bucket, tasks, coverage_sum,
+            bugs_total, bugs_critical,
+            code_smells_total, code_smells_critical,
+            vulnerabilities_total, vulnerabilities_critical
+        )
+        SELECT
+            b.bucket,
+            count(*),
+            sum((r.s ->> 'overall_coverage')::float),
+            sum((r.s -> 'bugs' ->> 'total')::bigint),
+            sum((r.s -> 'bugs' ->> 'critical')::bigint),
+            sum((r.s -> 'code_smells' ->> 'total')::bigint),
+            sum((r.s -> 'code_smells' ->> 'critical')::bigint),
+            sum((r.s -> 'vulnerabilities' ->> 'total')::bigint),
+            sum((r.s -> 'vulnerabilities' ->> 'critical')::bigint)
+        FROM tasks t
+        CROSS JOIN LATERAL (SELECT t.results -> 'sonarqube' AS s) r
+        CROSS JOIN LATERAL (
+            VALUES
+                ('total'),
+                ('day:' || (t.created_at AT TIME ZONE 'UTC')::date),
+                ('user:' || t.owner_id),
+                ('user_day:' || t.owner_id || ':' || (t.created_at AT TIME ZONE 'UTC')::date)
+        ) AS b (bucket)
+        WHERE r.s IS NOT NULL AND b.bucket IS NOT NULL
+        GROUP BY b.bucket
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("task_stats")
@@ -1,9 +1,77 @@
+import asyncio
+from datetime import datetime, timezone
+
 from fastapi import APIRouter
+from sqlalchemy import text
 from starlette.responses import JSONResponse
 
+from api.endpoints.profiling import router as profiling_router
+from base.base import get_engine, get_replica_engine, has_replica, read_only_session
+from base.metrics import TASKS_PARTITIONS_AHEAD
+from base.readiness import run_checks
+from base.redis_client import get_redis_client
+from settings import get_settings
+from task.api.deps import create_storage_repository
+from task.repositories import TaskPartitionRepository
+from task.services.retention_service import partitions_ahead
+
 router = APIRouter()
+settings = get_settings()
+
+
+async def check_database() -> None:
+    async with get_engine().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def check_replica() -> None:
+    async with get_replica_engine().connect() as connection:  # type: ignore[union-attr]
+        await connection.execute(text("SELECT 1"))
+
+
+async def check_redis() -> None:
+    await get_redis_client().ping()
+
+
+async def check_storage() -> None:
+    # Первое создание репозитория импортирует клиент minio
+    storage_repo = await asyncio.to_thread(create_storage_repository)
+    await storage_repo.check()
+
+
+async def check_partitions() -> None:
+    # Без секции на месяц created_at вставка задачи завершается ошибкой;
+    # недостаток секций означает, что обслуживание давно не проходило
+    async with read_only_session(primary=True) as session:
+        partitions = await TaskPartitionRepository(session=session).list_partitions()
+    ahead = partitions_ahead(partitions, datetime.now(timezone.utc))
+    TASKS_PARTITIONS_AHEAD.set(ahead)
+    if ahead < settings.TASKS_PARTITIONS_MIN_AHEAD:
+        raise RuntimeError(f"Секции tasks созданы только на {ahead} мес. вперёд")
+
+
+READINESS_CHECKS = {
+    "database": check_database,
+    "redis": check_redis,
+    "storage": check_storage,
+    "partitions": check_partitions,
+}
+if has_replica():
+    READINESS_CHECKS["database_replica"] = check_replica
 
 
 @router.get("/check_startup/")
 async def check_startup() -> JSONResponse:
-    return JSONResponse(status_code=204, content=None)
+    """
+    Готовность сервиса: доступность Postgres, Redis и хранилища архивов,
+    секции tasks на TASKS_PARTITIONS_MIN_AHEAD месяцев вперёд.
+    """
+    checks = await run_checks(READINESS_CHECKS)
+    ready = all(result == "ok" for result in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "checks": checks},
+    )
+
+
+router.include_router(profiling_router)
@@ -0,0 +1,82 @@
+from typing import Annotated, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from base.profiling import memory_profiler, profiler
+from task.api.deps import get_admin_user
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(get_admin_user)])
+
+
+@router.get("/profiling")
+async def get_profiling_status() -> JSONResponse:
+    return JSONResponse(content=profiler.status())
+
+
+@router.post("/profiling")
+async def start_profiling(
+    sample_rate: Annotated[float, Query(ge=0, le=1)] = 0.0,
+    slow_threshold_ms: Annotated[Optional[int], Query(ge=1)] = None,
+    interval_ms: Annotated[float, Query(ge=1, le=1000)] = 5,
+    reset: bool = False,
+) -> JSONResponse:
+    """
+    Включает профилирование доли запросов sample_rate и/или всех запросов
+    дольше slow_threshold_ms. Профили копятся до reset.
+    """
+    if reset:
+        profiler.reset()
+    await profiler.start(
+        sample_rate,
+        slow_threshold=slow_threshold_ms / 1000 if slow_threshold_ms else None,
+        interval=interval_ms / 1000,
+    )
+    return JSONResponse(content=profiler.status())
+
+
+@router.delete("/profiling")
+async def stop_profiling() -> JSONResponse:
+    await profiler.stop()
+    return JSONResponse(content=profiler.status())
+
+
+@router.get("/profiling/{kind}/{key:path}", response_class=PlainTextResponse)
+async def get_profile(
+    kind: Literal["route", "method", "slow"], key: str
+) -> PlainTextResponse:
+    """
+    Профиль в формате folded stacks для flamegraph.pl или speedscope.
+
+    key — маршрут («GET /results/{task_id}»), метод («TaskService.process_task»)
+    или номер медленного запроса из GET /admin/profiling.
+    """
+    folded = profiler.folded(kind, key)
+    if folded is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Профиль не найден"
+        )
+    return PlainTextResponse(folded)
+
+
+@router.post("/tracemalloc")
+async def start_tracemalloc(
+    frames: Annotated[int, Query(ge=1, le=100)] = 25,
+) -> JSONResponse:
+    memory_profiler.start(frames)
+    return JSONResponse(content={"tracing": True})
+
+
+@router.get("/tracemalloc/snapshot")
+async def get_tracemalloc_snapshot(
+    limit: Annotated[int, Query(ge=1, le=500)] = 20,
+    key_type: Literal["lineno", "filename", "traceback"] = "lineno",
+) -> JSONResponse:
+    """Крупнейшие места выделения памяти и разница с предыдущим снимком."""
+    return JSONResponse(content=memory_profiler.snapshot(limit, key_type))
+
+
+@router.delete("/tracemalloc")
+async def stop_tracemalloc() -> JSONResponse:
+    memory_profiler.stop()
+    return JSONResponse(content={"tracing": False})
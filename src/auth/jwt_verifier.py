@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+import orjson
+from jwcrypto.common import JWException
+from jwcrypto.jwk import JWKSet
+from jwcrypto.jwt import JWT, JWTMissingKey
+
+logger = logging.getLogger(f"api.{__name__}")
+
+
+class TokenVerificationError(Exception):
+    pass
+
+
+class TokenVerifier:
+    """
+    Локальная проверка access-токенов Keycloak.
+
+    Подпись проверяется по JWKS realm-а, который загружается один раз и
+    обновляется в фоне (run_refresh_loop) или при встрече незнакомого kid
+    после ротации ключей. Уже проверенные токены хранятся в ограниченном
+    LRU до истечения exp, поэтому повторные запросы с тем же токеном
+    не требуют ни сети, ни проверки подписи.
+    """
+
+    def __init__(
+        self,
+        fetch_jwks: Callable[[], Awaitable[dict]],
+        issuer: str,
+        audience: str,
+        algorithms: Sequence[str] = ("RS256",),
+        cache_size: int = 1024,
+        refresh_interval: float = 3600,
+        min_refresh_interval: float = 30,
+    ):
+        self.fetch_jwks = fetch_jwks
+        self.issuer = issuer
+        self.audience = audience
+        self.algorithms = list(algorithms)
+        self.cache_size = cache_size
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+
+        self._jwks: Optional[JWKSet] = None
+        self._jwks_fetched_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self._claims_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    async def verify(self, token: str) -> dict[str, Any]:
+        claims = self._claims_cache.get(token)
+        if claims is not None:
+            if claims["exp"] > time.time():
+                self._claims_cache.move_to_end(token)
+                return claims
+            del self._claims_cache[token]
+
+        if self._jwks is None:
+            await self.refresh(force=False)
+            if self._jwks is None:
+                raise TokenVerificationError("Ключи подписи недоступны")
+
+        try:
+            claims = self._decode(token)
+        except JWTMissingKey:
+            # Токен подписан ключом, которого ещё нет в кэше: ключи ротированы
+            await self.refresh(force=False)
+            try:
+                claims = self._decode(token)
+            except JWTMissingKey as e:
+                raise TokenVerificationError(str(e))
+
+        self._claims_cache[token] = claims
+        if len(self._claims_cache) > self.cache_size:
+            self._claims_cache.popitem(last=False)
+        return claims
+
+    async def refresh(self, force: bool = True) -> None:
+        async with self._refresh_lock:
+            if (
+                not force
+                and time.monotonic() - self._jwks_fetched_at < self.min_refresh_interval
+            ):
+                return
+            # Неудачная попытка тоже учитывается, чтобы при недоступном
+            # Keycloak не обращаться к нему на каждый запрос
+            self._jwks_fetched_at = time.monotonic()
+            try:
+                self._jwks = JWKSet.from_json(orjson.dumps(await self.fetch_jwks()))
+            except Exception as e:
+                logger.error(f"Ошибка загрузки JWKS: {str(e)}")
+                return
+            logger.info("JWKS обновлён")
+
+    async def run_refresh_loop(self) -> None:
+        while True:
+            # Без force: ключи, только что загруженные при старте, не
+            # запрашиваются повторно
+            await self.refresh(force=False)
+            await asyncio.sleep(self.refresh_interval)
+
+    def _decode(self, token: str) -> dict[str, Any]:
+        try:
+            jwt = JWT(
+                jwt=token,
+                key=self._jwks,
+                algs=self.algorithms,
+                check_claims={"exp": None, "iss": self.issuer},
+            )
+        except JWTMissingKey:
+            raise
+        except (JWException, ValueError) as e:
+            raise TokenVerificationError(str(e))
+
+        claims = orjson.loads(jwt.claims)
+        audience = claims.get("aud") or []
+        if isinstance(audience, str):
+            audience = [audience]
+        if self.audience not in audience and claims.get("azp") != self.audience:
+            raise TokenVerificationError("Токен выпущен для другого клиента")
+        return claims
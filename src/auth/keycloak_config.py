@@ -1,18 +1,39 @@
+from functools import lru_cache
+
+from typing import TYPE_CHECKING
+
 from fastapi.security import OAuth2AuthorizationCodeBearer
-from keycloak import KeycloakOpenID
-from settings import Settings
 
-settings = Settings()  # type: ignore
+from auth.jwt_verifier import TokenVerifier
+from settings import get_settings
+
+if TYPE_CHECKING:
+    from keycloak import KeycloakOpenID
+
+settings = get_settings()
 
 oauth2_scheme = OAuth2AuthorizationCodeBearer(
     authorizationUrl=f"{settings.KEYCLOAK_PUBLIC_URL}/realms/{settings.KEYCLOAK_REALM}/protocol/openid-connect/auth",
     tokenUrl=f"{settings.KEYCLOAK_PUBLIC_URL}/realms/{settings.KEYCLOAK_REALM}/protocol/openid-connect/token",
 )
 
-keycloak_openid = KeycloakOpenID(
-    server_url=f"{settings.KEYCLOAK_SERVER_URL}/",
-    client_id=settings.KEYCLOAK_CLIENT_ID,
-    realm_name=settings.KEYCLOAK_REALM,
-    client_secret_key=settings.KEYCLOAK_CLIENT_SECRET,
-    verify=True,
+
+# Клиент Keycloak нужен только для загрузки JWKS и создаётся при первом вызове
+@lru_cache
+def get_keycloak_openid() -> "KeycloakOpenID":
+    from keycloak import KeycloakOpenID
+
+    return KeycloakOpenID(
+        server_url=f"{settings.KEYCLOAK_SERVER_URL}/",
+        client_id=settings.KEYCLOAK_CLIENT_ID,
+        realm_name=settings.KEYCLOAK_REALM,
+        client_secret_key=settings.KEYCLOAK_CLIENT_SECRET,
+        verify=True,
+    )
+
+
+token_verifier = TokenVerifier(
+    fetch_jwks=lambda: get_keycloak_openid().a_certs(),
+    issuer=f"{settings.KEYCLOAK_PUBLIC_URL}/realms/{settings.KEYCLOAK_REALM}",
+    audience=settings.KEYCLOAK_CLIENT_ID,
 )
@@ -1,26 +1,93 @@
-from typing import AsyncGenerator
+from functools import lru_cache
+from typing import AsyncGenerator, Optional
 
+import orjson
 
-from settings import Settings
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from base.db_pool import instrument_pool, pool_options
+from settings import get_settings
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
 
-settings = Settings()  # type: ignore
-DATABASE_URL = (
-    f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASS}"
-    f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
-)
+settings = get_settings()
 
 
-engine = create_async_engine(
-    DATABASE_URL,
-    max_overflow=10,
-    pool_pre_ping=5,
-    pool_recycle=-1,
-    pool_size=5,
-    pool_timeout=30,
-)
-async_session = async_sessionmaker(engine, expire_on_commit=False)
+def database_url(host: str, port: str) -> str:
+    return (
+        f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASS}"
+        f"@{host}:{port}/{settings.DB_NAME}"
+    )
+
+
+DATABASE_URL = database_url(settings.DB_HOST, settings.DB_PORT)
+
+
+def create_engine(url: str, name: str) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        json_serializer=lambda obj: orjson.dumps(obj).decode(),
+        json_deserializer=orjson.loads,
+        **pool_options(settings, name),
+    )
+    instrument_pool(engine, name)
+    return engine
+
+
+# Движок создаётся при первом обращении, а не при импорте: импорт моделей
+# и репозиториев (тесты, alembic, скрипты) не тянет за собой пул соединений
+@lru_cache
+def get_engine() -> AsyncEngine:
+    return create_engine(DATABASE_URL, "primary")
+
+
+@lru_cache
+def get_replica_engine() -> Optional[AsyncEngine]:
+    if settings.DB_REPLICA_HOST is None:
+        return None
+    return create_engine(
+        database_url(
+            settings.DB_REPLICA_HOST, settings.DB_REPLICA_PORT or settings.DB_PORT
+        ),
+        "replica",
+    )
+
+
+@lru_cache
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(get_engine(), expire_on_commit=False)
+
+
+@lru_cache
+def get_read_only_sessionmaker(
+    primary: bool = False,
+) -> async_sessionmaker[AsyncSession]:
+    # Транзакции BEGIN READ ONLY на реплике, если она настроена; соединения
+    # берутся из пула того же движка
+    engine = (None if primary else get_replica_engine()) or get_engine()
+    return async_sessionmaker(
+        engine.execution_options(postgresql_readonly=True), expire_on_commit=False
+    )
+
+
+def async_session() -> AsyncSession:
+    return get_sessionmaker()()
+
+
+def read_only_session(primary: bool = False) -> AsyncSession:
+    """
+    Сессия только для чтения. primary=True — основная БД даже при наличии
+    реплики: для чтения сразу после записи, которая могла ещё не дойти
+    до реплики.
+    """
+    return get_read_only_sessionmaker(primary)()
+
+
+def has_replica() -> bool:
+    return settings.DB_REPLICA_HOST is not None
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -29,5 +96,11 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         await session.commit()
 
 
+async def get_read_only_session() -> AsyncGenerator[AsyncSession, None]:
+    # Без commit: транзакция чтения просто закрывается
+    async with read_only_session() as session:
+        yield session
+
+
 class Base(DeclarativeBase):
     __allow_unmapped__ = True
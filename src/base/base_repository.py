@@ -1,7 +1,7 @@
 import abc
 from typing import Any, Generic, Iterable, Optional, TypeVar
 
-from sqlalchemy import Delete, Insert, Select, Update
+from sqlalchemy import Delete, Insert, Row, Select, Update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 T = TypeVar("T")
@@ -19,10 +19,19 @@ class BaseRepository(abc.ABC, Generic[T]):
     ) -> Optional[Any]:
         return (await self.session.execute(statement)).scalars().one_or_none()
 
-    async def save(self, obj: T) -> T:
+    async def row_or_none(
+        self, statement: Select | Delete | Update | Insert
+    ) -> Optional[Row[Any]]:
+        return (await self.session.execute(statement)).one_or_none()
+
+    async def save(self, obj: T, refresh: bool = False) -> T:
+        # Серверные значения по умолчанию модели с eager_defaults приходят
+        # через RETURNING того же INSERT; refresh — отдельный SELECT, нужен
+        # только для столбцов, изменённых триггерами
         self.session.add(obj)
         await self.session.flush()
-        await self.session.refresh(obj)
+        if refresh:
+            await self.session.refresh(obj)
         return obj
 
     async def remove(self, obj: T) -> None:
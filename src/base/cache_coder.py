@@ -0,0 +1,105 @@
+import abc
+import zlib
+from typing import Any, ClassVar, Type
+
+import msgpack
+import orjson
+import zstandard
+from fastapi_cache import Coder
+
+# Первый байт записи — способ сжатия, чтобы смена настроек не ломала
+# уже лежащие в кэше значения
+RAW = 0
+ZLIB = 1
+ZSTD = 2
+
+COMPRESSIONS = {"none": RAW, "zlib": ZLIB, "zstd": ZSTD}
+
+_zstd_compressor = zstandard.ZstdCompressor(level=3)
+_zstd_decompressor = zstandard.ZstdDecompressor()
+
+
+class BinaryCoder(Coder, abc.ABC):
+    """
+    Кодер кэша FastAPICache с компактной сериализацией и сжатием.
+
+    Значения длиннее compression_threshold байт сжимаются zstd или zlib.
+    Декодирование не зависит от текущих настроек сжатия.
+    """
+
+    compression: ClassVar[int] = RAW
+    compression_threshold: ClassVar[int] = 1024
+
+    @classmethod
+    @abc.abstractmethod
+    def dumps(cls, value: Any) -> bytes:
+        """Сериализация значения до сжатия."""
+
+    @classmethod
+    @abc.abstractmethod
+    def loads(cls, value: bytes) -> Any:
+        """Разбор значения после распаковки."""
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        data = cls.dumps(value)
+        if cls.compression == RAW or len(data) < cls.compression_threshold:
+            return bytes((RAW,)) + data
+        if cls.compression == ZSTD:
+            return bytes((ZSTD,)) + _zstd_compressor.compress(data)
+        return bytes((ZLIB,)) + zlib.compress(data)
+
+    @classmethod
+    def decode(cls, value: bytes) -> Any:
+        compression, data = value[0], memoryview(value)[1:]
+        if compression == ZSTD:
+            return cls.loads(_zstd_decompressor.decompress(data))
+        if compression == ZLIB:
+            return cls.loads(zlib.decompress(data))
+        return cls.loads(data)
+
+    @classmethod
+    def decode_as_type(cls, value: bytes, *, type_: Any) -> Any:
+        # Значения кладёт в кэш сам сервис, повторная валидация не нужна
+        return cls.decode(value)
+
+
+class MsgPackCoder(BinaryCoder):
+    @classmethod
+    def dumps(cls, value: Any) -> bytes:
+        return msgpack.packb(value)
+
+    @classmethod
+    def loads(cls, value: bytes) -> Any:
+        return msgpack.unpackb(value)
+
+
+class ORJSONCoder(BinaryCoder):
+    @classmethod
+    def dumps(cls, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    @classmethod
+    def loads(cls, value: bytes) -> Any:
+        return orjson.loads(value)
+
+
+CODERS: dict[str, Type[BinaryCoder]] = {
+    "msgpack": MsgPackCoder,
+    "orjson": ORJSONCoder,
+}
+
+
+def build_coder(
+    serializer: str, compression: str, compression_threshold: int
+) -> Type[BinaryCoder]:
+    """Кодер с заданными сериализацией и сжатием для FastAPICache.init."""
+    base = CODERS[serializer]
+    return type(
+        base.__name__,
+        (base,),
+        {
+            "compression": COMPRESSIONS[compression],
+            "compression_threshold": compression_threshold,
+        },
+    )
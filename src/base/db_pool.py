@@ -0,0 +1,109 @@
+import time
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from base.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_DURATION,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_OVERFLOW,
+    DB_POOL_TIMEOUTS,
+)
+from settings import Settings
+
+
+class CheckoutTimingMixin:
+    """
+    Измеряет получение соединения из пула. Метка метрик — pool_logging_name
+    движка: она переживает пересоздание пула в engine.dispose().
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        name = self.logging_name or "primary"  # type: ignore[attr-defined]
+        self._checkout_wait = DB_POOL_CHECKOUT_WAIT.labels(pool=name)
+        self._timeouts = DB_POOL_TIMEOUTS.labels(pool=name)
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        except PoolTimeoutError:
+            self._timeouts.inc()
+            raise
+        finally:
+            self._checkout_wait.observe(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(CheckoutTimingMixin, NullPool):
+    pass
+
+
+def pool_options(settings: Settings, name: str) -> dict[str, Any]:
+    """Аргументы create_async_engine для пула и драйвера."""
+    options: dict[str, Any] = {
+        "pool_logging_name": name,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if not settings.DB_PGBOUNCER:
+        return {
+            **options,
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+        }
+
+    # PgBouncer в режиме transaction отдаёт каждую транзакцию произвольному
+    # серверному соединению, поэтому подготовленные выражения не живут
+    # дольше одной транзакции: кэши asyncpg и SQLAlchemy отключены, а имена
+    # уникальны, чтобы не столкнуться с выражением другого клиента.
+    # По той же причине нельзя полагаться на состояние сеанса между
+    # транзакциями: SET без LOCAL, временные таблицы и сеансовые
+    # advisory-блокировки (pg_advisory_lock) достанутся другому клиенту.
+    # Обслуживание секций поэтому берёт pg_try_advisory_xact_lock в каждой
+    # транзакции (TaskPartitionRepository.try_lock).
+    # Соединения держит PgBouncer, локальный пул не нужен
+    return {
+        **options,
+        "poolclass": InstrumentedNullPool,
+        "connect_args": {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        },
+    }
+
+
+def instrument_pool(engine: AsyncEngine, name: str) -> None:
+    """Время удержания соединений, число выданных и сверх pool_size."""
+    checkout_duration = DB_POOL_CHECKOUT_DURATION.labels(pool=name)
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(dbapi_connection: Any, record: Any, proxy: Any) -> None:
+        record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection: Any, record: Any) -> None:
+        checked_out_at = record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            checkout_duration.observe(time.perf_counter() - checked_out_at)
+
+    if isinstance(engine.pool, QueuePool):
+        # engine.pool читается при каждом опросе: dispose() создаёт новый пул
+        DB_POOL_CHECKED_OUT.labels(pool=name).set_function(
+            lambda: engine.pool.checkedout()  # type: ignore[attr-defined]
+        )
+        DB_POOL_OVERFLOW.labels(pool=name).set_function(
+            lambda: max(engine.pool.overflow(), 0)  # type: ignore[attr-defined]
+        )
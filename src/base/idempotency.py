@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Sequence
+
+import orjson
+from redis.asyncio import Redis
+from starlette import status
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(f"api.{__name__}")
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+
+# Снять блокировку можно только тем же токеном, которым она взята
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Продлить блокировку может только её владелец
+RENEW_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status_code: int
+    body: bytes
+    # Отпечаток запроса, на который получен ответ; пустой — не проверяется
+    fingerprint: str = ""
+
+
+def request_fingerprint(scope: Scope) -> str:
+    """
+    Отпечаток запроса по данным, известным до чтения тела: метод, путь и
+    Content-Length. Имя файла в multipart-теле до его чтения неизвестно.
+    """
+    content_length = Headers(scope=scope).get("content-length", "")
+    return f"{scope['method']} {scope['path']} {content_length}"
+
+
+class IdempotencyStore:
+    def __init__(
+        self,
+        redis: Redis,
+        prefix: str = "idempotency",
+        ttl: int = 24 * 60 * 60,
+        lock_ttl: int = 60,
+    ):
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.release_script = redis.register_script(RELEASE_LOCK_SCRIPT)
+        self.renew_script = redis.register_script(RENEW_LOCK_SCRIPT)
+
+    async def get(self, identity: str, key: str) -> Optional[StoredResponse]:
+        value = await self.redis.get(self._key(identity, key))
+        if value is None:
+            return None
+        stored = orjson.loads(value)
+        return StoredResponse(
+            status_code=stored["status_code"],
+            body=stored["body"].encode(),
+            fingerprint=stored.get("fingerprint", ""),
+        )
+
+    async def save(self, identity: str, key: str, response: StoredResponse) -> None:
+        value = orjson.dumps(
+            {
+                "status_code": response.status_code,
+                "body": response.body.decode(),
+                "fingerprint": response.fingerprint,
+            }
+        )
+        await self.redis.set(self._key(identity, key), value, ex=self.ttl)
+
+    async def acquire(self, identity: str, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        locked = await self.redis.set(
+            self._key(identity, key, "lock"), token, nx=True, ex=self.lock_ttl
+        )
+        return token if locked else None
+
+    async def renew(self, identity: str, key: str, token: str) -> bool:
+        """Продлевает блокировку на lock_ttl; False — блокировка уже не наша."""
+        renewed = await self.renew_script(
+            keys=[self._key(identity, key, "lock")], args=[token, self.lock_ttl]
+        )
+        return bool(renewed)
+
+    async def release(self, identity: str, key: str, token: str) -> None:
+        await self.release_script(keys=[self._key(identity, key, "lock")], args=[token])
+
+    def _key(self, identity: str, key: str, suffix: str = "response") -> str:
+        return f"{self.prefix}:{suffix}:{identity}:{key}"
+
+
+class IdempotencyMiddleware:
+    """
+    Повтор запроса с тем же Idempotency-Key возвращает сохранённый ответ.
+
+    Проверка выполняется до чтения тела, поэтому повторно присланный архив
+    не читается, не сохраняется и не анализируется. Параллельные дубликаты
+    ждут завершения первого запроса под короткой блокировкой, которая
+    продлевается, пока запрос выполняется: медленная загрузка большого
+    архива её не переживает. Сохраняются только успешные ответы вместе с
+    отпечатком запроса; другой запрос с тем же ключом получает 422, а не
+    чужой ответ. Ключи привязаны к пользователю. Хранилище берётся из
+    app.state.idempotency_store (создаётся в lifespan).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Sequence[tuple[str, str]],
+        identify: Callable[[Scope], Awaitable[Optional[str]]],
+        wait_timeout: float = 10,
+        poll_interval: float = 0.1,
+    ):
+        self.app = app
+        self.paths = set(paths)
+        self.identify = identify
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or (scope["method"], scope["path"]) not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = Headers(scope=scope).get(IDEMPOTENCY_HEADER)
+        store: Optional[IdempotencyStore] = getattr(
+            scope["app"].state, "idempotency_store", None
+        )
+        if key is None or store is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response: Response = JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"detail": "Некорректный Idempotency-Key"},
+            )
+            await response(scope, receive, send)
+            return
+
+        identity = await self.identify(scope)
+        if identity is None:
+            await self.app(scope, receive, send)
+            return
+
+        fingerprint = request_fingerprint(scope)
+        try:
+            stored, lock_token = await self._wait_for_turn(store, identity, key)
+        except Exception as e:
+            logger.warning("Хранилище ключей идемпотентности недоступно: %s", e)
+            await self.app(scope, receive, send)
+            return
+
+        if stored is not None and stored.fingerprint not in ("", fingerprint):
+            response = JSONResponse(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                content={
+                    "detail": "Idempotency-Key уже использован для другого запроса"
+                },
+            )
+            await response(scope, receive, send)
+            return
+        if stored is not None:
+            response = Response(
+                content=stored.body,
+                status_code=stored.status_code,
+                media_type="application/json",
+                headers={"Idempotent-Replayed": "true"},
+            )
+            await response(scope, receive, send)
+            return
+        if lock_token is None:
+            response = JSONResponse(
+                status_code=status.HTTP_409_CONFLICT,
+                content={"detail": "Запрос с этим Idempotency-Key ещё выполняется"},
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 0
+        body = bytearray()
+        finished = False
+        renewal = asyncio.create_task(self._keep_lock(store, identity, key, lock_token))
+
+        async def finish() -> None:
+            nonlocal finished
+            finished = True
+            renewal.cancel()
+            with suppress(asyncio.CancelledError):
+                await renewal
+            try:
+                if 200 <= status_code < 300:
+                    await store.save(
+                        identity,
+                        key,
+                        StoredResponse(status_code, bytes(body), fingerprint),
+                    )
+                await store.release(identity, key, lock_token)
+            except Exception as e:
+                logger.warning("Ошибка сохранения ответа для %s: %s", key, e)
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body.extend(message.get("body", b""))
+                # Фоновые задачи Starlette (обработка архива для /upload)
+                # выполняются после отправки тела, но до возврата из приложения:
+                # ответ сохраняется сразу, чтобы повтор не ждал обработку, а
+                # блокировка не истекала во время неё
+                if not message.get("more_body", False):
+                    await finish()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_capture)
+        finally:
+            # Ошибка до отправки ответа: блокировка снимается, ответ не сохраняется
+            if not finished:
+                status_code = 0
+                await finish()
+
+    async def _keep_lock(
+        self, store: IdempotencyStore, identity: str, key: str, token: str
+    ) -> None:
+        """Продлевает блокировку, пока приложение обрабатывает запрос."""
+        interval = store.lock_ttl / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await store.renew(identity, key, token):
+                    logger.warning("Блокировка Idempotency-Key %s потеряна", key)
+                    return
+            except Exception as e:
+                logger.warning("Ошибка продления блокировки для %s: %s", key, e)
+
+    async def _wait_for_turn(
+        self, store: IdempotencyStore, identity: str, key: str
+    ) -> tuple[Optional[StoredResponse], Optional[str]]:
+        """Сохранённый ответ либо блокировка на выполнение; (None, None) — таймаут."""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            stored = await store.get(identity, key)
+            if stored is not None:
+                return stored, None
+            lock_token = await store.acquire(identity, key)
+            if lock_token is not None:
+                # Первый запрос мог завершиться между get и acquire
+                stored = await store.get(identity, key)
+                if stored is not None:
+                    await store.release(identity, key, lock_token)
+                    return stored, None
+                return None, lock_token
+            if time.monotonic() >= deadline:
+                return None, None
+            await asyncio.sleep(self.poll_interval)
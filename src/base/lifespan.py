@@ -1,25 +1,131 @@
-from contextlib import asynccontextmanager
+import asyncio
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
 from typing import AsyncIterator
 
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
-from redis import asyncio as aioredis
 
 from fastapi import FastAPI
+from sqlalchemy import text
 
-from settings import Settings
+from auth.keycloak_config import token_verifier
+from base.base import async_session, get_engine, get_replica_engine
+from base.cache_coder import build_coder
+from base.idempotency import IdempotencyStore
+from base.metrics import monitor_event_loop_lag
+from base.profiling import profiler
+from base.rate_limit import RateLimiter
+from base.tracing import instrument_engine, setup_tracing
+from base.redis_client import get_redis_client
+from settings import get_settings
+from task.api.deps import create_retention_service, create_storage_repository
+from task.services.task_event_service import task_event_buffer
 
-settings = Settings()  # type: ignore
+logger = logging.getLogger(f"api.{__name__}")
+settings = get_settings()
+
+PREWARM_TIMEOUT = 5
+
+
+async def prewarm() -> None:
+    """
+    Открывает соединения заранее, чтобы первые запросы после старта
+    не платили за подключение к Postgres, Redis и хранилищу. Ошибки не мешают
+    запуску: их покажет /check_startup.
+    """
+    engine = get_engine()
+
+    async def open_pool() -> None:
+        # Соединения удерживаются одновременно, иначе пул переиспользует одно.
+        # Без локального пула (PgBouncer) проверяется одно соединение.
+        # Стек закрывает уже открытые соединения и при ошибке или отмене
+        # по PREWARM_TIMEOUT, иначе они остались бы занятыми в пуле
+        async with AsyncExitStack() as stack:
+            for _ in range(getattr(engine.pool, "size", lambda: 1)()):
+                connection = await stack.enter_async_context(engine.connect())
+                await connection.execute(text("SELECT 1"))
+
+    async def prepare_storage() -> None:
+        # Создание репозитория импортирует клиент minio, поэтому в потоке;
+        # check() создаёт бакет, если его ещё нет
+        storage_repo = await asyncio.to_thread(create_storage_repository)
+        await storage_repo.check()
+
+    results = await asyncio.gather(
+        *(
+            asyncio.wait_for(step, PREWARM_TIMEOUT)
+            for step in (
+                open_pool(),
+                get_redis_client().ping(),
+                prepare_storage(),
+                token_verifier.refresh(),
+            )
+        ),
+        return_exceptions=True,
+    )
+    for name, result in zip(("database", "redis", "storage", "jwks"), results):
+        if isinstance(result, BaseException):
+            logger.warning("Не удалось прогреть %s: %r", name, result)
+
+
+async def maintain_partitions() -> None:
+    """Периодически создаёт секции tasks и применяет срок хранения задач."""
+    while True:
+        try:
+            # Блокировка обслуживания берётся в каждой транзакции заново,
+            # поэтому подходит обычная сессия, в том числе через PgBouncer
+            async with async_session() as session:
+                service = await asyncio.to_thread(create_retention_service, session)
+                await service.run(session)
+        except Exception as e:
+            logger.error(f"Ошибка обслуживания секций tasks: {str(e)}")
+        await asyncio.sleep(settings.TASKS_MAINTENANCE_INTERVAL)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
-    redis = aioredis.from_url(
-        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
-        password=settings.REDIS_PASSWORD,
-        encoding="utf-8",
-        decode_responses=True,
+    redis_client = get_redis_client()
+    engine = get_engine()
+    replica_engine = get_replica_engine()
+    FastAPICache.init(
+        RedisBackend(redis_client),
+        prefix="fastapi-cache",
+        coder=build_coder(
+            settings.CACHE_CODER,
+            settings.CACHE_COMPRESSION,
+            settings.CACHE_COMPRESSION_THRESHOLD,
+        ),
+    )
+    app.state.rate_limiter = RateLimiter(redis_client)
+    app.state.idempotency_store = IdempotencyStore(
+        redis_client, ttl=settings.IDEMPOTENCY_KEY_TTL
+    )
+    tracer_provider = setup_tracing(
+        settings.TRACING_EXPORTER, settings.TRACING_ENDPOINT
     )
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    if tracer_provider is not None:
+        instrument_engine(engine.sync_engine)
+        if replica_engine is not None:
+            instrument_engine(replica_engine.sync_engine)
+    await prewarm()
+    background = [
+        asyncio.create_task(token_verifier.run_refresh_loop()),
+        asyncio.create_task(monitor_event_loop_lag()),
+        asyncio.create_task(maintain_partitions()),
+        asyncio.create_task(task_event_buffer.run(settings.TASK_EVENTS_FLUSH_INTERVAL)),
+    ]
     yield
-    await redis.close()
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await task_event_buffer.flush()
+    await profiler.stop()
+    await redis_client.close()
+    await redis_client.connection_pool.disconnect()
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+    if tracer_provider is not None:
+        tracer_provider.shutdown()
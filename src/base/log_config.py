@@ -0,0 +1,118 @@
+import atexit
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Mapping, Optional
+
+import orjson
+
+# Атрибуты LogRecord; всё остальное пришло через extra и попадает в JSON
+# отдельными полями
+RESERVED_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None)).keys()
+) | {"message", "asctime", "taskName"}
+
+
+class JSONFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON: время, уровень, логгер, сообщение и extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler без форматирования в вызывающем потоке.
+
+    Стандартный QueueHandler.prepare подставляет аргументы в сообщение ещё в
+    событийном цикле. Здесь запись уходит в очередь как есть, а getMessage,
+    форматирование и запись в поток выполняет поток QueueListener. Аргументы
+    логирования не должны изменяться после вызова — для записей сервиса
+    (идентификаторы, числа, строки) это так.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает долю rate записей уровня INFO и ниже от логгера и его потомков.
+
+    Предупреждения и ошибки проходят всегда.
+    """
+
+    def __init__(self, rates: Mapping[str, float]):
+        super().__init__()
+        # Более длинные префиксы проверяются первыми
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + "."):
+                return random.random() < rate
+        return True
+
+
+def setup_logging(
+    level: str = "INFO",
+    module_levels: Optional[Mapping[str, str]] = None,
+    sampling: Optional[Mapping[str, float]] = None,
+    json_format: bool = True,
+) -> QueueListener:
+    """
+    Настраивает логирование через очередь: корневой логгер кладёт записи в
+    очередь, запись в stdout идёт в отдельном потоке.
+
+    Args:
+        level: Уровень корневого логгера.
+        module_levels: Уровни отдельных логгеров, например {"api.task": "DEBUG"}.
+        sampling: Доля сохраняемых записей INFO/DEBUG по логгерам.
+        json_format: JSON-строки или обычный текстовый формат.
+
+    Returns:
+        QueueListener: Запущенный обработчик очереди; при завершении процесса
+        он останавливается и дописывает оставшиеся записи.
+    """
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        JSONFormatter()
+        if json_format
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    if sampling:
+        # Фильтр на обработчике: отброшенная запись не попадает в очередь
+        queue_handler.addFilter(SamplingFilter(sampling))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
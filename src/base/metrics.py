@@ -0,0 +1,140 @@
+import asyncio
+import time
+from typing import Iterable
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Длительность отдельных этапов обработки. Дочерние метрики для каждого этапа
+# создаются один раз при импорте модуля (stage_duration), чтобы на горячем
+# пути не было поиска по меткам.
+STAGE_DURATION = Histogram(
+    "zipservice_stage_duration_seconds",
+    "Длительность этапа обработки запроса или задачи",
+    ["stage"],
+    buckets=(
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+        30,
+    ),
+)
+
+CACHE_REQUESTS = Counter(
+    "zipservice_cache_requests_total",
+    "Обращения к кэшу результатов",
+    ["result"],
+)
+CACHE_HITS = CACHE_REQUESTS.labels(result="hit")
+CACHE_MISSES = CACHE_REQUESTS.labels(result="miss")
+
+BACKGROUND_TASKS_IN_FLIGHT = Gauge(
+    "zipservice_background_tasks_in_flight",
+    "Фоновые задачи обработки, выполняющиеся сейчас",
+)
+
+# Метка pool — имя движка: primary или replica
+DB_POOL_CHECKED_OUT = Gauge(
+    "zipservice_db_pool_checked_out_connections",
+    "Соединения пула БД, выданные сессиям",
+    ["pool"],
+)
+DB_POOL_OVERFLOW = Gauge(
+    "zipservice_db_pool_overflow_connections",
+    "Соединения сверх pool_size, открытые сейчас",
+    ["pool"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "zipservice_db_pool_checkout_wait_seconds",
+    "Ожидание соединения из пула БД, включая открытие нового",
+    ["pool"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CHECKOUT_DURATION = Histogram(
+    "zipservice_db_pool_checkout_duration_seconds",
+    "Время, на которое соединение занято сессией",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30, 120),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "zipservice_db_pool_timeouts_total",
+    "Запросы соединения, не дождавшиеся его за pool_timeout",
+    ["pool"],
+)
+
+TASKS_BY_STATUS = Gauge(
+    "zipservice_tasks",
+    "Количество задач по статусам",
+    ["status"],
+)
+
+TASKS_PARTITIONS_AHEAD = Gauge(
+    "zipservice_tasks_partitions_ahead",
+    "Месяцев после текущего, для которых созданы секции tasks; -1 — нет "
+    "секции и на текущий месяц",
+)
+
+EVENT_LOOP_LAG = Gauge(
+    "zipservice_event_loop_lag_seconds",
+    "Задержка срабатывания таймера событийного цикла",
+)
+
+
+def stage_duration(stage: str) -> Histogram:
+    """Гистограмма длительности этапа stage."""
+    return STAGE_DURATION.labels(stage=stage)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """
+    Периодически измеряет, насколько позже запланированного просыпается
+    событийный цикл. Большая задержка означает блокирующий код в цикле.
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(time.perf_counter() - start - interval, 0))
+
+
+class BodyReceiveMetricsMiddleware:
+    """
+    Время получения тела запроса — от первого вызова receive до последнего
+    сообщения http.request. Для загрузки архива это время приёма
+    multipart-данных от клиента, до разбора формы и вызова эндпоинта.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[tuple[str, str]], stage: str):
+        self.app = app
+        self.paths = set(paths)
+        self.histogram = stage_duration(stage)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or (scope["method"], scope["path"]) not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = None
+
+        async def timed_receive() -> Message:
+            nonlocal started_at
+            if started_at is None:
+                started_at = time.perf_counter()
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body"):
+                self.histogram.observe(time.perf_counter() - started_at)
+            return message
+
+        await self.app(scope, timed_receive, send)
@@ -0,0 +1,352 @@
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import Any, Callable, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(f"api.{__name__}")
+
+# Методы сервиса, для которых собираются отдельные профили
+PROFILED_CLASS_PREFIX = "TaskService."
+
+# Профилируемый запрос (id кадра ProfilingMiddleware) текущей задачи asyncio
+_profiled_request: ContextVar[Optional[int]] = ContextVar(
+    "profiled_request", default=None
+)
+
+
+@dataclass
+class SlowRequest:
+    route: str
+    duration: float
+    started_at: float
+    stacks: Counter[str] = field(default_factory=Counter)
+
+
+class ProfiledExecutor(ThreadPoolExecutor):
+    """
+    Пул потоков событийного цикла по умолчанию (asyncio.to_thread), который
+    запоминает, для какого профилируемого запроса выполняется функция.
+    """
+
+    def __init__(self, profiler: "SamplingProfiler"):
+        super().__init__(thread_name_prefix="asyncio")
+        self.profiler = profiler
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        # submit вызывается в задаче запроса, поэтому контекст ещё её
+        request = _profiled_request.get()
+        if request is None:
+            return super().submit(fn, *args, **kwargs)
+        return super().submit(
+            self.profiler.run_for_request, request, fn, *args, **kwargs
+        )
+
+
+class SamplingProfiler:
+    """
+    Статистический профилировщик событийного цикла и его пула потоков.
+
+    Отдельный поток с периодом interval снимает стек потока событийного
+    цикла и потоков пула по умолчанию, занятых функциями профилируемых
+    запросов (проверка ZIP и файловые операции через asyncio.to_thread).
+    Сэмпл цикла относится к запросу, если в стеке есть кадр
+    ProfilingMiddleware этого запроса, сэмпл потока пула — к запросу,
+    передавшему ему функцию. К методу TaskService сэмпл относится, если в
+    стеке есть его кадр (в том числе в фоновой обработке). Профили хранятся в
+    формате свёрнутых стеков (folded stacks): строка «кадр;кадр;… число»,
+    которую принимают flamegraph.pl и speedscope.
+
+    Профилируется доля запросов sample_rate; если задан slow_threshold,
+    профилируются все запросы, а в профиль маршрута и список медленных
+    запросов попадают только сэмплированные и те, что дольше порога.
+    """
+
+    def __init__(self, max_slow_requests: int = 50):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.slow_threshold: Optional[float] = None
+        self.interval = 0.005
+        self.routes: defaultdict[str, Counter[str]] = defaultdict(Counter)
+        self.methods: defaultdict[str, Counter[str]] = defaultdict(Counter)
+        self.slow_requests: deque[SlowRequest] = deque(maxlen=max_slow_requests)
+        self._active: dict[int, Counter[str]] = {}
+        self._threads: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop_thread_id: Optional[int] = None
+        self._executor_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(
+        self,
+        sample_rate: float,
+        slow_threshold: Optional[float] = None,
+        interval: float = 0.005,
+    ) -> None:
+        """Включает профилирование; вызывается из потока событийного цикла."""
+        await self.stop()
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.interval = interval
+        self._loop_thread_id = threading.get_ident()
+        loop = asyncio.get_running_loop()
+        if self._executor_loop is not loop:
+            loop.set_default_executor(ProfiledExecutor(self))
+            self._executor_loop = loop
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        self.enabled = True
+        logger.info(
+            f"Профилирование включено: доля {sample_rate}, порог {slow_threshold}"
+        )
+
+    async def stop(self) -> None:
+        self.enabled = False
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            # Поток завершается за один interval, до секунды: ожидание
+            # не должно останавливать событийный цикл
+            await asyncio.to_thread(thread.join)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.routes.clear()
+            self.methods.clear()
+            self.slow_requests.clear()
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "slow_threshold": self.slow_threshold,
+                "interval": self.interval,
+                "routes": {key: sum(c.values()) for key, c in self.routes.items()},
+                "methods": {key: sum(c.values()) for key, c in self.methods.items()},
+                "slow_requests": [
+                    {
+                        "route": request.route,
+                        "duration": request.duration,
+                        "started_at": request.started_at,
+                    }
+                    for request in self.slow_requests
+                ],
+            }
+
+    def folded(self, kind: str, key: str) -> Optional[str]:
+        """Профиль маршрута (route), метода (method) или медленного запроса (slow)."""
+        with self._lock:
+            if kind == "route":
+                stacks = self.routes.get(key)
+            elif kind == "method":
+                stacks = self.methods.get(key)
+            elif (
+                kind == "slow" and key.isdigit() and int(key) < len(self.slow_requests)
+            ):
+                stacks = self.slow_requests[int(key)].stacks
+            else:
+                stacks = None
+            if stacks is None:
+                return None
+            return "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+
+    def begin(self, frame: FrameType) -> None:
+        with self._lock:
+            self._active[id(frame)] = Counter()
+
+    def run_for_request(
+        self, request: int, fn: Callable, *args: Any, **kwargs: Any
+    ) -> Any:
+        """Выполняет fn в потоке пула; сэмплы потока относятся к request."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] = request
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._threads.pop(thread_id, None)
+
+    def finish(
+        self, frame: FrameType, route: str, duration: float, sampled: bool
+    ) -> None:
+        with self._lock:
+            stacks = self._active.pop(id(frame), None)
+            if stacks is None:
+                return
+            is_slow = (
+                self.slow_threshold is not None and duration >= self.slow_threshold
+            )
+            if sampled or is_slow:
+                self.routes[route].update(stacks)
+            if is_slow:
+                self.slow_requests.append(
+                    SlowRequest(route, duration, time.time() - duration, stacks)
+                )
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            frame = frames.get(self._loop_thread_id)  # type: ignore[arg-type]
+            if frame is not None:
+                self._sample(frame)
+            with self._lock:
+                threads = list(self._threads.items())
+            for thread_id, request in threads:
+                if (frame := frames.get(thread_id)) is not None:
+                    self._sample(frame, request)
+
+    def _sample(self, frame: FrameType, thread_request: Optional[int] = None) -> None:
+        # Стек собирается от текущего кадра к корню; для запроса и метода
+        # запоминается глубина их кадра, чтобы отрезать кадры цикла или
+        # пула потоков выше
+        names: list[str] = []
+        request: Optional[Counter[str]] = None
+        request_depth = method_depth = 0
+        method = ""
+        with self._lock:
+            current: Optional[FrameType] = frame
+            while current is not None:
+                code = current.f_code
+                if thread_request is not None and code is RUN_FOR_REQUEST_CODE:
+                    # Запрос мог завершиться раньше функции в потоке
+                    request = self._active.get(thread_request)
+                    request_depth = len(names)
+                    break
+                if request is None and id(current) in self._active:
+                    request = self._active[id(current)]
+                    request_depth = len(names)
+                names.append(
+                    f"{code.co_qualname} "
+                    f"({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+                )
+                if (
+                    code.co_qualname.startswith(PROFILED_CLASS_PREFIX)
+                    and "<locals>" not in code.co_qualname
+                ):
+                    method_depth = len(names)
+                    method = code.co_qualname
+                current = current.f_back
+
+            if request is not None and request_depth:
+                request[";".join(reversed(names[:request_depth]))] += 1
+            if method:
+                self.methods[method][";".join(reversed(names[:method_depth]))] += 1
+
+
+RUN_FOR_REQUEST_CODE = SamplingProfiler.run_for_request.__code__
+
+
+class ProfilingMiddleware:
+    """
+    Отбирает запросы для профилирования.
+
+    Пока профилировщик выключен, стоит одной проверки флага на запрос.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = self.profiler
+        if scope["type"] != "http" or not profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        sampled = random.random() < profiler.sample_rate
+        if not sampled and profiler.slow_threshold is None:
+            await self.app(scope, receive, send)
+            return
+
+        frame = sys._getframe()
+        profiler.begin(frame)
+        # Через контекст запрос узнаёт ProfiledExecutor в asyncio.to_thread
+        token = _profiled_request.set(id(frame))
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _profiled_request.reset(token)
+            route = scope.get("route")
+            profiler.finish(
+                frame,
+                f"{scope['method']} {getattr(route, 'path', scope['path'])}",
+                time.perf_counter() - started_at,
+                sampled,
+            )
+
+
+class MemoryProfiler:
+    """Снимки tracemalloc по запросу; каждый снимок сравнивается с предыдущим."""
+
+    def __init__(self) -> None:
+        self._previous: Optional[tracemalloc.Snapshot] = None
+
+    def start(self, frames: int = 25) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._previous = None
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._previous = None
+
+    def snapshot(self, limit: int = 20, key_type: str = "lineno") -> dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            return {"tracing": False, "top": [], "diff": []}
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        top = snapshot.statistics(key_type)[:limit]
+        diff = (
+            snapshot.compare_to(self._previous, key_type)[:limit]
+            if self._previous is not None
+            else []
+        )
+        self._previous = snapshot
+        return {
+            "tracing": True,
+            "current": current,
+            "peak": peak,
+            "top": [
+                {
+                    "traceback": stat.traceback.format(),
+                    "size": stat.size,
+                    "count": stat.count,
+                }
+                for stat in top
+            ],
+            "diff": [
+                {
+                    "traceback": stat.traceback.format(),
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in diff
+            ],
+        }
+
+
+profiler = SamplingProfiler()
+memory_profiler = MemoryProfiler()
@@ -0,0 +1,202 @@
+import logging
+import math
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Sequence
+
+from redis.asyncio import Redis
+from starlette import status
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(f"api.{__name__}")
+
+# Token bucket сразу для нескольких бюджетов: запрос проходит, только если
+# хватает токенов во всех бюджетах, и тогда списывается из каждого. Время
+# берётся у Redis, чтобы все экземпляры сервиса считали по одним часам.
+# ARGV: тройки (ёмкость, пополнение в токенах за мс, стоимость запроса).
+# Ответ: {разрешено, мс до повтора, [остаток, мс до полного бюджета]...}
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local allowed = 1
+local retry_ms = 0
+local tokens = {}
+
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local cost = tonumber(ARGV[i * 3])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local available = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now_ms
+    available = math.min(capacity, available + math.max(0, now_ms - ts) * rate)
+    tokens[i] = available
+    if available < cost then
+        allowed = 0
+        retry_ms = math.max(retry_ms, math.ceil((cost - available) / rate))
+    end
+end
+
+local result = {allowed, retry_ms}
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local available = tokens[i]
+    if allowed == 1 then
+        available = available - tonumber(ARGV[i * 3])
+    end
+    local full_ms = math.ceil((capacity - available) / rate)
+    redis.call('HSET', KEYS[i], 'tokens', tostring(available), 'ts', now_ms)
+    redis.call('PEXPIRE', KEYS[i], full_ms + 1000)
+    table.insert(result, math.floor(available))
+    table.insert(result, full_ms)
+end
+return result
+"""
+
+
+@dataclass(frozen=True)
+class Budget:
+    name: str
+    capacity: int
+    period: float  # секунд на полное пополнение
+    cost: Optional[Callable[[Scope], int]] = None  # по умолчанию 1 за запрос
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    method: str
+    path_prefix: str
+    budgets: Sequence[Budget]
+
+
+@dataclass(frozen=True)
+class RateLimitState:
+    allowed: bool
+    retry_after: float
+    budget: Budget
+    remaining: int
+    reset: float
+
+
+class RateLimiter:
+    def __init__(self, redis: Redis, prefix: str = "rate-limit"):
+        self.prefix = prefix
+        self.script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(
+        self, identity: str, budgets: Sequence[Budget], scope: Scope
+    ) -> RateLimitState:
+        """
+        Атомарно списывает стоимость запроса из всех бюджетов.
+
+        Returns:
+            RateLimitState: Итог и состояние самого исчерпанного бюджета
+            для заголовков RateLimit-*.
+        """
+        args: list[float] = []
+        for budget in budgets:
+            cost = budget.cost(scope) if budget.cost else 1
+            args += [budget.capacity, budget.capacity / (budget.period * 1000), cost]
+
+        result = await self.script(
+            keys=[f"{self.prefix}:{budget.name}:{identity}" for budget in budgets],
+            args=args,
+        )
+        allowed, retry_ms, *states = (int(value) for value in result)
+
+        index = min(
+            range(len(budgets)),
+            key=lambda i: states[i * 2] / budgets[i].capacity,
+        )
+        return RateLimitState(
+            allowed=bool(allowed),
+            retry_after=retry_ms / 1000,
+            budget=budgets[index],
+            remaining=max(states[index * 2], 0),
+            reset=states[index * 2 + 1] / 1000,
+        )
+
+
+class RateLimitMiddleware:
+    """
+    Ограничение частоты запросов на уровне ASGI.
+
+    Срабатывает до чтения тела запроса и до открытия сессии БД. Лимитер
+    берётся из app.state.rate_limiter (создаётся в lifespan); если его нет
+    или Redis недоступен, запросы пропускаются без ограничений.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: Sequence[RateLimitRule],
+        identify: Callable[[Scope], Awaitable[Optional[str]]],
+    ):
+        self.app = app
+        self.rules = rules
+        self.identify = identify
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule = self._match(scope)
+        limiter: Optional[RateLimiter] = getattr(
+            scope["app"].state, "rate_limiter", None
+        )
+        identity = await self.identify(scope) if rule and limiter else None
+        if rule is None or limiter is None or identity is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            state = await limiter.acquire(identity, rule.budgets, scope)
+        except Exception as e:
+            logger.warning("Ограничение частоты запросов недоступно: %s", e)
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            "RateLimit-Limit": str(state.budget.capacity),
+            "RateLimit-Remaining": str(state.remaining),
+            "RateLimit-Reset": str(math.ceil(state.reset)),
+        }
+        if not state.allowed:
+            headers["Retry-After"] = str(math.ceil(state.retry_after))
+            response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"detail": "Превышен лимит запросов"},
+                headers=headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        raw_headers = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), *raw_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def _match(self, scope: Scope) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if scope["method"] == rule.method and scope["path"].startswith(
+                rule.path_prefix
+            ):
+                return rule
+        return None
+
+
+def content_length(default: int) -> Callable[[Scope], int]:
+    """Стоимость по заголовку Content-Length; без него — default."""
+
+    def cost(scope: Scope) -> int:
+        value = Headers(scope=scope).get("content-length")
+        return int(value) if value and value.isdigit() else default
+
+    return cost
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Mapping
+
+logger = logging.getLogger(f"api.{__name__}")
+
+ReadinessCheck = Callable[[], Awaitable[Any]]
+
+
+async def run_checks(
+    checks: Mapping[str, ReadinessCheck], timeout: float = 2.0
+) -> dict[str, str]:
+    """
+    Выполняет проверки зависимостей параллельно, каждую с таймаутом.
+
+    Returns:
+        dict[str, str]: «ok» или текст ошибки для каждой проверки.
+    """
+
+    async def run(name: str, check: ReadinessCheck) -> str:
+        try:
+            await asyncio.wait_for(check(), timeout)
+        except Exception as e:
+            logger.warning("Проверка готовности %s не прошла: %r", name, e)
+            return repr(e)
+        return "ok"
+
+    results = await asyncio.gather(
+        *(run(name, check) for name, check in checks.items())
+    )
+    return dict(zip(checks, results))
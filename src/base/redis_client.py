@@ -0,0 +1,21 @@
+from functools import lru_cache
+
+from redis.asyncio import ConnectionPool, Redis
+
+from settings import get_settings
+
+
+@lru_cache
+def get_redis_client() -> Redis:
+    """
+    Один пул соединений на приложение: кэш, ограничение частоты запросов
+    и ключи идемпотентности работают через общий клиент. Соединение
+    бинарное — значения кэша кодируются BinaryCoder, а не текстом.
+    """
+    settings = get_settings()
+    redis_pool = ConnectionPool.from_url(
+        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
+        password=settings.REDIS_PASSWORD,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+    )
+    return Redis(connection_pool=redis_pool)
@@ -0,0 +1,199 @@
+import functools
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Optional, Sequence, TypeVar
+
+import orjson
+from opentelemetry import propagate, trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(f"api.{__name__}")
+
+# Пока в lifespan не установлен TracerProvider, трейсер возвращает
+# no-op спаны, и инструментирование почти ничего не стоит
+tracer = trace.get_tracer("zipservice")
+
+R = TypeVar("R")
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Пишет спаны в файл, по одному JSON-объекту в строке.
+
+    Поля названы как в OTLP/JSON (traceId, spanId, parentSpanId, ...),
+    поэтому файл можно разобрать локально или переслать в коллектор.
+    Экспорт выполняется в потоке BatchSpanProcessor, а не в событийном цикле.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = b"".join(orjson.dumps(self._to_dict(span)) + b"\n" for span in spans)
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    @staticmethod
+    def _to_dict(span: ReadableSpan) -> dict[str, Any]:
+        context = span.get_span_context()
+        return {
+            "traceId": f"{context.trace_id:032x}",
+            "spanId": f"{context.span_id:016x}",
+            "parentSpanId": f"{span.parent.span_id:016x}" if span.parent else "",
+            "name": span.name,
+            "kind": span.kind.name,
+            "startTimeUnixNano": span.start_time,
+            "endTimeUnixNano": span.end_time,
+            "attributes": dict(span.attributes or {}),
+            "status": {"code": span.status.status_code.name},
+            "events": [
+                {
+                    "name": span_event.name,
+                    "timeUnixNano": span_event.timestamp,
+                    "attributes": dict(span_event.attributes or {}),
+                }
+                for span_event in span.events
+            ],
+        }
+
+
+def _otlp_exporter(endpoint: str) -> SpanExporter:
+    # Необязательная зависимость: нужна только при TRACING_EXPORTER=otlp
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+        OTLPSpanExporter,
+    )
+
+    return OTLPSpanExporter(endpoint=endpoint)
+
+
+# Экспортёры по имени из настроек TRACING_EXPORTER; аргумент — TRACING_ENDPOINT
+EXPORTERS: dict[str, Callable[[str], SpanExporter]] = {
+    "console": lambda endpoint: ConsoleSpanExporter(),
+    "file": FileSpanExporter,
+    "otlp": _otlp_exporter,
+}
+
+
+def setup_tracing(
+    exporter: str, endpoint: str, service_name: str = "zipservice"
+) -> Optional[TracerProvider]:
+    """Устанавливает глобальный TracerProvider; exporter="none" — трассировка выключена."""
+    if exporter == "none":
+        return None
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(EXPORTERS[exporter](endpoint)))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Трассировка включена, экспорт: {exporter}")
+    return provider
+
+
+def traced(
+    name: str,
+) -> Callable[[Callable[..., Awaitable[R]]], Callable[..., Awaitable[R]]]:
+    """Декоратор: вызов корутины оборачивается в спан name."""
+
+    def decorator(func: Callable[..., Awaitable[R]]) -> Callable[..., Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> R:
+            # Спан создаётся при вызове: провайдер устанавливается уже после
+            # импорта модулей
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def inject_context() -> dict[str, str]:
+    """Контекст текущего спана в виде заголовков W3C traceparent/tracestate."""
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+def extract_context(carrier: dict[str, str]) -> Context:
+    return propagate.extract(carrier)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Спан на каждый SQL-запрос движка."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context._span = tracer.start_span(
+            "db.statement",
+            kind=SpanKind.CLIENT,
+            attributes={"db.system": "postgresql", "db.statement": statement},
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        span = getattr(context, "_span", None)
+        if span is not None:
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, "_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+
+
+class TracingMiddleware:
+    """
+    Серверный спан на каждый HTTP-запрос.
+
+    Входящий заголовок traceparent продолжает трейс клиента.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=extract_context(dict(Headers(scope=scope))),
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+            },
+        ) as span:
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
@@ -1,5 +1,8 @@
 import logging
+from typing import BinaryIO
 
+from base.metrics import stage_duration
+from base.tracing import traced
 from gateways.sonarqube import (
     CheckResult,
     Bugs,
@@ -8,21 +11,28 @@ from gateways.sonarqube import (
     SonarQubeResults,
 )
 
-logger = logging.getLogger("api")
+logger = logging.getLogger(f"api.{__name__}")
+
+ANALYZER_DURATION = stage_duration("analyzer")
 
 
 class SonarqubeService:
-    async def check_zip(self, zip_file: bytes) -> SonarQubeResults:
+    @traced("sonarqube.check_zip")
+    async def check_zip(self, zip_file: BinaryIO) -> SonarQubeResults:
         """
         Фиктивный метод для анализа ZIP-файла и возврата результатов SonarQube.
 
         Args:
-            zip_file (bytes): Содержимое ZIP-файла в виде байтов.
+            zip_file (BinaryIO): ZIP-файл, открытый на чтение с начала.
 
         Returns:
             SonarQubeResults: Результаты анализа в формате Pydantic-схемы.
         """
-        logger.info("Запуск фиктивного анализа SonarQube для ZIP-файла")
+        with ANALYZER_DURATION.time():
+            return await self._check_zip(zip_file)
+
+    async def _check_zip(self, zip_file: BinaryIO) -> SonarQubeResults:
+        logger.debug("Запуск фиктивного анализа SonarQube для ZIP-файла")
         # TODO запрос и получение данных у внешнего сервиса
 
         # Формируем фиктивные результаты в формате Pydantic-схем
@@ -35,5 +45,5 @@ class SonarqubeService:
 
         results = SonarQubeResults(sonarqube=check_result)
 
-        logger.info(f"Результаты SonarQube: {results}")
+        logger.debug("Результаты SonarQube: %r", results)
         return results
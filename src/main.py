@@ -1,26 +1,55 @@
-import logging
-from logging import getLogger
-
-import uvicorn
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 from api.api import router as api_router
+from base.idempotency import IdempotencyMiddleware
 from base.lifespan import lifespan
+from base.log_config import setup_logging
+from base.metrics import BodyReceiveMetricsMiddleware
+from base.profiling import ProfilingMiddleware, profiler
+from base.rate_limit import RateLimitMiddleware
+from base.tracing import TracingMiddleware
 from task.api.api import router as task_router
-from task.exceptions.task_middleware import (
-    exception_traceback_middleware as task_exception_traceback_middleware,
-)
+from task.api.deps import identify_user
+from task.api.rate_limits import rate_limit_rules
+from task.exceptions.handlers import register_exception_handlers
+from settings import get_settings
+
+settings = get_settings()
 
 origins = [
     "*",
 ]
 
-logger = getLogger("api")
-logging.basicConfig()
-logger.setLevel(logging.DEBUG)
+setup_logging(
+    settings.LOG_LEVEL,
+    module_levels=settings.LOG_LEVELS,
+    sampling=settings.LOG_SAMPLING,
+    json_format=settings.LOG_FORMAT == "json",
+)
 
 app = FastAPI(Title="ZIPService", lifespan=lifespan)
 
+app.add_middleware(
+    BodyReceiveMetricsMiddleware,  # noqa
+    paths=[("POST", "/upload")],
+    stage="multipart_receive",
+)
+
+app.add_middleware(ProfilingMiddleware, profiler=profiler)  # noqa
+
+app.add_middleware(
+    RateLimitMiddleware,  # noqa
+    rules=rate_limit_rules,
+    identify=identify_user,
+)
+
+# Снаружи ограничителя частоты: повторы по Idempotency-Key не тратят бюджет
+app.add_middleware(
+    IdempotencyMiddleware,  # noqa
+    paths=[("POST", "/upload")],
+    identify=identify_user,
+)
+
 app.add_middleware(
     CORSMiddleware,  # noqa
     allow_origins=origins,
@@ -29,10 +58,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Самый внешний слой: спан запроса покрывает все остальные middleware
+app.add_middleware(TracingMiddleware)  # noqa
+
 app.include_router(api_router)
 app.include_router(task_router)
 
-app.middleware("http")(task_exception_traceback_middleware)
+register_exception_handlers(app)
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="localhost", port=8000)
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,11 +13,33 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASS: str
     POSTGRES_PASSWORD: str
+    # Реплика для чтения; без DB_REPLICA_HOST чтение идёт в основную БД
+    DB_REPLICA_HOST: Optional[str] = None
+    DB_REPLICA_PORT: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    # Секунды жизни соединения, -1 — без ограничения
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = True
+    # Подключение через PgBouncer в режиме transaction: без локального пула
+    # и без кэша подготовленных выражений
+    DB_PGBOUNCER: bool = False
+
+    # Хранилище архивов: minio — бакет MinIO/S3, local — каталог
+    # STORAGE_LOCAL_PATH для установок на одном узле
+    STORAGE_BACKEND: Literal["minio", "local"] = "minio"
+    STORAGE_LOCAL_PATH: str = "storage"
+    # Часть архива при передаче в хранилище и обратно: столько архива
+    # держится в памяти на запрос. Не меньше 5 МБ — минимальной части
+    # multipart-загрузки S3
+    STORAGE_CHUNK_SIZE: int = 5 * 1024 * 1024
 
-    MINIO_NAME: str
-    MINIO_PORT: str
-    MINIO_ACCESS_KEY: str
-    MINIO_SECRET_KEY: str
+    # Нужны только при STORAGE_BACKEND=minio
+    MINIO_NAME: str = "minio"
+    MINIO_PORT: str = "9000"
+    MINIO_ACCESS_KEY: Optional[str] = None
+    MINIO_SECRET_KEY: Optional[str] = None
 
     KEYCLOAK_ADMIN: str
     KEYCLOAK_ADMIN_PASSWORD: str
@@ -37,3 +62,61 @@ class Settings(BaseSettings):
     REDIS_HOST: str
     REDIS_PORT: str
     REDIS_PASSWORD: str
+    REDIS_MAX_CONNECTIONS: int = 50
+
+    CACHE_CODER: Literal["msgpack", "orjson"] = "msgpack"
+    CACHE_COMPRESSION: Literal["none", "zlib", "zstd"] = "zstd"
+    CACHE_COMPRESSION_THRESHOLD: int = 1024
+
+    RATE_LIMIT_UPLOADS_PER_MINUTE: int = 10
+    RATE_LIMIT_UPLOAD_MB_PER_HOUR: int = 1024
+    RATE_LIMIT_READS_PER_MINUTE: int = 600
+
+    IDEMPOTENCY_KEY_TTL: int = 24 * 60 * 60
+
+    # Запись журнала task_events: пачка пишется по наполнении или раз в
+    # интервал; сверх TASK_EVENTS_MAX_BUFFER старые события отбрасываются
+    TASK_EVENTS_BATCH_SIZE: int = 500
+    TASK_EVENTS_FLUSH_INTERVAL: float = 1.0
+    TASK_EVENTS_MAX_BUFFER: int = 100_000
+
+    # Срок хранения задач и их архивов; без него секции только создаются
+    TASKS_RETENTION_DAYS: Optional[int] = None
+    # drop — секция удаляется, detach — остаётся отдельной таблицей для выгрузки
+    TASKS_RETENTION_MODE: Literal["drop", "detach"] = "drop"
+    # Сколько месячных секций держать созданными впереди текущего месяца
+    TASKS_PARTITIONS_AHEAD: int = 2
+    # Меньше секций впереди — /check_startup отвечает 503: вставка задач
+    # перестанет работать, когда месяцы с секциями закончатся
+    TASKS_PARTITIONS_MIN_AHEAD: int = 1
+    TASKS_MAINTENANCE_INTERVAL: int = 60 * 60
+    # Задачи PENDING и IN_PROGRESS старше стольких секунд брошены (процесс
+    # остановился во время обработки) и переводятся в FAILED; None — никогда
+    TASKS_STALE_AFTER: Optional[int] = 60 * 60
+
+    LOG_LEVEL: str = "INFO"
+    # Уровни отдельных логгеров, JSON: {"api.task.repositories": "DEBUG"}
+    LOG_LEVELS: dict[str, str] = {"api": "INFO"}
+    # Доля сохраняемых записей INFO/DEBUG по логгерам, JSON: {"api.base": 0.1}
+    LOG_SAMPLING: dict[str, float] = {}
+    LOG_FORMAT: Literal["json", "text"] = "json"
+
+    # Bearer-токен для /metrics; без него эндпоинт открыт всем, кто видит
+    # порт сервиса, и закрывать его нужно на уровне сети
+    METRICS_TOKEN: Optional[str] = None
+    # Число завершённых задач на /metrics — полный подсчёт по таблице tasks,
+    # он выполняется не чаще раза в столько секунд
+    METRICS_TERMINAL_COUNT_TTL: int = 5 * 60
+
+    # Роль Keycloak (realm_access.roles) для служебных эндпоинтов /admin
+    ADMIN_ROLE: str = "admin"
+
+    TRACING_EXPORTER: Literal["none", "console", "file", "otlp"] = "none"
+    # Путь к файлу для exporter=file или адрес коллектора для exporter=otlp
+    TRACING_ENDPOINT: str = "traces.jsonl"
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Настройки приложения: окружение и .env читаются один раз на процесс."""
+    return Settings()  # type: ignore
@@ -1,7 +1,11 @@
 from fastapi import APIRouter
 
 from task.api.endpoints.task import router as task_router
+from task.api.endpoints.stats import router as stats_router
+from task.api.endpoints.metrics import router as metrics_router
 
 router = APIRouter()
 
 router.include_router(task_router)
+router.include_router(stats_router)
+router.include_router(metrics_router)
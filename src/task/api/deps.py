@@ -1,20 +1,44 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
 from fastapi import Depends, Security
-from keycloak import KeycloakAuthenticationError
-from minio import Minio
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import Headers
+from starlette.types import Scope
 
-from auth.keycloak_config import keycloak_openid, oauth2_scheme
-from base.base import get_async_session
+from auth.jwt_verifier import TokenVerificationError
+from auth.keycloak_config import oauth2_scheme, token_verifier
+from base.base import get_async_session, get_read_only_session
 from gateways.sonarqube.sonarqube import SonarqubeService
-from settings import Settings
-from task.exceptions import AccessDeniedException
-from task.repositories import StorageRepository, TaskRepository
+from settings import get_settings
+from task.exceptions import AccessDeniedException, AdminRequiredException
+from task.repositories import (
+    LocalStorageRepository,
+    MinioStorageRepository,
+    StatsRepository,
+    StorageRepository,
+    TaskEventRepository,
+    TaskPartitionRepository,
+    TaskRepository,
+)
+from task.services.task_event_service import TaskEventService
+from task.services.retention_service import RetentionService
+from task.services.stats_service import StatsService
 from task.services.task_service import TaskService
 
-settings = Settings()  # type: ignore
+if TYPE_CHECKING:
+    from minio import Minio
+
+settings = get_settings()
 
 
-async def get_minio_client() -> Minio:
+# Клиент MinIO потокобезопасен и держит пул соединений, поэтому создаётся
+# один раз, а не на каждый запрос
+@lru_cache
+def create_minio_client() -> "Minio":
+    # Импорт minio заметно удлиняет старт, клиент нужен только при работе
+    from minio import Minio
+
     return Minio(
         endpoint=settings.MINIO_NAME + ":" + settings.MINIO_PORT,
         access_key=settings.MINIO_ACCESS_KEY,
@@ -23,14 +47,40 @@ async def get_minio_client() -> Minio:
     )
 
 
+# Репозиторий создаётся один раз; к хранилищу конструктор не обращается,
+# бакет проверяет и создаёт StorageRepository.check() при старте
+@lru_cache
+def create_storage_repository() -> StorageRepository:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorageRepository(
+            settings.STORAGE_LOCAL_PATH, chunk_size=settings.STORAGE_CHUNK_SIZE
+        )
+    return MinioStorageRepository(
+        create_minio_client(),
+        bucket_name="zip-bucket",
+        chunk_size=settings.STORAGE_CHUNK_SIZE,
+    )
+
+
+def create_retention_service(session: AsyncSession) -> RetentionService:
+    return RetentionService(
+        partition_repo=TaskPartitionRepository(session=session),
+        storage_repo=create_storage_repository(),
+        retention_days=settings.TASKS_RETENTION_DAYS,
+        archive=settings.TASKS_RETENTION_MODE == "detach",
+        months_ahead=settings.TASKS_PARTITIONS_AHEAD,
+        event_repo=TaskEventRepository(session=session),
+        task_repo=TaskRepository(session=session),
+        stale_after=settings.TASKS_STALE_AFTER,
+    )
+
+
 async def get_sonarqube_service() -> SonarqubeService:
     return SonarqubeService()
 
 
-async def get_storage_repository(
-    minio_client: Minio = Depends(get_minio_client),
-) -> StorageRepository:
-    return StorageRepository(minio_client, bucket_name="zip-bucket")
+async def get_storage_repository() -> StorageRepository:
+    return create_storage_repository()
 
 
 async def get_task_repository(
@@ -39,21 +89,82 @@ async def get_task_repository(
     return TaskRepository(session=session)
 
 
+async def get_stats_repository(
+    session: AsyncSession = Depends(get_async_session),
+) -> StatsRepository:
+    return StatsRepository(session=session)
+
+
+async def get_stats_service(
+    stats_repo: StatsRepository = Depends(get_stats_repository),
+) -> StatsService:
+    return StatsService(stats_repo=stats_repo)
+
+
+async def get_task_event_service(
+    session: AsyncSession = Depends(get_read_only_session),
+) -> TaskEventService:
+    return TaskEventService(event_repo=TaskEventRepository(session=session))
+
+
 async def get_task_service(
     storage_repo: StorageRepository = Depends(get_storage_repository),
     task_repo: TaskRepository = Depends(get_task_repository),
     sonarqube_service: SonarqubeService = Depends(get_sonarqube_service),
+    stats_service: StatsService = Depends(get_stats_service),
 ) -> TaskService:
     return TaskService(
         storage_repo=storage_repo,
         task_repo=task_repo,
         sonarqube_service=sonarqube_service,
+        stats_service=stats_service,
     )
 
 
 async def get_current_user(token: str = Security(oauth2_scheme)) -> dict:
     try:
-        userinfo = keycloak_openid.userinfo(token)
-        return userinfo
-    except KeycloakAuthenticationError as e:
+        return await token_verifier.verify(token)
+    except TokenVerificationError as e:
         raise AccessDeniedException(str(e))
+
+
+def is_admin(current_user: dict) -> bool:
+    roles = current_user.get("realm_access", {}).get("roles", [])
+    return settings.ADMIN_ROLE in roles
+
+
+async def get_admin_user(current_user: dict = Depends(get_current_user)) -> dict:
+    if not is_admin(current_user):
+        raise AdminRequiredException()
+    return current_user
+
+
+def scope_owner_id(current_user: dict, owner_id: Optional[str]) -> Optional[str]:
+    """
+    Владелец, по которому фильтруются данные запроса.
+
+    Администратор видит задачи любого владельца, а без owner_id — всех.
+    Остальным доступны только свои задачи: чужой owner_id отклоняется,
+    отсутствующий заменяется на sub из токена.
+    """
+    if is_admin(current_user):
+        return owner_id
+    if owner_id is not None and owner_id != current_user["sub"]:
+        raise AdminRequiredException()
+    return current_user["sub"]
+
+
+async def identify_user(scope: Scope) -> Optional[str]:
+    """
+    sub из Bearer-токена для middleware, работающих до разбора запроса.
+
+    Без валидного токена возвращает None: запрос отклонит сам эндпоинт.
+    """
+    scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        claims = await token_verifier.verify(token)
+    except TokenVerificationError:
+        return None
+    return claims.get("sub")
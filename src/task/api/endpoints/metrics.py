@@ -0,0 +1,81 @@
+import logging
+import secrets
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from base.base import get_read_only_session
+from base.metrics import TASKS_BY_STATUS
+from settings import get_settings
+from task.enums import TaskStatus
+from task.repositories import TaskRepository
+from task.repositories.task_repository import UNFINISHED_STATUSES
+
+router = APIRouter()
+logger = logging.getLogger(f"api.{__name__}")
+settings = get_settings()
+
+FINISHED_STATUSES = (TaskStatus.SUCCESS, TaskStatus.FAILED)
+
+
+class FinishedTaskCounts:
+    """
+    Число завершённых задач. Их строки не попадают в частичный индекс,
+    подсчёт читает всю таблицу, поэтому результат хранится ttl секунд.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.counts: dict[TaskStatus, int] = {}
+        self.expires_at = 0.0
+
+    async def get(self, task_repo: TaskRepository) -> dict[TaskStatus, int]:
+        if time.monotonic() >= self.expires_at:
+            self.counts = await task_repo.count_by_status(FINISHED_STATUSES)
+            self.expires_at = time.monotonic() + self.ttl
+        return self.counts
+
+
+finished_task_counts = FinishedTaskCounts(settings.METRICS_TERMINAL_COUNT_TTL)
+
+
+async def verify_metrics_token(request: Request) -> None:
+    """Без METRICS_TOKEN эндпоинт открыт: доступ ограничивается сетью."""
+    if settings.METRICS_TOKEN is None:
+        return
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get(
+    "/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_token)]
+)
+async def metrics(
+    session: AsyncSession = Depends(get_read_only_session),
+) -> Response:
+    # Число задач по статусам считается в момент опроса, а не на горячем пути:
+    # незавершённые — по частичному индексу при каждом опросе, завершённые —
+    # полным подсчётом не чаще раза в METRICS_TERMINAL_COUNT_TTL
+    task_repo = TaskRepository(session=session)
+    try:
+        counts = {
+            **await task_repo.count_by_status(UNFINISHED_STATUSES),
+            **await finished_task_counts.get(task_repo),
+        }
+    except Exception as e:
+        logger.warning(f"Не удалось получить число задач по статусам: {str(e)}")
+    else:
+        for task_status in TaskStatus:
+            TASKS_BY_STATUS.labels(status=task_status.value).set(
+                counts.get(task_status, 0)
+            )
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
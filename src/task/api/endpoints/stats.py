@@ -0,0 +1,52 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from base.base import get_read_only_session
+from task.api.deps import (
+    get_current_user,
+    get_stats_service,
+    get_task_event_service,
+    is_admin,
+)
+from task.exceptions import AdminRequiredException
+from task.schemas import TaskLatencyResponse, TaskStatsResponse
+from task.services.stats_service import StatsService
+from task.services.task_event_service import TaskEventService
+
+router = APIRouter()
+
+StatsServiceDeps = Annotated[StatsService, Depends(get_stats_service)]
+TaskEventServiceDeps = Annotated[TaskEventService, Depends(get_task_event_service)]
+UserDeps = Annotated[dict, Depends(get_current_user)]
+
+
+@router.get("/stats", response_model=TaskStatsResponse)
+async def get_stats(
+    stats_service: StatsServiceDeps,
+    current_user: UserDeps,
+    owner_id: Optional[str] = None,
+    day: Optional[date] = None,
+    session: AsyncSession = Depends(get_read_only_session),
+) -> TaskStatsResponse:
+    """
+    Агрегаты по всем задачам или по задачам владельца owner_id, за всё время
+    или за день day. Статистику другого пользователя видит только
+    администратор.
+    """
+    if owner_id and owner_id != current_user["sub"] and not is_admin(current_user):
+        raise AdminRequiredException()
+    return await stats_service.get_stats(owner_id, day, session)
+
+
+@router.get("/stats/latency", response_model=TaskLatencyResponse)
+async def get_latency(
+    task_event_service: TaskEventServiceDeps,
+    current_user: UserDeps,
+    since: Optional[datetime] = None,
+) -> TaskLatencyResponse:
+    """Перцентили ожидания в очереди и обработки задач; по умолчанию за сутки."""
+    since = since or datetime.now(timezone.utc) - timedelta(days=1)
+    return await task_event_service.get_latency(since)
@@ -1,21 +1,34 @@
 import logging
-from typing import Annotated
-from fastapi import APIRouter, UploadFile, Depends, BackgroundTasks, HTTPException
-from fastapi_cache.decorator import cache
+from datetime import datetime
+from typing import Annotated, Optional
+from uuid import UUID
+from fastapi import APIRouter, UploadFile, Depends, BackgroundTasks, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from task.api.deps import get_task_service, get_current_user
-from task.schemas import TaskResponse, TaskResultResponse
-from task.services.task_service import TaskService
-from base.base import get_async_session
+from task.api.deps import get_task_service, get_current_user, scope_owner_id
+from task.enums import ExportFormat, TaskStatus
+from task.schemas import TaskListResponse, TaskResponse, TaskResultResponse
+from task.services.task_service import TERMINAL_STATUSES, TaskService
+from base.base import get_async_session, get_read_only_session
+from base.responses import ORJSONResponse, etag_matches
 
 router = APIRouter()
-logger = logging.getLogger("api")
+logger = logging.getLogger(f"api.{__name__}")
 
 TaskServiceDeps = Annotated[TaskService, Depends(get_task_service)]
 UserDeps = Annotated[dict, Depends(get_current_user)]
 
-cache_namespace = "TASK"
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+# Результат в терминальном статусе больше не меняется, клиент может хранить
+# его сколько угодно; остальные ответы нужно перепроверять по ETag. Ответ
+# требует авторизации, поэтому общие HTTP-кэши его не сохраняют
+TERMINAL_CACHE_CONTROL = "private, max-age=31536000, immutable"
+PENDING_CACHE_CONTROL = "no-cache"
 
 
 @router.post("/upload", response_model=TaskResponse, status_code=201)
@@ -26,18 +39,79 @@ async def upload_file(
     current_user: UserDeps,
     session: AsyncSession = Depends(get_async_session),
 ) -> TaskResponse:
-    return await task_service.upload_and_process_file(file, background_tasks, session)
+    return await task_service.upload_and_process_file(
+        file, background_tasks, session, owner_id=current_user.get("sub")
+    )
+
+
+@router.get("/tasks", response_model=TaskListResponse)
+async def list_tasks(
+    task_service: TaskServiceDeps,
+    current_user: UserDeps,
+    status: Annotated[Optional[list[TaskStatus]], Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_only_session),
+) -> TaskListResponse:
+    return await task_service.list_tasks(
+        current_user["sub"], limit, statuses=status, cursor=cursor, session=session
+    )
 
 
-@router.get("/results/{task_id}", response_model=TaskResultResponse)
-@cache(namespace=cache_namespace, expire=60)
+@router.get("/tasks/export", response_class=StreamingResponse)
+async def export_tasks(
+    task_service: TaskServiceDeps,
+    current_user: UserDeps,
+    export_format: Annotated[ExportFormat, Query(alias="format")] = (
+        ExportFormat.NDJSON
+    ),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    owner_id: Optional[str] = None,
+    status: Annotated[Optional[list[TaskStatus]], Query()] = None,
+) -> StreamingResponse:
+    return StreamingResponse(
+        task_service.export_results(
+            export_format,
+            created_from=created_from,
+            created_to=created_to,
+            owner_id=scope_owner_id(current_user, owner_id),
+            statuses=status,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="tasks.{export_format.value}"'
+            )
+        },
+    )
+
+
+@router.get(
+    "/results/{task_id}",
+    response_model=TaskResultResponse,
+    response_class=ORJSONResponse,
+    responses={304: {"description": "Результат не изменился"}},
+)
 async def get_results(
-    task_id: str,
+    task_id: UUID,
+    request: Request,
     task_service: TaskServiceDeps,
     current_user: UserDeps,
-    session: AsyncSession = Depends(get_async_session),
-) -> TaskResultResponse:
-    result = await task_service.get_task_result(task_id, session)
-    if result is None:
-        raise HTTPException(status_code=404, detail="Задача не найдена")
-    return result
+    session: AsyncSession = Depends(get_read_only_session),
+) -> Response:
+    result = await task_service.get_task_result_cached(str(task_id), session)
+    headers = {
+        "ETag": result.etag,
+        "Cache-Control": (
+            TERMINAL_CACHE_CONTROL
+            if result.status in TERMINAL_STATUSES
+            else PENDING_CACHE_CONTROL
+        ),
+        "Vary": "Authorization",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, result.etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(content=result.body, headers=headers)
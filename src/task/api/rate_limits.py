@@ -0,0 +1,26 @@
+from base.rate_limit import Budget, RateLimitRule, content_length
+from settings import get_settings
+from task.services.task_service import TaskService
+
+settings = get_settings()
+
+uploads = Budget(
+    name="uploads", capacity=settings.RATE_LIMIT_UPLOADS_PER_MINUTE, period=60
+)
+upload_bytes = Budget(
+    name="upload-bytes",
+    capacity=settings.RATE_LIMIT_UPLOAD_MB_PER_HOUR * 1024 * 1024,
+    period=60 * 60,
+    # Без Content-Length тело может быть любого размера в пределах лимита файла
+    cost=content_length(default=TaskService.MAX_FILE_SIZE),
+)
+reads = Budget(name="reads", capacity=settings.RATE_LIMIT_READS_PER_MINUTE, period=60)
+
+rate_limit_rules = [
+    RateLimitRule(
+        method="POST", path_prefix="/upload", budgets=[uploads, upload_bytes]
+    ),
+    RateLimitRule(method="GET", path_prefix="/results/", budgets=[reads]),
+    RateLimitRule(method="GET", path_prefix="/tasks", budgets=[reads]),
+    RateLimitRule(method="GET", path_prefix="/stats", budgets=[reads]),
+]
@@ -0,0 +1,6 @@
+from enum import Enum as PyEnum
+
+
+class ExportFormat(PyEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
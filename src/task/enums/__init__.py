@@ -1,3 +1,4 @@
 from task.enums.TaskStatus import TaskStatus
+from task.enums.ExportFormat import ExportFormat
 
-__all__ = ["TaskStatus"]
+__all__ = ["TaskStatus", "ExportFormat"]
@@ -5,6 +5,8 @@ from task.exceptions.task import (
     TaskNotFoundException,
     ProcessingException,
     AccessDeniedException,
+    InvalidCursorException,
+    AdminRequiredException,
 )
 
 __all__ = [
@@ -14,4 +16,6 @@ __all__ = [
     "TaskNotFoundException",
     "ProcessingException",
     "AccessDeniedException",
+    "InvalidCursorException",
+    "AdminRequiredException",
 ]
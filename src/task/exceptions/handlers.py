@@ -0,0 +1,70 @@
+from logging import getLogger
+from typing import Optional
+
+from fastapi import FastAPI
+from fastapi.requests import Request
+from starlette import status
+from starlette.responses import JSONResponse
+
+from exceptions import BaseExceptionWithMessage
+from task.exceptions import (
+    InvalidFileException,
+    FileSizeExceededException,
+    ZipValidationException,
+    TaskNotFoundException,
+    ProcessingException,
+    AccessDeniedException,
+    InvalidCursorException,
+    AdminRequiredException,
+)
+
+logger = getLogger(f"api.{__name__}")
+
+# Исключения, которые отдаются клиенту как {"detail": message} со своим
+# status_code, и префикс сообщения в логе (None — в лог не пишутся).
+# Остальные исключения отдаются как 500.
+EXCEPTION_LOG_PREFIXES: dict[type[BaseExceptionWithMessage], Optional[str]] = {
+    InvalidFileException: None,
+    FileSizeExceededException: None,
+    ZipValidationException: None,
+    InvalidCursorException: None,
+    TaskNotFoundException: None,
+    ProcessingException: "Processing error",
+    AccessDeniedException: "AccessDeniedException",
+    AdminRequiredException: "AdminRequiredException",
+}
+
+
+async def exception_with_message_handler(
+    request: Request, exc: Exception
+) -> JSONResponse:
+    assert isinstance(exc, BaseExceptionWithMessage)
+    prefix = next(
+        (
+            EXCEPTION_LOG_PREFIXES[cls]
+            for cls in type(exc).__mro__
+            if cls in EXCEPTION_LOG_PREFIXES
+        ),
+        None,
+    )
+    if prefix is not None:
+        logger.error(f"{prefix}: {exc.message}")
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.message})
+
+
+async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+    logger.exception("%s: %s", exc.__class__.__name__, exc)
+    return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={})
+
+
+def register_exception_handlers(app: FastAPI) -> None:
+    """
+    Регистрирует обработчики исключений в приложении.
+
+    Обработчики вызываются из ExceptionMiddleware Starlette, без обёртки
+    BaseHTTPMiddleware вокруг каждого запроса и без буферизации потоковых
+    тел запросов и ответов.
+    """
+    for exception_class in EXCEPTION_LOG_PREFIXES:
+        app.add_exception_handler(exception_class, exception_with_message_handler)
+    app.add_exception_handler(Exception, unhandled_exception_handler)
@@ -30,3 +30,13 @@ class ProcessingException(BaseExceptionWithMessage):
 class AccessDeniedException(BaseExceptionWithMessage):
     status_code = status.HTTP_401_UNAUTHORIZED
     message = "Invalid authentication credentials"
+
+
+class AdminRequiredException(BaseExceptionWithMessage):
+    status_code = status.HTTP_403_FORBIDDEN
+    message = "Требуются права администратора"
+
+
+class InvalidCursorException(BaseExceptionWithMessage):
+    status_code = status.HTTP_400_BAD_REQUEST
+    message = "Некорректный курсор пагинации"
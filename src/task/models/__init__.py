@@ -1,3 +1,5 @@
 from task.models.task import Task
+from task.models.task_stats import TaskStats
+from task.models.task_event import TaskEvent
 
-__all__ = ["Task"]
+__all__ = ["Task", "TaskStats", "TaskEvent"]
@@ -1,19 +1,63 @@
-from sqlalchemy import String, Enum
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, String, Enum, Uuid, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 import uuid
 from sqlalchemy.orm import Mapped, mapped_column
-from typing import Optional
+from typing import Any, Optional
 
 from base import Base
 from task.enums import TaskStatus
 
+# Условие частичного индекса ix_tasks_unfinished_created_at. Postgres
+# применяет индекс, только если условие запроса заведомо из него следует,
+# поэтому запросы повторяют его текстом, а не параметрами
+UNFINISHED_PREDICATE = "status IN ('PENDING', 'IN_PROGRESS')"
+
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Постраничный вывод задач пользователя по ключу (created_at, task_id)
+        Index("ix_tasks_owner_id_created_at", "owner_id", "created_at", "task_id"),
+        # Незавершённые задачи (поиск брошенных задач RetentionService и
+        # счётчик zipservice_tasks на /metrics): в индексе только PENDING и
+        # IN_PROGRESS, поэтому его размер не растёт вместе с историей
+        Index(
+            "ix_tasks_unfinished_created_at",
+            "created_at",
+            postgresql_where=text(UNFINISHED_PREDICATE),
+        ),
+        # Секции по месяцам created_at (UTC) создаёт и удаляет RetentionService
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    # created_at и updated_at возвращаются из INSERT ... RETURNING без
+    # отдельного SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Нативный uuid (16 байт) в БД, строка в Python. Первичный ключ
+    # секционированной таблицы включает created_at; уникальность task_id
+    # обеспечивает uuid4
     task_id: Mapped[str] = mapped_column(
-        String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True
-    )  # UUID в виде строки
+        Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4())
+    )
     status: Mapped[TaskStatus] = mapped_column(
         Enum(TaskStatus), default=TaskStatus.PENDING, nullable=True
     )
     file_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    results: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    results: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+    owner_id: Mapped[Optional[str]] = mapped_column(
+        String, nullable=True
+    )  # sub из Keycloak
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Enum, Identity, Index, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+
+from base import Base
+from task.enums import TaskStatus
+
+
+class TaskEvent(Base):
+    """
+    Журнал смен статуса задач, только для добавления.
+
+    created_at — время перехода в status по часам сервиса. Строки пишутся
+    пачками из буфера TaskEventBuffer после фиксации транзакции перехода.
+    """
+
+    __tablename__ = "task_events"
+    __table_args__ = (
+        Index("ix_task_events_task_id", "task_id"),
+        # Строки добавляются в порядке времени, поэтому BRIN по created_at
+        # занимает несколько страниц вместо B-дерева на каждую строку
+        Index("ix_task_events_created_at", "created_at", postgresql_using="brin"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    task_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), nullable=False)
+    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Float, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from base import Base
+
+
+class TaskStats(Base):
+    """
+    Агрегаты по результатам задач, обновляемые при записи каждого результата.
+
+    bucket — область агрегирования: "total", "day:<дата>", "user:<sub>"
+    или "user_day:<sub>:<дата>".
+    """
+
+    __tablename__ = "task_stats"
+
+    bucket: Mapped[str] = mapped_column(String, primary_key=True)
+    tasks: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    coverage_sum: Mapped[float] = mapped_column(Float, default=0, nullable=False)
+    bugs_total: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    bugs_critical: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    code_smells_total: Mapped[int] = mapped_column(
+        BigInteger, default=0, nullable=False
+    )
+    code_smells_critical: Mapped[int] = mapped_column(
+        BigInteger, default=0, nullable=False
+    )
+    vulnerabilities_total: Mapped[int] = mapped_column(
+        BigInteger, default=0, nullable=False
+    )
+    vulnerabilities_critical: Mapped[int] = mapped_column(
+        BigInteger, default=0, nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
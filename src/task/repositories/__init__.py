@@ -1,4 +1,21 @@
 from task.repositories.task_repository import TaskRepository
 from task.repositories.storage_repository import StorageRepository
+from task.repositories.local_storage_repository import LocalStorageRepository
+from task.repositories.minio_storage_repository import MinioStorageRepository
+from task.repositories.stats_repository import StatsRepository
+from task.repositories.task_event_repository import TaskEventRepository
+from task.repositories.task_partition_repository import (
+    TaskPartition,
+    TaskPartitionRepository,
+)
 
-__all__ = ["TaskRepository", "StorageRepository"]
+__all__ = [
+    "TaskRepository",
+    "StorageRepository",
+    "LocalStorageRepository",
+    "MinioStorageRepository",
+    "StatsRepository",
+    "TaskPartition",
+    "TaskPartitionRepository",
+    "TaskEventRepository",
+]
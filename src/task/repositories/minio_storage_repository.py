@@ -0,0 +1,110 @@
+from typing import TYPE_CHECKING, BinaryIO, Iterable
+
+from fastapi import UploadFile
+from logging import getLogger
+import asyncio
+
+from base.metrics import stage_duration
+from base.tracing import traced
+from task.repositories.storage_repository import StorageRepository
+
+if TYPE_CHECKING:
+    from minio import Minio
+
+logger = getLogger(f"api.{__name__}")
+
+MINIO_PUT_DURATION = stage_duration("minio_put")
+MINIO_GET_DURATION = stage_duration("minio_get")
+MINIO_REMOVE_DURATION = stage_duration("minio_remove")
+
+
+class MinioStorageRepository(StorageRepository):
+    """
+    Архивы в бакете MinIO или другого S3-совместимого хранилища.
+
+    Конструктор не обращается к сети: бакет проверяется и при необходимости
+    создаётся в check(), который вызывается при старте и в /check_startup.
+    """
+
+    def __init__(
+        self,
+        minio_client: "Minio",
+        bucket_name: str,
+        chunk_size: int = 5 * 1024 * 1024,
+    ):
+        self.minio_client = minio_client
+        self.bucket_name = bucket_name
+        self.chunk_size = chunk_size
+
+    @traced("minio.put_object")
+    async def save_file(self, file: UploadFile, file_name: str) -> None:
+        """
+        Передаёт архив из временного файла загрузки частями по chunk_size:
+        в памяти не больше одной части. Части отправляются по одной,
+        параллельная загрузка держала бы в памяти несколько сразу.
+        """
+        loop = asyncio.get_running_loop()
+        with MINIO_PUT_DURATION.time():
+            await loop.run_in_executor(
+                None,
+                lambda: self.minio_client.put_object(
+                    self.bucket_name,
+                    file_name,
+                    file.file,
+                    file.size if file.size is not None else -1,
+                    part_size=self.chunk_size,
+                    num_parallel_uploads=1,
+                ),
+            )
+
+    @traced("minio.get_object")
+    async def download_file(self, file_name: str, target: BinaryIO) -> None:
+        """Записывает объект в target частями по chunk_size."""
+
+        def download() -> None:
+            response = self.minio_client.get_object(self.bucket_name, file_name)
+            try:
+                for chunk in response.stream(self.chunk_size):
+                    target.write(chunk)
+            finally:
+                response.close()
+                response.release_conn()
+
+        loop = asyncio.get_running_loop()
+        with MINIO_GET_DURATION.time():
+            await loop.run_in_executor(None, download)
+
+    async def check(self) -> None:
+        await asyncio.to_thread(self._ensure_bucket)
+
+    def _ensure_bucket(self) -> None:
+        # Проверяем, существует ли бакет, и создаем его, если не существует
+        if not self.minio_client.bucket_exists(self.bucket_name):
+            self.minio_client.make_bucket(self.bucket_name)
+
+    @traced("minio.remove_objects")
+    async def remove_files(self, file_names: Iterable[str]) -> list[str]:
+        """
+        Удаляет объекты пакетно: remove_objects отправляет до 1000 ключей
+        одним запросом DeleteObjects.
+
+        Returns:
+            list[str]: Имена объектов, которые удалить не удалось.
+        """
+        from minio.deleteobjects import DeleteObject
+
+        def remove() -> list[str]:
+            # Запросы выполняются по мере чтения итератора ошибок
+            errors = self.minio_client.remove_objects(
+                self.bucket_name, [DeleteObject(name) for name in file_names]
+            )
+            failed = []
+            for error in errors:
+                logger.error(
+                    f"Не удалось удалить объект {error.name}: {error.code} {error.message}"
+                )
+                failed.append(error.name)
+            return failed
+
+        with MINIO_REMOVE_DURATION.time():
+            return await asyncio.to_thread(remove)
@@ -0,0 +1,35 @@
+from typing import Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from base.base_repository import BaseRepository
+from task.models import TaskStats
+
+
+class StatsRepository(BaseRepository):
+    async def get(self, bucket: str) -> Optional[TaskStats]:
+        statement = select(TaskStats).where(bucket == TaskStats.bucket)  # type: ignore
+        return await self.one_or_none(statement)
+
+    async def increment(
+        self, buckets: Sequence[str], delta: dict[str, int | float]
+    ) -> None:
+        # Один INSERT ... ON CONFLICT DO UPDATE на все области; строки
+        # блокируются в порядке ключей, чтобы параллельные транзакции
+        # не взаимоблокировались
+        statement = insert(TaskStats).values(
+            [{"bucket": bucket, **delta} for bucket in sorted(buckets)]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[TaskStats.bucket],
+            set_={
+                **{
+                    column: getattr(TaskStats, column)
+                    + getattr(statement.excluded, column)
+                    for column in delta
+                },
+                "updated_at": func.now(),
+            },
+        )
+        await self.session.execute(statement)
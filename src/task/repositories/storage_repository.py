@@ -1,35 +1,36 @@
-from minio import Minio
+import abc
+from typing import BinaryIO, Iterable
+
 from fastapi import UploadFile
-from logging import getLogger
-import io
-import asyncio
 
-logger = getLogger("api")
 
+class StorageRepository(abc.ABC):
+    """
+    Хранилище архивов задач. Архивы передаются частями, без чтения в
+    память целиком; реализация выбирается настройкой STORAGE_BACKEND.
+    """
 
-class StorageRepository:
-    def __init__(self, minio_client: Minio, bucket_name: str):
-        self.minio_client = minio_client
-        self.bucket_name = bucket_name
+    @abc.abstractmethod
+    async def save_file(self, file: UploadFile, file_name: str) -> None:
+        """Сохраняет загруженный файл с текущей позиции под именем file_name."""
 
-        # Проверяем, существует ли бакет, и создаем его, если не существует
-        if not self.minio_client.bucket_exists(self.bucket_name):
-            self.minio_client.make_bucket(self.bucket_name)
+    @abc.abstractmethod
+    async def download_file(self, file_name: str, target: BinaryIO) -> None:
+        """Дописывает содержимое объекта в target."""
 
-    async def save_file(self, file: UploadFile, file_name: str) -> None:
-        file_content = await file.read()
-        self.minio_client.put_object(
-            self.bucket_name, file_name, io.BytesIO(file_content), len(file_content)
-        )
-
-    async def get_file(self, file_name: str) -> bytes:
-        loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(
-            None, lambda: self.minio_client.get_object(self.bucket_name, file_name)
-        )
-        try:
-            file_content = response.read()  # Читаем содержимое потока внутри метода
-            return file_content
-        finally:
-            response.close()
-            response.release_conn()
+    @abc.abstractmethod
+    async def remove_files(self, file_names: Iterable[str]) -> list[str]:
+        """
+        Удаляет объекты; отсутствующие объекты ошибкой не считаются.
+
+        Returns:
+            list[str]: Имена объектов, которые удалить не удалось.
+        """
+
+    @abc.abstractmethod
+    async def check(self) -> None:
+        """
+        Проверка доступности при старте и для /check_startup: при ошибке —
+        исключение. Создаёт недостающее (бакет, каталог), поэтому в
+        конструкторе реализации обращаться к хранилищу не нужно.
+        """
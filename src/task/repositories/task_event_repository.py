@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Any, Sequence
+
+from sqlalchemy import Row, delete, insert, select, text
+
+from base.base_repository import BaseRepository
+from task.models import TaskEvent
+
+# Для каждой задачи из окна — время ожидания в очереди (PENDING → IN_PROGRESS)
+# и обработки (IN_PROGRESS → SUCCESS/FAILED), затем перцентили по всем задачам
+LATENCY_PERCENTILES = text(
+    """
+    WITH durations AS (
+        SELECT
+            extract(epoch FROM min(created_at) FILTER (WHERE status = 'IN_PROGRESS')
+                - min(created_at) FILTER (WHERE status = 'PENDING')) AS queue_wait,
+            extract(epoch FROM min(created_at) FILTER (WHERE status IN ('SUCCESS', 'FAILED'))
+                - min(created_at) FILTER (WHERE status = 'IN_PROGRESS')) AS processing
+        FROM task_events
+        WHERE created_at >= :since
+        GROUP BY task_id
+    )
+    SELECT
+        count(queue_wait),
+        percentile_cont(CAST(:percentiles AS double precision[]))
+            WITHIN GROUP (ORDER BY queue_wait),
+        count(processing),
+        percentile_cont(CAST(:percentiles AS double precision[]))
+            WITHIN GROUP (ORDER BY processing)
+    FROM durations
+    """
+)
+
+
+# asyncpg передаёт в запросе не больше 32767 параметров, у события их три
+MAX_EVENTS_PER_INSERT = 10_000
+
+
+class TaskEventRepository(BaseRepository):
+    async def insert_many(self, events: Sequence[dict[str, Any]]) -> None:
+        # INSERT ... VALUES (...), (...) одним запросом на пачку событий.
+        # insert(TaskEvent) со списком параметров диалект asyncpg выполнил бы
+        # как executemany — по INSERT на строку
+        for start in range(0, len(events), MAX_EVENTS_PER_INSERT):
+            batch = events[start : start + MAX_EVENTS_PER_INSERT]
+            await self.session.execute(insert(TaskEvent).values(batch))
+
+    async def latency_percentiles(
+        self, since: datetime, percentiles: Sequence[float]
+    ) -> Row:
+        """
+        (число задач с ожиданием, перцентили ожидания, число задач с
+        обработкой, перцентили обработки) в секундах за период с since.
+        """
+        statement = LATENCY_PERCENTILES.bindparams(
+            since=since, percentiles=list(percentiles)
+        )
+        return (await self.session.execute(statement)).one()
+
+    async def delete_older_than(self, cutoff: datetime, limit: int) -> int:
+        """Удаляет не больше limit событий старше cutoff; возвращает их число."""
+        # Пачками: каждая удаляется короткой транзакцией, строки находит
+        # BRIN-индекс по created_at
+        batch = (
+            select(TaskEvent.id)
+            .where(TaskEvent.created_at < cutoff)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            delete(TaskEvent).where(TaskEvent.id.in_(batch))
+        )
+        return result.rowcount  # type: ignore[attr-defined]
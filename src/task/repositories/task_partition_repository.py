@@ -0,0 +1,95 @@
+import re
+from datetime import datetime
+from typing import AsyncIterator, NamedTuple, Optional, Sequence
+
+from sqlalchemy import text
+
+from base.base_repository import BaseRepository
+
+# Верхняя граница из pg_get_expr(relpartbound): FOR VALUES FROM (...) TO ('...')
+UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+# Ключ advisory-блокировки: обслуживание секций выполняет один экземпляр
+# сервиса
+MAINTENANCE_LOCK_KEY = 0x7A1F5E
+
+
+class TaskPartition(NamedTuple):
+    name: str
+    # None — у секции нет конечной верхней границы (MAXVALUE или DEFAULT)
+    upper: Optional[datetime]
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class TaskPartitionRepository(BaseRepository):
+    """Секции таблицы tasks: список, создание, удаление и отсоединение."""
+
+    async def list_partitions(self) -> list[TaskPartition]:
+        rows = await self.session.execute(
+            text(
+                """
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'tasks'::regclass
+                """
+            )
+        )
+        partitions = []
+        for name, bound in rows:
+            match = UPPER_BOUND.search(bound)
+            upper = datetime.fromisoformat(match.group(1)) if match else None
+            partitions.append(TaskPartition(name, upper))
+        return sorted(partitions, key=lambda p: (p.upper is None, p.upper or 0))
+
+    async def create(self, start: datetime, end: datetime) -> str:
+        name = f"tasks_p{start:%Y%m}"
+        await self.session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {quote(name)} PARTITION OF tasks "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+        return name
+
+    async def drop(self, name: str) -> None:
+        await self.session.execute(text(f"DROP TABLE {quote(name)}"))
+
+    async def detach(self, name: str) -> None:
+        # Таблица остаётся в базе как обычная, её можно выгрузить и удалить
+        await self.session.execute(
+            text(f"ALTER TABLE tasks DETACH PARTITION {quote(name)}")
+        )
+
+    async def set_lock_timeout(self, timeout: str) -> None:
+        # DDL над секцией блокирует всю таблицу tasks; без ограничения запрос,
+        # ждущий долгую транзакцию, задержал бы за собой все остальные
+        await self.session.execute(text(f"SET LOCAL lock_timeout = '{timeout}'"))
+
+    async def stream_file_paths(
+        self, name: str, batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[str]]:
+        result = await self.session.stream(
+            text(
+                f"SELECT file_path FROM {quote(name)} WHERE file_path IS NOT NULL"
+            ).execution_options(yield_per=batch_size)
+        )
+        async for partition in result.scalars().partitions():
+            yield partition
+
+    async def try_lock(self) -> bool:
+        # Блокировка транзакции, а не сеанса: снимается при commit и rollback.
+        # Через PgBouncer в режиме transaction сеансовая блокировка осталась бы
+        # на серверном соединении, которое потом достанется другому клиенту, а
+        # pg_advisory_unlock ушёл бы на другое соединение: блокировка
+        # не снималась бы, и обслуживание секций остановилось бы. Поэтому
+        # блокировка берётся заново в каждой транзакции обслуживания
+        return bool(
+            await self.session.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"),
+                {"key": MAINTENANCE_LOCK_KEY},
+            )
+        )
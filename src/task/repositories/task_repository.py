@@ -1,24 +1,191 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Collection, Iterable, Sequence
+
 from typing_extensions import Optional
 
 from base.base_repository import BaseRepository
+from base.metrics import stage_duration
 from logging import getLogger
-from sqlalchemy import select
+from sqlalchemy import Row, Text, cast, func, insert, select, text, tuple_, update
 
+from task.enums import TaskStatus
 from task.models import Task
+from task.models.task import UNFINISHED_PREDICATE
+
+logger = getLogger(f"api.{__name__}")
 
-logger = getLogger("api")
+DB_CREATE_DURATION = stage_duration("db_create")
+DB_UPDATE_DURATION = stage_duration("db_update")
+
+# Статусы строк частичного индекса ix_tasks_unfinished_created_at
+UNFINISHED_STATUSES = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
 
 
 class TaskRepository(BaseRepository):
     async def create(self, task: Task) -> None:
-        await self.save(task)
+        with DB_CREATE_DURATION.time():
+            await self.save(task)
+
+    async def bulk_create(self, tasks: Iterable[dict[str, Any]]) -> None:
+        """
+        Вставляет много задач одним запросом INSERT ... VALUES (...), (...),
+        без RETURNING и загрузки ORM-объектов обратно.
+        """
+        rows = list(tasks)
+        if rows:
+            with DB_CREATE_DURATION.time():
+                await self.session.execute(insert(Task).values(rows))
 
     async def get(self, task_id: str) -> Optional[Task]:
         statement = select(Task).where(task_id == Task.task_id)  # type: ignore
         return await self.one_or_none(statement)
 
+    async def get_result_json(self, task_id: str) -> Optional[Row]:
+        # JSONB приводится к тексту на стороне Postgres, чтобы драйвер
+        # не разбирал результаты в dict только ради повторной сериализации
+        statement = select(Task.status, cast(Task.results, Text)).where(
+            task_id == Task.task_id  # type: ignore
+        )
+        return await self.row_or_none(statement)
+
+    async def list_by_owner(
+        self,
+        owner_id: str,
+        limit: int,
+        statuses: Optional[Sequence[TaskStatus]] = None,
+        after: Optional[tuple[datetime, str]] = None,
+    ) -> Sequence[Row]:
+        # Keyset-пагинация: страница начинается строго после (created_at, task_id)
+        # последней записи предыдущей страницы, поэтому запрос идёт по индексу
+        # ix_tasks_owner_id_created_at без OFFSET
+        statement = select(Task.task_id, Task.status, Task.created_at).where(
+            Task.owner_id == owner_id
+        )
+        if statuses:
+            statement = statement.where(Task.status.in_(statuses))
+        if after is not None:
+            statement = statement.where(
+                tuple_(Task.created_at, Task.task_id) < tuple_(*after)
+            )
+        statement = statement.order_by(
+            Task.created_at.desc(), Task.task_id.desc()
+        ).limit(limit)
+        return (await self.session.execute(statement)).all()
+
+    async def count_by_status(
+        self, statuses: Optional[Collection[TaskStatus]] = None
+    ) -> dict[TaskStatus, int]:
+        # Для PENDING и IN_PROGRESS условие совпадает с условием частичного
+        # индекса ix_tasks_unfinished_created_at, и подсчёт идёт только по
+        # нему; без statuses читается вся таблица
+        statement = select(Task.status, func.count()).group_by(Task.status)
+        if statuses:
+            statement = statement.where(Task.status.in_(statuses))
+        rows = (await self.session.execute(statement)).all()
+        return {status: count for status, count in rows}
+
+    async def stream_results(
+        self,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        owner_id: Optional[str] = None,
+        statuses: Optional[Sequence[TaskStatus]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        # Серверный курсор: строки приходят пачками по batch_size, без ORM-объектов,
+        # результаты — текстом JSONB как есть
+        statement = select(
+            Task.task_id,
+            Task.owner_id,
+            Task.status,
+            Task.created_at,
+            cast(Task.results, Text),
+        )
+        if created_from is not None:
+            statement = statement.where(Task.created_at >= created_from)
+        if created_to is not None:
+            statement = statement.where(Task.created_at < created_to)
+        if owner_id is not None:
+            statement = statement.where(Task.owner_id == owner_id)
+        if statuses:
+            statement = statement.where(Task.status.in_(statuses))
+        statement = statement.order_by(Task.created_at).execution_options(
+            yield_per=batch_size
+        )
+
+        result = await self.session.stream(statement)
+        async for partition in result.partitions():
+            yield partition
+
+    async def transition_status(
+        self,
+        task_id: str,
+        expected: Collection[TaskStatus],
+        status: TaskStatus,
+        results: Optional[dict[str, Any]] = None,
+        created_at: Optional[datetime] = None,
+    ) -> Optional[Row]:
+        """
+        Атомарно переводит задачу в status, если её текущий статус из expected.
+
+        Один запрос UPDATE ... WHERE status IN (...) RETURNING: без чтения
+        строки перед изменением, а параллельные обработчики не могут
+        перевести задачу дважды. С известным created_at Postgres обновляет
+        только секцию задачи, без created_at проверяет индекс каждой секции.
+
+        Returns:
+            Optional[Row]: (owner_id, created_at) задачи или None, если задачи
+            нет или её статус уже другой.
+        """
+        values: dict[str, Any] = {"status": status}
+        if results is not None:
+            values["results"] = results
+        statement = update(Task).where(
+            Task.task_id == task_id, Task.status.in_(expected)
+        )
+        if created_at is not None:
+            statement = statement.where(Task.created_at == created_at)
+        statement = (
+            statement.values(**values)
+            .returning(Task.owner_id, Task.created_at)
+            # Загруженных объектов Task в сессии нет, синхронизировать нечего
+            .execution_options(synchronize_session=False)
+        )
+        with DB_UPDATE_DURATION.time():
+            return (await self.session.execute(statement)).one_or_none()
+
+    async def fail_stale(self, cutoff: datetime, limit: int) -> Sequence[str]:
+        """
+        Переводит в FAILED не больше limit незавершённых задач, созданных до
+        cutoff, и возвращает их task_id.
+        """
+        # Условие совпадает с условием частичного индекса
+        # ix_tasks_unfinished_created_at: поиск идёт по нему в порядке
+        # created_at и не читает историю завершённых задач. Строки, которые
+        # сейчас обновляет обработчик, пропускаются
+        stale = (
+            select(Task.task_id, Task.created_at)
+            .where(text(UNFINISHED_PREDICATE), Task.created_at < cutoff)
+            .order_by(Task.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(Task)
+            .where(
+                tuple_(Task.task_id, Task.created_at).in_(stale),
+                Task.status.in_(UNFINISHED_STATUSES),
+            )
+            .values(status=TaskStatus.FAILED)
+            .returning(Task.task_id)
+            .execution_options(synchronize_session=False)
+        )
+        with DB_UPDATE_DURATION.time():
+            return (await self.session.execute(statement)).scalars().all()
+
     async def update(self, task: Task) -> None:
-        await self.save(task)
+        with DB_UPDATE_DURATION.time():
+            await self.save(task)
 
     async def delete(self, task: Task) -> None:
         await self.remove(task)
@@ -1,3 +1,21 @@
-from task.schemas.task import TaskResultResponse, TaskResponse
+from task.schemas.task import (
+    TaskResultResponse,
+    TaskResponse,
+    TaskSummary,
+    TaskListResponse,
+)
+from task.schemas.stats import (
+    LatencyPercentiles,
+    TaskLatencyResponse,
+    TaskStatsResponse,
+)
 
-__all__ = ["TaskResultResponse", "TaskResponse"]
+__all__ = [
+    "TaskResultResponse",
+    "TaskResponse",
+    "TaskSummary",
+    "TaskListResponse",
+    "TaskStatsResponse",
+    "LatencyPercentiles",
+    "TaskLatencyResponse",
+]
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class TaskStatsResponse(BaseModel):
+    tasks: int = 0
+    average_coverage: Optional[float] = None
+    bugs_total: int = 0
+    bugs_critical: int = 0
+    code_smells_total: int = 0
+    code_smells_critical: int = 0
+    vulnerabilities_total: int = 0
+    vulnerabilities_critical: int = 0
+
+
+class LatencyPercentiles(BaseModel):
+    tasks: int = 0
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class TaskLatencyResponse(BaseModel):
+    """Перцентили длительности этапов задач в секундах."""
+
+    since: datetime
+    queue_wait: LatencyPercentiles
+    processing: LatencyPercentiles
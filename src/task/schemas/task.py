@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 from typing import Optional
 
@@ -12,3 +14,14 @@ class TaskResponse(BaseModel):
 class TaskResultResponse(BaseModel):
     status: TaskStatus
     results: Optional[SonarQubeResults] = None
+
+
+class TaskSummary(BaseModel):
+    task_id: str
+    status: TaskStatus
+    created_at: datetime
+
+
+class TaskListResponse(BaseModel):
+    items: list[TaskSummary]
+    next_cursor: Optional[str] = None
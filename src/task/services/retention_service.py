@@ -0,0 +1,244 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from base.metrics import TASKS_PARTITIONS_AHEAD
+from task.enums import TaskStatus
+from task.repositories import (
+    StorageRepository,
+    TaskEventRepository,
+    TaskPartition,
+    TaskPartitionRepository,
+    TaskRepository,
+)
+from task.services.task_event_service import record_event
+
+logger = logging.getLogger(f"api.{__name__}")
+
+
+def month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    index = moment.year * 12 + moment.month - 1 + months
+    return moment.replace(year=index // 12, month=index % 12 + 1)
+
+
+def months_ahead(upper: datetime, now: datetime) -> int:
+    """Месяцев после текущего до границы upper; -1 — текущий месяц не покрыт."""
+    now = now.astimezone(timezone.utc)
+    return max(upper.year * 12 + upper.month - (now.year * 12 + now.month) - 1, -1)
+
+
+def partitions_ahead(partitions: Sequence[TaskPartition], now: datetime) -> int:
+    """Сколько месяцев после текущего покрыто секциями tasks."""
+    bounded = [p.upper for p in partitions if p.upper is not None]
+    return months_ahead(max(bounded), now) if bounded else -1
+
+
+class RetentionService:
+    """
+    Обслуживание секций таблицы tasks.
+
+    Создаёт месячные секции заранее и убирает секции старше срока хранения
+    одной операцией DROP (или DETACH) вместо массового DELETE. Архивы задач
+    из удаляемой секции предварительно удаляются из MinIO пакетами. Журнал
+    task_events не секционирован, события старше того же срока удаляются
+    пачками. Задачи, не завершившиеся за stale_after секунд, переводятся в
+    FAILED.
+    """
+
+    FILE_BATCH_SIZE = 1000  # Ключей в одном запросе DeleteObjects
+    EVENT_BATCH_SIZE = 10_000
+    STALE_BATCH_SIZE = 1000
+    LOCK_TIMEOUT = "5s"
+
+    def __init__(
+        self,
+        partition_repo: TaskPartitionRepository,
+        storage_repo: StorageRepository,
+        retention_days: Optional[int] = None,
+        archive: bool = False,
+        months_ahead: int = 2,
+        event_repo: Optional[TaskEventRepository] = None,
+        task_repo: Optional[TaskRepository] = None,
+        stale_after: Optional[int] = None,
+    ):
+        self.partition_repo = partition_repo
+        self.storage_repo = storage_repo
+        self.event_repo = event_repo
+        self.task_repo = task_repo
+        self.stale_after = stale_after
+        self.retention_days = retention_days
+        self.archive = archive
+        self.months_ahead = months_ahead
+
+    async def run(self, session: AsyncSession, now: Optional[datetime] = None) -> None:
+        """
+        Один проход обслуживания.
+
+        Каждая транзакция прохода начинается с pg_try_advisory_xact_lock:
+        пока блокировку держит другой экземпляр, проход прекращается.
+        Блокировка не переживает commit, поэтому проход работает и через
+        PgBouncer в режиме transaction, и с любым пулом соединений.
+        """
+        now = now or datetime.now(timezone.utc)
+        self.partition_repo.session = session
+        if self.event_repo is not None:
+            self.event_repo.session = session
+        if self.task_repo is not None:
+            self.task_repo.session = session
+
+        await self.ensure_partitions(session, now)
+        if self.stale_after is not None:
+            await self.fail_stale_tasks(
+                session, now - timedelta(seconds=self.stale_after)
+            )
+        if self.retention_days is not None:
+            cutoff = now - timedelta(days=self.retention_days)
+            await self.expire_partitions(session, cutoff)
+            await self.expire_events(session, cutoff)
+
+    async def _lock(self, session: AsyncSession) -> bool:
+        """Блокировка обслуживания в текущей транзакции."""
+        if await self.partition_repo.try_lock():
+            return True
+        await session.rollback()
+        logger.info("Секции tasks обслуживает другой экземпляр")
+        return False
+
+    async def ensure_partitions(
+        self, session: AsyncSession, now: datetime
+    ) -> list[str]:
+        """Создаёт недостающие секции до конца months_ahead-го месяца от текущего."""
+        if not await self._lock(session):
+            return []
+        partitions = await self.partition_repo.list_partitions()
+        await session.commit()
+
+        bounded = [p.upper for p in partitions if p.upper is not None]
+        start = max(bounded) if bounded else month_start(now)
+        end = add_months(month_start(now), self.months_ahead + 1)
+
+        created = []
+        while start < end:
+            next_start = add_months(start, 1)
+            if not await self._lock(session):
+                break
+            await self.partition_repo.set_lock_timeout(self.LOCK_TIMEOUT)
+            created.append(await self.partition_repo.create(start, next_start))
+            await session.commit()
+            logger.info("Создана секция %s", created[-1])
+            start = next_start
+        TASKS_PARTITIONS_AHEAD.set(months_ahead(start, now))
+        return created
+
+    async def expire_partitions(
+        self, session: AsyncSession, cutoff: datetime
+    ) -> list[str]:
+        """
+        Удаляет или отсоединяет секции, все строки которых старше cutoff.
+
+        Секция, архивы которой удалить не удалось, остаётся до следующего
+        прохода, чтобы пути к оставшимся объектам не потерялись.
+        """
+        if not await self._lock(session):
+            return []
+        partitions = await self.partition_repo.list_partitions()
+        await session.commit()
+
+        expired = []
+        for partition in partitions:
+            if partition.upper is None or partition.upper > cutoff:
+                continue
+            try:
+                if not await self._lock(session):
+                    break
+                failed = await self._remove_files(session, partition)
+                if failed:
+                    logger.error(
+                        f"Секция {partition.name} сохранена: не удалено "
+                        f"{failed} объектов"
+                    )
+                    continue
+
+                if not await self._lock(session):
+                    break
+                await self.partition_repo.set_lock_timeout(self.LOCK_TIMEOUT)
+                if self.archive:
+                    await self.partition_repo.detach(partition.name)
+                else:
+                    await self.partition_repo.drop(partition.name)
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Ошибка удаления секции {partition.name}: {str(e)}")
+                continue
+
+            logger.info(
+                "Секция %s %s",
+                partition.name,
+                "отсоединена" if self.archive else "удалена",
+            )
+            expired.append(partition.name)
+        return expired
+
+    async def expire_events(self, session: AsyncSession, cutoff: datetime) -> int:
+        """Удаляет события task_events старше cutoff пачками по EVENT_BATCH_SIZE."""
+        if self.event_repo is None:
+            return 0
+
+        deleted = 0
+        while await self._lock(session):
+            batch = await self.event_repo.delete_older_than(
+                cutoff, self.EVENT_BATCH_SIZE
+            )
+            await session.commit()
+            deleted += batch
+            if batch < self.EVENT_BATCH_SIZE:
+                break
+        if deleted:
+            logger.info("Удалено событий task_events: %d", deleted)
+        return deleted
+
+    async def fail_stale_tasks(self, session: AsyncSession, cutoff: datetime) -> int:
+        """
+        Переводит в FAILED задачи PENDING и IN_PROGRESS, созданные до cutoff,
+        пачками по STALE_BATCH_SIZE. Такие задачи остаются после остановки
+        процесса во время фоновой обработки. Незавершённый статус кэшируется
+        ненадолго, поэтому кэш результатов не сбрасывается.
+        """
+        if self.task_repo is None:
+            return 0
+
+        failed = 0
+        while await self._lock(session):
+            task_ids = await self.task_repo.fail_stale(cutoff, self.STALE_BATCH_SIZE)
+            for task_id in task_ids:
+                record_event(session, task_id, TaskStatus.FAILED)
+            await session.commit()
+            failed += len(task_ids)
+            if len(task_ids) < self.STALE_BATCH_SIZE:
+                break
+        if failed:
+            logger.warning("Брошенных задач переведено в FAILED: %d", failed)
+        return failed
+
+    async def _remove_files(
+        self, session: AsyncSession, partition: TaskPartition
+    ) -> int:
+        failed = 0
+        removed = 0
+        async for file_paths in self.partition_repo.stream_file_paths(
+            partition.name, self.FILE_BATCH_SIZE
+        ):
+            errors = await self.storage_repo.remove_files(file_paths)
+            failed += len(errors)
+            removed += len(file_paths) - len(errors)
+        await session.commit()
+        logger.info("Из секции %s удалено архивов: %d", partition.name, removed)
+        return failed
@@ -0,0 +1,86 @@
+import logging
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from gateways.sonarqube import CheckResult
+from task.repositories import StatsRepository
+from task.schemas import TaskStatsResponse
+
+logger = logging.getLogger(f"api.{__name__}")
+
+
+class StatsService:
+    def __init__(self, stats_repo: StatsRepository):
+        self.stats_repo = stats_repo
+
+    async def record_result(
+        self,
+        owner_id: Optional[str],
+        day: date,
+        result: CheckResult,
+        session: Optional[AsyncSession] = None,
+    ) -> None:
+        """
+        Учитывает результат задачи во всех агрегатах, которые его содержат.
+
+        Вызывается отдельной транзакцией сразу после фиксации результата:
+        общие строки агрегатов блокируются только на время upsert. Если
+        upsert не удался, результат задачи сохраняется, а агрегаты
+        недосчитывают её; ошибка пишется в журнал.
+        """
+        if session is not None:
+            self.stats_repo.session = session
+
+        buckets = [self.bucket(), self.bucket(day=day)]
+        if owner_id:
+            buckets += [self.bucket(owner_id=owner_id), self.bucket(owner_id, day)]
+
+        await self.stats_repo.increment(
+            buckets,
+            {
+                "tasks": 1,
+                "coverage_sum": result.overall_coverage,
+                "bugs_total": result.bugs.total,
+                "bugs_critical": result.bugs.critical,
+                "code_smells_total": result.code_smells.total,
+                "code_smells_critical": result.code_smells.critical,
+                "vulnerabilities_total": result.vulnerabilities.total,
+                "vulnerabilities_critical": result.vulnerabilities.critical,
+            },
+        )
+
+    async def get_stats(
+        self,
+        owner_id: Optional[str] = None,
+        day: Optional[date] = None,
+        session: Optional[AsyncSession] = None,
+    ) -> TaskStatsResponse:
+        if session is not None:
+            self.stats_repo.session = session
+
+        stats = await self.stats_repo.get(self.bucket(owner_id, day))
+        if stats is None:
+            return TaskStatsResponse()
+
+        return TaskStatsResponse(
+            tasks=stats.tasks,
+            average_coverage=stats.coverage_sum / stats.tasks if stats.tasks else None,
+            bugs_total=stats.bugs_total,
+            bugs_critical=stats.bugs_critical,
+            code_smells_total=stats.code_smells_total,
+            code_smells_critical=stats.code_smells_critical,
+            vulnerabilities_total=stats.vulnerabilities_total,
+            vulnerabilities_critical=stats.vulnerabilities_critical,
+        )
+
+    @staticmethod
+    def bucket(owner_id: Optional[str] = None, day: Optional[date] = None) -> str:
+        if owner_id and day:
+            return f"user_day:{owner_id}:{day.isoformat()}"
+        if owner_id:
+            return f"user:{owner_id}"
+        if day:
+            return f"day:{day.isoformat()}"
+        return "total"
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from base.base import async_session
+from task.enums import TaskStatus
+from task.repositories import TaskEventRepository
+from settings import get_settings
+from task.schemas import LatencyPercentiles, TaskLatencyResponse
+
+logger = logging.getLogger(f"api.{__name__}")
+settings = get_settings()
+
+# Ключ session.info для событий, ожидающих фиксации транзакции
+PENDING_EVENTS_KEY = "task_events"
+
+
+class TaskEventBuffer:
+    """
+    Буфер событий задач в памяти процесса.
+
+    События попадают сюда только после commit транзакции, в которой
+    сменился статус, и записываются в task_events пачками фоновым циклом
+    run: на пути запроса и обработки задачи лишних обращений к БД нет.
+    При переполнении (например, пока БД недоступна) отбрасываются самые
+    старые события.
+    """
+
+    def __init__(self, batch_size: int = 500, max_size: int = 100_000):
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.events: list[dict[str, Any]] = []
+        self._full = asyncio.Event()
+
+    def add(self, events: Iterable[dict[str, Any]]) -> None:
+        self.events.extend(events)
+        self._trim()
+        if len(self.events) >= self.batch_size:
+            self._full.set()
+
+    def _trim(self) -> None:
+        overflow = len(self.events) - self.max_size
+        if overflow > 0:
+            del self.events[:overflow]
+            logger.warning("Буфер событий задач переполнен, отброшено: %d", overflow)
+
+    async def flush(self) -> int:
+        """Записывает накопленные события одним многострочным INSERT."""
+        if not self.events:
+            return 0
+        batch, self.events = self.events, []
+        self._full.clear()
+        try:
+            async with async_session() as session:
+                await TaskEventRepository(session).insert_many(batch)
+                await session.commit()
+        except Exception as e:
+            # Пачка возвращается в начало буфера; следующая попытка — не
+            # раньше, чем через интервал цикла
+            self.events[:0] = batch
+            self._trim()
+            logger.error(f"Ошибка записи событий задач: {str(e)}")
+            return 0
+        return len(batch)
+
+    async def run(self, interval: float = 1.0) -> None:
+        """Записывает события раз в interval секунд или при наборе пачки."""
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+
+task_event_buffer = TaskEventBuffer(
+    batch_size=settings.TASK_EVENTS_BATCH_SIZE,
+    max_size=settings.TASK_EVENTS_MAX_BUFFER,
+)
+
+
+def record_event(session: AsyncSession, task_id: str, status: TaskStatus) -> None:
+    """
+    Запоминает переход задачи в status. Событие уходит в буфер только
+    после commit сессии; при откате транзакции оно отбрасывается.
+    """
+    session.info.setdefault(PENDING_EVENTS_KEY, []).append(
+        {"task_id": task_id, "status": status, "created_at": datetime.now(timezone.utc)}
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session: Session) -> None:
+    events = session.info.pop(PENDING_EVENTS_KEY, None)
+    if events:
+        task_event_buffer.add(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session: Session) -> None:
+    session.info.pop(PENDING_EVENTS_KEY, None)
+
+
+class TaskEventService:
+    PERCENTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, event_repo: TaskEventRepository):
+        self.event_repo = event_repo
+
+    async def get_latency(
+        self, since: datetime, session: Optional[AsyncSession] = None
+    ) -> TaskLatencyResponse:
+        if session is not None:
+            self.event_repo.session = session
+
+        row = await self.event_repo.latency_percentiles(since, self.PERCENTILES)
+        queue_tasks, queue_wait, processing_tasks, processing = row
+        return TaskLatencyResponse(
+            since=since,
+            queue_wait=self._percentiles(queue_tasks, queue_wait),
+            processing=self._percentiles(processing_tasks, processing),
+        )
+
+    @staticmethod
+    def _percentiles(tasks: int, values: Optional[list[float]]) -> LatencyPercentiles:
+        if not tasks or values is None:
+            return LatencyPercentiles()
+        p50, p90, p99 = values
+        return LatencyPercentiles(tasks=tasks, p50=p50, p90=p90, p99=p99)
@@ -1,50 +1,98 @@
+import asyncio
 import zipfile
 import io
+import base64
+import binascii
+import csv
+import hashlib
 import logging
-import json  # Импортируем json для преобразования
-from typing import Optional
-from uuid import uuid4
+import tempfile
+from datetime import datetime
+from typing import AsyncIterator, BinaryIO, Iterable, NamedTuple, Optional, Sequence
+from uuid import UUID, uuid4
 
+import orjson
 from fastapi import UploadFile, BackgroundTasks
 from fastapi_cache import FastAPICache
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from base.base import async_session
-from gateways.sonarqube import CheckResult, SonarQubeResults
+from base.base import async_session, has_replica, read_only_session
+from base.metrics import (
+    BACKGROUND_TASKS_IN_FLIGHT,
+    CACHE_HITS,
+    CACHE_MISSES,
+    stage_duration,
+)
+from base.tracing import extract_context, inject_context, traced, tracer
+from gateways.sonarqube import SonarQubeResults
 from gateways.sonarqube.sonarqube import SonarqubeService
-from task.enums import TaskStatus
+from task.enums import ExportFormat, TaskStatus
 from task.exceptions import (
     FileSizeExceededException,
     ZipValidationException,
     ProcessingException,
     TaskNotFoundException,
     InvalidFileException,
+    InvalidCursorException,
 )
 from task.models import Task
 from task.repositories import StorageRepository, TaskRepository
-from task.schemas import TaskResultResponse, TaskResponse
+from task.services.stats_service import StatsService
+from task.services.task_event_service import record_event
+from task.schemas import (
+    TaskResultResponse,
+    TaskResponse,
+    TaskSummary,
+    TaskListResponse,
+)
+
+logger = logging.getLogger(f"api.{__name__}")
+
+TERMINAL_STATUSES = frozenset({TaskStatus.SUCCESS, TaskStatus.FAILED})
 
-logger = logging.getLogger("api")
+ZIP_VALIDATION_DURATION = stage_duration("zip_validation")
+CACHE_GET_DURATION = stage_duration("cache_get")
+
+
+class TaskResultPayload(NamedTuple):
+    status: TaskStatus
+    etag: str
+    body: bytes
 
 
 class TaskService:
     MAX_FILE_SIZE = 100 * 1024 * 1024
+    # Архив до этого размера обрабатывается в памяти, больше — во временном
+    # файле на диске, как UploadFile в Starlette
+    SPOOL_MAX_SIZE = 1024 * 1024
+    RESULT_CACHE_EXPIRE = 60
+    TERMINAL_RESULT_CACHE_EXPIRE = 24 * 60 * 60
+    EXPORT_BATCH_SIZE = 1000
+    EXPORT_CSV_COLUMNS = ("task_id", "owner_id", "status", "created_at", "results")
 
     def __init__(
         self,
         storage_repo: StorageRepository,
         task_repo: TaskRepository,
         sonarqube_service: SonarqubeService,
+        stats_service: Optional[StatsService] = None,
     ):
         self.task_repo = task_repo
         self.storage_repo = storage_repo
         self.sonarqube_service = sonarqube_service
+        self.stats_service = stats_service
         self.cache_namespace = "TASK"
 
+    @traced("TaskService.create_task")
     async def create_task(
-        self, task_id: str, file: UploadFile, session: Optional[AsyncSession] = None
+        self,
+        task_id: str,
+        file: UploadFile,
+        session: Optional[AsyncSession] = None,
+        owner_id: Optional[str] = None,
     ) -> None:
-        logger.info(f"Создание задачи с id: {task_id}")
+        logger.info("Создание задачи с id: %s", task_id, extra={"task_id": task_id})
 
         if session is not None:
             self.task_repo.session = session
@@ -57,101 +105,196 @@ class TaskService:
             )
             raise FileSizeExceededException()
 
-        file_content = await file.read()
-
-        # Проверка целостности ZIP-файла
-        try:
-            with zipfile.ZipFile(io.BytesIO(file_content), "r") as zip_ref:
-                if zip_ref.testzip() is not None:
-                    logger.error("ZIP-архив недействителен")
-                    raise ZipValidationException()
-        except zipfile.BadZipFile as e:
-            logger.error(f"Ошибка валидации ZIP: {str(e)}")
-            raise ZipValidationException(
-                message=f"Ошибка валидации ZIP-архива: {str(e)}"
-            )
+        # Архив не читается в память целиком: проверка и загрузка в MinIO
+        # идут частями из временного файла загрузки
+        await asyncio.to_thread(self.validate_zip, file.file)
 
         # Сохранение файла в MinIO
         file_name = f"{task_id}.zip"
         await file.seek(0)
-        file.file.write(file_content)
         try:
             await self.storage_repo.save_file(file, file_name)
         except Exception as e:
             logger.error(f"Ошибка сохранения файла в MinIO: {str(e)}")
             raise ProcessingException(message=f"Ошибка при сохранении файла: {str(e)}")
-        logger.info(f"Файл {file_name} сохранён в MinIO")
+        logger.debug("Файл %s сохранён в MinIO", file_name, extra={"task_id": task_id})
 
         # Создание задачи в базе данных
-        task = Task(task_id=task_id, file_path=file_name, status=TaskStatus.PENDING)
+        task = Task(
+            task_id=task_id,
+            file_path=file_name,
+            status=TaskStatus.PENDING,
+            owner_id=owner_id,
+        )
         try:
             await self.task_repo.create(task)
         except Exception as e:
             logger.error(f"Ошибка создания задачи в базе данных: {str(e)}")
             raise ProcessingException(message=f"Ошибка создания задачи: {str(e)}")
+        record_event(self.task_repo.session, task_id, TaskStatus.PENDING)
         logger.info(
-            f"Задача {task_id} создана в базе данных со статусом: {task.status}"
+            "Задача %s создана в базе данных со статусом: %s",
+            task_id,
+            task.status,
+            extra={"task_id": task_id},
         )
 
+    @staticmethod
+    def validate_zip(archive: BinaryIO) -> None:
+        """Проверка целостности ZIP-архива: CRC всех записей."""
+        try:
+            with (
+                ZIP_VALIDATION_DURATION.time(),
+                zipfile.ZipFile(archive, "r") as zip_ref,
+            ):
+                if zip_ref.testzip() is not None:
+                    logger.error("ZIP-архив недействителен")
+                    raise ZipValidationException()
+        except zipfile.BadZipFile as e:
+            logger.error(f"Ошибка валидации ZIP: {str(e)}")
+            raise ZipValidationException(
+                message=f"Ошибка валидации ZIP-архива: {str(e)}"
+            )
+
+    @traced("TaskService.process_task")
     async def process_task(
         self, task_id: str, session: Optional[AsyncSession] = None
     ) -> None:
         if session is not None:
             self.task_repo.session = session
 
-        task = await self.task_repo.get(task_id)
-        if not task:
-            logger.error(f"Задача {task_id} не найдена")
-            return
-
-        # Обновление статуса на IN_PROGRESS
-        task.status = TaskStatus.IN_PROGRESS  # type: ignore[assignment]
-
-        await FastAPICache.clear(namespace=self.cache_namespace)
-
+        # Обновление статуса на IN_PROGRESS: только из PENDING, поэтому задачу
+        # не возьмут в обработку дважды
         try:
-            await self.task_repo.update(task)
+            task = await self.task_repo.transition_status(
+                task_id, (TaskStatus.PENDING,), TaskStatus.IN_PROGRESS
+            )
         except Exception as e:
             logger.error(f"Ошибка обновления статуса задачи: {str(e)}")
             raise ProcessingException(message=f"Ошибка обновления статуса: {str(e)}")
-        logger.info(f"Статус задачи {task_id} обновлён до IN_PROGRESS")
+        if task is None:
+            logger.error(f"Задача {task_id} не найдена или уже обрабатывается")
+            return
+        record_event(self.task_repo.session, task_id, TaskStatus.IN_PROGRESS)
+
+        # Смена статуса фиксируется сразу: транзакция и соединение не держатся
+        # открытыми на время загрузки архива и анализа
+        await self.task_repo.session.commit()
+        await self.invalidate_result_cache(task_id)
+        logger.debug(
+            "Статус задачи %s обновлён до IN_PROGRESS",
+            task_id,
+            extra={"task_id": task_id},
+        )
 
-        # Получение содержимого ZIP-файла из MinIO
+        # created_at из RETURNING ограничивает следующие UPDATE секцией задачи
         try:
-            file_content = await self.storage_repo.get_file(
-                f"{task_id}.zip"
-            )  # file_content уже bytes
-        except Exception as e:
-            logger.error(f"Ошибка получения файла из MinIO: {str(e)}")
-            raise ProcessingException(message=f"Ошибка получения файла: {str(e)}")
-
-        # Вызов SonarqubeService для анализа
+            results = await self._analyze(task_id)
+            await self._save_results(task_id, task.created_at, results)
+        except ProcessingException:
+            await self._mark_failed(task_id, task.created_at)
+            raise
+
+        # Кэш сбрасывается только после фиксации: иначе параллельный запрос
+        # успеет закэшировать ещё не изменённую строку. Если фиксация не
+        # удалась, задача переводится в FAILED, как при ошибке обработки
         try:
-            results = await self.sonarqube_service.check_zip(file_content)
+            await self.task_repo.session.commit()
         except Exception as e:
-            logger.error(f"Ошибка анализа SonarQube: {str(e)}")
-            raise ProcessingException(message=f"Ошибка анализа SonarQube: {str(e)}")
+            logger.error(f"Ошибка фиксации результатов задачи {task_id}: {str(e)}")
+            await self._mark_failed(task_id, task.created_at)
+            raise ProcessingException(
+                message=f"Ошибка сохранения результатов: {str(e)}"
+            )
+        await self.invalidate_result_cache(task_id)
 
-        # Сохранение результатов
-        task.results = json.dumps(results.dict())  # type: ignore[assignment]
-        task.status = TaskStatus.SUCCESS  # type: ignore[assignment]
-        await FastAPICache.clear(namespace=self.cache_namespace)
+        # Агрегаты обновляются отдельной короткой транзакцией: общие строки
+        # total и day блокируются только на время upsert, а не на всю
+        # обработку, и не выстраивают завершение задач в очередь
+        if self.stats_service is not None:
+            try:
+                await self.stats_service.record_result(
+                    task.owner_id,
+                    task.created_at.date(),
+                    results.sonarqube,
+                    self.task_repo.session,
+                )
+                await self.task_repo.session.commit()
+            except Exception as e:
+                logger.error(f"Ошибка обновления статистики задачи {task_id}: {str(e)}")
+                await self.task_repo.session.rollback()
+        logger.info(
+            "Задача %s обработана и обновлена до SUCCESS",
+            task_id,
+            extra={"task_id": task_id},
+        )
+        logger.debug("Результаты задачи %s: %r", task_id, results)
+
+    async def _analyze(self, task_id: str) -> SonarQubeResults:
+        with tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE) as archive:
+            # Получение ZIP-файла из MinIO частями во временный файл
+            try:
+                await self.storage_repo.download_file(f"{task_id}.zip", archive)
+            except Exception as e:
+                logger.error(f"Ошибка получения файла из MinIO: {str(e)}")
+                raise ProcessingException(message=f"Ошибка получения файла: {str(e)}")
+            archive.seek(0)
 
+            # Вызов SonarqubeService для анализа
+            try:
+                return await self.sonarqube_service.check_zip(archive)
+            except Exception as e:
+                logger.error(f"Ошибка анализа SonarQube: {str(e)}")
+                raise ProcessingException(message=f"Ошибка анализа SonarQube: {str(e)}")
+
+    async def _save_results(
+        self, task_id: str, created_at: datetime, results: SonarQubeResults
+    ) -> None:
         try:
-            await self.task_repo.update(task)
+            saved = await self.task_repo.transition_status(
+                task_id,
+                (TaskStatus.IN_PROGRESS,),
+                TaskStatus.SUCCESS,
+                results=results.model_dump(),
+                created_at=created_at,
+            )
         except Exception as e:
             logger.error(f"Ошибка сохранения результатов: {str(e)}")
             raise ProcessingException(
                 message=f"Ошибка сохранения результатов: {str(e)}"
             )
-        logger.info(
-            f"Задача {task_id} обработана и обновлена до SUCCESS с результатами: {results}"
-        )
+        if saved is None:
+            raise ProcessingException(
+                message=f"Статус задачи {task_id} изменён во время обработки"
+            )
+        record_event(self.task_repo.session, task_id, TaskStatus.SUCCESS)
+
+    async def _mark_failed(self, task_id: str, created_at: datetime) -> None:
+        """
+        IN_PROGRESS уже зафиксирован, поэтому после ошибки задача переводится
+        в FAILED, иначе она навсегда осталась бы незавершённой.
+        """
+        session = self.task_repo.session
+        try:
+            await session.rollback()
+            failed = await self.task_repo.transition_status(
+                task_id,
+                (TaskStatus.IN_PROGRESS,),
+                TaskStatus.FAILED,
+                created_at=created_at,
+            )
+            if failed is not None:
+                record_event(session, task_id, TaskStatus.FAILED)
+            await session.commit()
+        except Exception as e:
+            logger.error(f"Ошибка перевода задачи {task_id} в FAILED: {str(e)}")
+            return
+        await self.invalidate_result_cache(task_id)
 
     async def get_task_result(
         self, task_id: str, session: Optional[AsyncSession] = None
     ) -> Optional[TaskResultResponse]:
-        logger.info(f"Получение результата для task_id: {task_id}")
+        logger.debug("Получение результата для task_id: %s", task_id)
 
         if session is not None:
             self.task_repo.session = session
@@ -163,17 +306,7 @@ class TaskService:
 
         if task.results:
             try:
-                # Преобразуем строку из базы обратно в словарь, затем в Pydantic-модель
-                results_data = json.loads(
-                    str(task.results)
-                )  # Преобразуем строку в словарь
-                sonarqube_results = results_data.get("sonarqube", {})
-                check_result = (
-                    CheckResult(**sonarqube_results) if sonarqube_results else None
-                )
-                results = (
-                    SonarQubeResults(sonarqube=check_result) if check_result else None
-                )
+                results = SonarQubeResults.model_validate(task.results)
             except Exception as e:
                 logger.error(f"Ошибка обработки результатов: {str(e)}")
                 raise ProcessingException(
@@ -184,10 +317,255 @@ class TaskService:
 
         return TaskResultResponse(status=task.status, results=results)  # type: ignore
 
+    async def get_task_result_json(
+        self, task_id: str, session: Optional[AsyncSession] = None
+    ) -> TaskResultPayload:
+        """
+        Быстрый путь чтения результата задачи.
+
+        Результаты хранятся в JSONB и записываются только самим сервисом,
+        поэтому тело ответа собирается из текста, полученного из базы,
+        без json.loads и повторной валидации Pydantic-моделями.
+
+        Returns:
+            TaskResultPayload: Статус, ETag и сериализованный TaskResultResponse.
+        """
+        logger.debug("Получение результата для task_id: %s", task_id)
+
+        if session is not None:
+            self.task_repo.session = session
+
+        row = await self.task_repo.get_result_json(task_id)
+        if row is None:
+            logger.error(f"Задача {task_id} не найдена")
+            raise TaskNotFoundException()
+
+        status, results = row
+        body = b"".join(
+            (
+                b'{"status":',
+                orjson.dumps(status),
+                b',"results":',
+                results.encode() if results else b"null",
+                b"}",
+            )
+        )
+        return TaskResultPayload(
+            status=status, etag=self.make_etag(status, body), body=body
+        )
+
+    async def get_task_result_cached(
+        self, task_id: str, session: Optional[AsyncSession] = None
+    ) -> TaskResultPayload:
+        """
+        Результат задачи вместе с ETag.
+
+        Тело ответа и ETag хранятся в кэше одной записью, поэтому повторный
+        опрос (в том числе условный, с If-None-Match) не обращается к Postgres
+        и не сериализует результат заново. Запись задачи удаляется в
+        process_task после фиксации смены статуса; результаты в терминальном
+        статусе не меняются и кэшируются дольше.
+        """
+        cache_key = self._result_cache_key(task_id)
+        coder = FastAPICache.get_coder()
+        backend = FastAPICache.get_backend()
+
+        try:
+            with CACHE_GET_DURATION.time():
+                cached = await backend.get(cache_key)
+            if cached is not None:
+                CACHE_HITS.inc()
+                entry = coder.decode(cached)
+                return TaskResultPayload(
+                    status=TaskStatus(entry["status"]),
+                    etag=entry["etag"],
+                    body=entry["body"].encode(),
+                )
+        except Exception as e:
+            logger.warning("Ошибка чтения результата %s из кэша: %s", task_id, e)
+
+        CACHE_MISSES.inc()
+        try:
+            payload = await self.get_task_result_json(task_id, session)
+        except TaskNotFoundException:
+            if not has_replica():
+                raise
+            # Только что созданная задача могла ещё не дойти до реплики
+            async with read_only_session(primary=True) as primary_session:
+                payload = await self.get_task_result_json(task_id, primary_session)
+
+        expire = (
+            self.TERMINAL_RESULT_CACHE_EXPIRE
+            if payload.status in TERMINAL_STATUSES
+            else self.RESULT_CACHE_EXPIRE
+        )
+        if has_replica() and payload.status not in TERMINAL_STATUSES:
+            # Реплика могла отстать от смены статуса, а сброс кэша в
+            # process_task уже прошёл: незавершённый статус не кэшируется
+            return payload
+        try:
+            await backend.set(
+                cache_key,
+                coder.encode(
+                    {
+                        "status": payload.status.value,
+                        "etag": payload.etag,
+                        "body": payload.body.decode(),
+                    }
+                ),
+                expire,
+            )
+        except Exception as e:
+            logger.warning("Ошибка записи результата %s в кэш: %s", task_id, e)
+
+        return payload
+
+    @staticmethod
+    def make_etag(status: TaskStatus, body: bytes) -> str:
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        return f'"{status.value}-{digest}"'
+
+    async def invalidate_result_cache(self, task_id: str) -> None:
+        """Удаляет из кэша результат одной задачи, не трогая остальные."""
+        try:
+            await FastAPICache.get_backend().clear(key=self._result_cache_key(task_id))
+        except Exception as e:
+            logger.warning("Ошибка сброса кэша результата %s: %s", task_id, e)
+
+    def _result_cache_key(self, task_id: str) -> str:
+        return f"{FastAPICache.get_prefix()}:{self.cache_namespace}:result:{task_id}"
+
+    async def list_tasks(
+        self,
+        owner_id: str,
+        limit: int,
+        statuses: Optional[Sequence[TaskStatus]] = None,
+        cursor: Optional[str] = None,
+        session: Optional[AsyncSession] = None,
+    ) -> TaskListResponse:
+        """
+        Список задач пользователя, от новых к старым.
+
+        Возвращаются только краткие сведения о задачах, без результатов.
+        Для следующей страницы передаётся next_cursor из предыдущего ответа.
+        """
+        if session is not None:
+            self.task_repo.session = session
+
+        after = self._decode_cursor(cursor) if cursor else None
+        rows = await self.task_repo.list_by_owner(
+            owner_id, limit + 1, statuses=statuses, after=after
+        )
+
+        items = [
+            TaskSummary(task_id=task_id, status=status, created_at=created_at)
+            for task_id, status, created_at in rows[:limit]
+        ]
+        next_cursor = (
+            self._encode_cursor(items[-1].created_at, items[-1].task_id)
+            if len(rows) > limit
+            else None
+        )
+        return TaskListResponse(items=items, next_cursor=next_cursor)
+
+    async def export_results(
+        self,
+        export_format: ExportFormat,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        owner_id: Optional[str] = None,
+        statuses: Optional[Sequence[TaskStatus]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Потоковая выгрузка результатов задач в NDJSON или CSV.
+
+        Строки читаются серверным курсором пачками по EXPORT_BATCH_SIZE, каждая
+        пачка сразу отдаётся клиенту, поэтому память не зависит от объёма
+        выгрузки. Сессия открывается внутри генератора: ответ отдаётся уже
+        после того, как сессия запроса закрыта. Чтение идёт с реплики, если
+        она настроена.
+        """
+        logger.info("Начало выгрузки результатов в формате %s", export_format.value)
+
+        async with read_only_session() as session:
+            self.task_repo.session = session
+
+            if export_format is ExportFormat.CSV:
+                yield self._format_csv([self.EXPORT_CSV_COLUMNS])
+
+            async for rows in self.task_repo.stream_results(
+                created_from=created_from,
+                created_to=created_to,
+                owner_id=owner_id,
+                statuses=statuses,
+                batch_size=self.EXPORT_BATCH_SIZE,
+            ):
+                if export_format is ExportFormat.CSV:
+                    yield self._format_csv(
+                        (
+                            task_id,
+                            owner_id,
+                            status.value,
+                            created_at.isoformat(),
+                            results or "",
+                        )
+                        for task_id, owner_id, status, created_at, results in rows
+                    )
+                else:
+                    yield self._format_ndjson(rows)
+
+    @staticmethod
+    def _format_ndjson(rows: Sequence[Row]) -> bytes:
+        # Результаты вставляются текстом JSONB без разбора
+        return b"".join(
+            b"".join(
+                (
+                    orjson.dumps(
+                        {
+                            "task_id": task_id,
+                            "owner_id": owner_id,
+                            "status": status,
+                            "created_at": created_at,
+                        }
+                    )[:-1],
+                    b',"results":',
+                    results.encode() if results else b"null",
+                    b"}\n",
+                )
+            )
+            for task_id, owner_id, status, created_at, results in rows
+        )
+
+    @staticmethod
+    def _format_csv(rows: Iterable[Sequence[str]]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+    @staticmethod
+    def _encode_cursor(created_at: datetime, task_id: str) -> str:
+        raw = f"{created_at.isoformat()}|{task_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+        try:
+            created_at, task_id = (
+                base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+            )
+            return datetime.fromisoformat(created_at), str(UUID(task_id))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise InvalidCursorException()
+
+    @traced("TaskService.upload_and_process_file")
     async def upload_and_process_file(
-        self, file: UploadFile, background_tasks: BackgroundTasks, session: AsyncSession
+        self,
+        file: UploadFile,
+        background_tasks: BackgroundTasks,
+        session: AsyncSession,
+        owner_id: Optional[str] = None,
     ) -> TaskResponse:
-        logger.info("Начало upload_and_process_file")
+        logger.debug("Начало upload_and_process_file")
 
         # Валидация расширения файла
         if not file.filename or not file.filename.lower().endswith(".zip"):
@@ -206,24 +584,35 @@ class TaskService:
         task_id = str(uuid4())
 
         # Создание задачи
-        await self.create_task(task_id, file, session)
-
-        # Запуск фоновой обработки
-        async def wrapped_process_task(task_id_wrap: str):
-            async with async_session() as new_session:
-                try:
-                    await self.process_task(task_id_wrap, new_session)
-                    await new_session.commit()
-                except Exception as e:
-                    logger.error(
-                        f"Ошибка в фоновой задаче для {task_id_wrap}: {str(e)}"
-                    )
-                    await new_session.rollback()
-                    raise ProcessingException(
-                        message=f"Ошибка обработки задачи: {str(e)}"
-                    )
-
-        background_tasks.add_task(wrapped_process_task, task_id)
-        logger.info(f"Фоновая задача добавлена для {task_id}")
+        await self.create_task(task_id, file, session, owner_id=owner_id)
+
+        # Запуск фоновой обработки. Контекст трассировки передаётся явно:
+        # фоновая задача выполняется после ответа, когда спан запроса закрыт,
+        # но остаётся в том же трейсе, что и загрузка
+        async def wrapped_process_task(task_id_wrap: str, trace_carrier: dict):
+            with (
+                BACKGROUND_TASKS_IN_FLIGHT.track_inprogress(),
+                tracer.start_as_current_span(
+                    "background.process_task",
+                    context=extract_context(trace_carrier),
+                    attributes={"task.id": task_id_wrap},
+                ),
+            ):
+                async with async_session() as new_session:
+                    try:
+                        await self.process_task(task_id_wrap, new_session)
+                    except Exception as e:
+                        logger.error(
+                            f"Ошибка в фоновой задаче для {task_id_wrap}: {str(e)}"
+                        )
+                        await new_session.rollback()
+                        raise ProcessingException(
+                            message=f"Ошибка обработки задачи: {str(e)}"
+                        )
+
+        background_tasks.add_task(wrapped_process_task, task_id, inject_context())
+        logger.debug(
+            "Фоновая задача добавлена для %s", task_id, extra={"task_id": task_id}
+        )
 
         return TaskResponse(task_id=task_id)
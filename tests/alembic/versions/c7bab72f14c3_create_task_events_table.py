@@ -0,0 +1,58 @@
+"""Create task_events table
+
+Revision ID: c7bab72f14c3
+Revises: b32c7f541367
+Create Date: 2025-04-18 14:05:52.674109
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7bab72f14c3"
+down_revision: Union[str, None] = "b32c7f541367"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_events",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("task_id", sa.Uuid(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(
+                "PENDING",
+                "IN_PROGRESS",
+                "SUCCESS",
+                "FAILED",
+                name="taskstatus",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_task_events_task_id", "task_events", ["task_id"], unique=False)
+    op.create_index(
+        "ix_task_events_created_at",
+        "task_events",
+        ["created_at"],
+        unique=False,
+        postgresql_using="brin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_task_events_created_at", table_name="task_events", postgresql_using="brin"
+    )
+    op.drop_index("ix_task_events_task_id", table_name="task_events")
+    op.drop_table("task_events")
@@ -0,0 +1,50 @@
+from typing import Any, Callable
+
+import pytest
+from httpx import ASGITransport, AsyncClient, Response
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp
+
+
+@pytest.fixture
+def make_app() -> Callable[..., Starlette]:
+    """Приложение Starlette из маршрутов и middleware, значения state по имени."""
+
+    def make_app(
+        routes: list[BaseRoute], *middleware: Middleware, **state: Any
+    ) -> Starlette:
+        app = Starlette(routes=routes, middleware=middleware)
+        for name, value in state.items():
+            setattr(app.state, name, value)
+        return app
+
+    return make_app
+
+
+@pytest.fixture
+def asgi_client() -> Callable[..., AsyncClient]:
+    """
+    Клиент httpx, вызывающий приложение в процессе, без сети.
+    raise_app_exceptions=False отдаёт ответ 500 вместо исключения приложения.
+    """
+
+    def asgi_client(app: ASGIApp, raise_app_exceptions: bool = True) -> AsyncClient:
+        transport = ASGITransport(app=app, raise_app_exceptions=raise_app_exceptions)
+        return AsyncClient(transport=transport, base_url="http://test")
+
+    return asgi_client
+
+
+@pytest.fixture
+def get(asgi_client: Callable[..., AsyncClient]) -> Callable:
+    """Один GET-запрос к приложению."""
+
+    async def get(
+        app: ASGIApp, path: str, raise_app_exceptions: bool = True
+    ) -> Response:
+        async with asgi_client(app, raise_app_exceptions) as client:
+            return await client.get(path)
+
+    return get
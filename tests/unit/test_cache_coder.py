@@ -0,0 +1,49 @@
+import inspect
+
+import pytest
+from dotenv import load_dotenv
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from base.cache_coder import RAW, ZLIB, ZSTD, BinaryCoder, build_coder  # noqa: E402
+
+ENTRY = {
+    "status": "SUCCESS",
+    "etag": '"SUCCESS-0123456789abcdef"',
+    "body": '{"status":"SUCCESS","results":{"sonarqube":{}}}' * 100,
+}
+
+
+@pytest.mark.parametrize("serializer", ["msgpack", "orjson"])
+@pytest.mark.parametrize(
+    "compression, expected_tag",
+    [("none", RAW), ("zlib", ZLIB), ("zstd", ZSTD)],
+)
+def test_coder_round_trip(serializer: str, compression: str, expected_tag: int) -> None:
+    coder = build_coder(serializer, compression, compression_threshold=256)
+
+    encoded = coder.encode(ENTRY)
+
+    assert encoded[0] == expected_tag
+    assert coder.decode(encoded) == ENTRY
+
+
+def test_coder_skips_compression_below_threshold() -> None:
+    coder = build_coder("msgpack", "zstd", compression_threshold=1024)
+
+    encoded = coder.encode({"status": "PENDING"})
+
+    assert encoded[0] == RAW
+    assert coder.decode(encoded) == {"status": "PENDING"}
+
+
+def test_coder_decodes_entries_written_with_other_settings() -> None:
+    compressed = build_coder("msgpack", "zstd", 0).encode(ENTRY)
+
+    assert build_coder("msgpack", "none", 0).decode(compressed) == ENTRY
+
+
+def test_binary_coder_requires_serializer() -> None:
+    assert inspect.isabstract(BinaryCoder)
+    assert not inspect.isabstract(build_coder("msgpack", "zstd", 1024))
@@ -0,0 +1,56 @@
+from typing import Callable
+
+import pytest
+from fastapi import FastAPI
+
+from task.exceptions import (
+    ProcessingException,
+    TaskNotFoundException,
+)
+from task.exceptions.handlers import register_exception_handlers
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+    register_exception_handlers(app)
+
+    @app.get("/not_found")
+    async def not_found():
+        raise TaskNotFoundException()
+
+    @app.get("/processing")
+    async def processing():
+        raise ProcessingException("Ошибка анализа")
+
+    @app.get("/unexpected")
+    async def unexpected():
+        raise RuntimeError("boom")
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_exception_with_message_response(get: Callable) -> None:
+    response = await get(create_app(), "/not_found")
+
+    assert response.status_code == TaskNotFoundException.status_code
+    assert response.json() == {"detail": TaskNotFoundException.message}
+
+
+@pytest.mark.asyncio
+async def test_logged_exception_response(
+    get: Callable, caplog: pytest.LogCaptureFixture
+) -> None:
+    response = await get(create_app(), "/processing")
+
+    assert response.status_code == ProcessingException.status_code
+    assert response.json() == {"detail": "Ошибка анализа"}
+    assert "Processing error: Ошибка анализа" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_unexpected_exception_response(get: Callable) -> None:
+    response = await get(create_app(), "/unexpected", raise_app_exceptions=False)
+
+    assert response.status_code == 500
+    assert response.json() == {}
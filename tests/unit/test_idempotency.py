@@ -0,0 +1,202 @@
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+import pytest
+from dotenv import load_dotenv
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.types import Scope
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from base.idempotency import IdempotencyMiddleware, StoredResponse  # noqa: E402
+
+
+class InMemoryIdempotencyStore:
+    """Блокировки истекают через lock_ttl секунд, как ключи Redis с EX."""
+
+    def __init__(self, lock_ttl: float = 60) -> None:
+        self.lock_ttl = lock_ttl
+        self.responses: dict = {}
+        self.locks: dict = {}
+
+    async def get(self, identity: str, key: str) -> Optional[StoredResponse]:
+        return self.responses.get((identity, key))
+
+    async def save(self, identity: str, key: str, response: StoredResponse) -> None:
+        self.responses[(identity, key)] = response
+
+    async def acquire(self, identity: str, key: str) -> Optional[str]:
+        lock = self.locks.get((identity, key))
+        if lock is not None and lock[1] > time.monotonic():
+            return None
+        token = uuid.uuid4().hex
+        self.locks[(identity, key)] = (token, time.monotonic() + self.lock_ttl)
+        return token
+
+    async def renew(self, identity: str, key: str, token: str) -> bool:
+        lock = self.locks.get((identity, key))
+        if lock is None or lock[0] != token or lock[1] <= time.monotonic():
+            return False
+        self.locks[(identity, key)] = (token, time.monotonic() + self.lock_ttl)
+        return True
+
+    async def release(self, identity: str, key: str, token: str) -> None:
+        if self.locks.get((identity, key), (None,))[0] == token:
+            del self.locks[(identity, key)]
+
+
+async def identify(scope: Scope) -> Optional[str]:
+    return "test_user_id"
+
+
+@pytest.fixture
+def create_app(make_app: Callable[..., Starlette]) -> Callable[..., Starlette]:
+    def create_app(
+        status_code: int = 201,
+        delay: float = 0,
+        background: Optional[Callable[[], Awaitable]] = None,
+        lock_ttl: float = 60,
+    ) -> Starlette:
+        calls = []
+
+        async def upload(request):
+            await request.body()
+            calls.append(request)
+            await asyncio.sleep(delay)
+            return JSONResponse(
+                {"task_id": f"task_{len(calls)}"},
+                status_code=status_code,
+                background=BackgroundTask(background) if background else None,
+            )
+
+        return make_app(
+            [Route("/upload", upload, methods=["POST"])],
+            Middleware(
+                IdempotencyMiddleware,
+                paths=[("POST", "/upload")],
+                identify=identify,
+                poll_interval=0.01,
+            ),
+            idempotency_store=InMemoryIdempotencyStore(lock_ttl),
+            calls=calls,
+        )
+
+    return create_app
+
+
+async def upload(
+    client: AsyncClient, key: Optional[str] = "key-1", content: bytes = b"zip"
+):
+    headers = {"Idempotency-Key": key} if key else {}
+    return await client.post("/upload", content=content, headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_repeated_upload_replays_response(
+    create_app: Callable, asgi_client: Callable
+) -> None:
+    app = create_app()
+    async with asgi_client(app) as client:
+        first = await upload(client)
+        second = await upload(client)
+
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json() == {"task_id": "task_1"}
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert len(app.state.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_are_coalesced(
+    create_app: Callable, asgi_client: Callable
+) -> None:
+    app = create_app(delay=0.05)
+    async with asgi_client(app) as client:
+        responses = await asyncio.gather(*(upload(client) for _ in range(3)))
+
+    assert {response.json()["task_id"] for response in responses} == {"task_1"}
+    assert len(app.state.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_lock_renewed_during_slow_upload(
+    create_app: Callable, asgi_client: Callable
+) -> None:
+    # Обработка идёт в несколько раз дольше lock_ttl
+    app = create_app(delay=0.2, lock_ttl=0.05)
+    async with asgi_client(app) as client:
+        first = asyncio.create_task(upload(client))
+        await asyncio.sleep(0.1)
+        second = await upload(client)
+
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json() == (await first).json()
+    assert len(app.state.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_other_request(
+    create_app: Callable, asgi_client: Callable
+) -> None:
+    app = create_app()
+    async with asgi_client(app) as client:
+        await upload(client)
+        other = await upload(client, content=b"other zip")
+
+    assert other.status_code == 422
+    assert len(app.state.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_does_not_wait_for_background_task(
+    create_app: Callable, asgi_client: Callable
+) -> None:
+    processing = asyncio.Event()
+    app = create_app(background=processing.wait)
+    store = app.state.idempotency_store
+    async with asgi_client(app) as client:
+        first = asyncio.create_task(upload(client))
+        # ASGITransport возвращает ответ только после фоновой задачи
+        async with asyncio.timeout(1):
+            while not store.responses:
+                await asyncio.sleep(0.01)
+        assert not store.locks
+
+        async with asyncio.timeout(1):
+            second = await upload(client)
+        assert second.status_code == 201
+        assert second.headers["Idempotent-Replayed"] == "true"
+
+        processing.set()
+        assert (await first).json() == second.json()
+    assert len(app.state.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_upload_is_not_stored(
+    create_app: Callable, asgi_client: Callable
+) -> None:
+    app = create_app(status_code=400)
+    async with asgi_client(app) as client:
+        await upload(client)
+        await upload(client)
+
+    assert len(app.state.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_upload_without_key(create_app: Callable, asgi_client: Callable) -> None:
+    app = create_app()
+    async with asgi_client(app) as client:
+        await upload(client, key=None)
+        await upload(client, key=None)
+
+    assert len(app.state.calls) == 2
@@ -0,0 +1,114 @@
+import time
+from typing import Optional
+from unittest.mock import AsyncMock
+
+import orjson
+import pytest
+from jwcrypto.jwk import JWK, JWKSet
+from jwcrypto.jwt import JWT
+
+from auth.jwt_verifier import TokenVerificationError, TokenVerifier
+
+ISSUER = "http://localhost:8080/realms/zip-service"
+CLIENT_ID = "zip-service-client"
+
+
+def create_jwks(*keys: JWK) -> dict:
+    jwks = JWKSet()
+    for key in keys:
+        jwks.add(key)
+    return orjson.loads(jwks.export(private_keys=False))
+
+
+def create_token(key: JWK, claims: Optional[dict] = None) -> str:
+    now = int(time.time())
+    token = JWT(
+        header={"alg": "RS256", "kid": key["kid"]},
+        claims={
+            "sub": "test_user_id",
+            "iss": ISSUER,
+            "azp": CLIENT_ID,
+            "iat": now,
+            "exp": now + 300,
+            **(claims or {}),
+        },
+    )
+    token.make_signed_token(key)
+    return token.serialize()
+
+
+@pytest.fixture
+def signing_key() -> JWK:
+    return JWK.generate(kty="RSA", size=2048, kid="key-1")
+
+
+@pytest.fixture
+def verifier(signing_key: JWK) -> TokenVerifier:
+    return TokenVerifier(
+        fetch_jwks=AsyncMock(return_value=create_jwks(signing_key)),
+        issuer=ISSUER,
+        audience=CLIENT_ID,
+    )
+
+
+@pytest.mark.asyncio
+async def test_verify_valid_token_cached(
+    verifier: TokenVerifier, signing_key: JWK
+) -> None:
+    token = create_token(signing_key)
+
+    first = await verifier.verify(token)
+    second = await verifier.verify(token)
+
+    assert first["sub"] == "test_user_id"
+    assert second is first
+    verifier.fetch_jwks.assert_called_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "claims",
+    [
+        {"exp": int(time.time()) - 3600},
+        {"iss": "http://evil/realms/zip-service"},
+        {"azp": "other-client"},
+    ],
+)
+async def test_verify_rejects_invalid_claims(
+    verifier: TokenVerifier, signing_key: JWK, claims: dict
+) -> None:
+    with pytest.raises(TokenVerificationError):
+        await verifier.verify(create_token(signing_key, claims))
+
+
+@pytest.mark.asyncio
+async def test_verify_rejects_foreign_signature(verifier: TokenVerifier) -> None:
+    foreign_key = JWK.generate(kty="RSA", size=2048, kid="key-1")
+    with pytest.raises(TokenVerificationError):
+        await verifier.verify(create_token(foreign_key))
+
+
+@pytest.mark.asyncio
+async def test_verify_refreshes_jwks_on_key_rotation(
+    verifier: TokenVerifier, signing_key: JWK
+) -> None:
+    await verifier.verify(create_token(signing_key))
+    rotated_key = JWK.generate(kty="RSA", size=2048, kid="key-2")
+    verifier.fetch_jwks.return_value = create_jwks(signing_key, rotated_key)
+    verifier.min_refresh_interval = 0
+
+    claims = await verifier.verify(create_token(rotated_key))
+
+    assert claims["sub"] == "test_user_id"
+    assert verifier.fetch_jwks.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_verify_jwks_unavailable(signing_key: JWK) -> None:
+    verifier = TokenVerifier(
+        fetch_jwks=AsyncMock(side_effect=ConnectionError("Keycloak down")),
+        issuer=ISSUER,
+        audience=CLIENT_ID,
+    )
+    with pytest.raises(TokenVerificationError):
+        await verifier.verify(create_token(signing_key))
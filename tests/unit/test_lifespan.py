@@ -0,0 +1,55 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from dotenv import load_dotenv
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from base import lifespan  # noqa: E402
+
+
+class FakeConnection:
+    def __init__(self, engine: "FakeEngine", fail: bool) -> None:
+        self.engine = engine
+        self.fail = fail
+
+    async def __aenter__(self) -> "FakeConnection":
+        self.engine.opened += 1
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.engine.opened -= 1
+
+    async def execute(self, statement) -> None:
+        if self.fail:
+            raise ConnectionError("Postgres down")
+
+
+class FakeEngine:
+    def __init__(self, size: int, fail_at: int) -> None:
+        self.pool = MagicMock(size=MagicMock(return_value=size))
+        self.fail_at = fail_at
+        self.connects = 0
+        self.opened = 0
+
+    def connect(self) -> FakeConnection:
+        self.connects += 1
+        return FakeConnection(self, fail=self.connects == self.fail_at)
+
+
+async def test_prewarm_closes_connections_on_failure(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    engine = FakeEngine(size=3, fail_at=2)
+    monkeypatch.setattr(lifespan, "get_engine", lambda: engine)
+    monkeypatch.setattr(lifespan, "get_redis_client", MagicMock())
+    monkeypatch.setattr(lifespan, "create_storage_repository", MagicMock())
+    monkeypatch.setattr(lifespan, "token_verifier", MagicMock(refresh=AsyncMock()))
+    lifespan.get_redis_client.return_value.ping = AsyncMock()
+    lifespan.create_storage_repository.return_value.check = AsyncMock()
+
+    await lifespan.prewarm()
+
+    assert engine.connects == 2
+    assert engine.opened == 0
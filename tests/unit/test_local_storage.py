@@ -0,0 +1,85 @@
+import io
+import tempfile
+from pathlib import Path
+
+import pytest
+from dotenv import load_dotenv
+from fastapi import UploadFile
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from task.repositories import LocalStorageRepository  # noqa: E402
+
+CONTENT = b"PK" + bytes(range(256)) * 64
+
+
+@pytest.fixture
+def storage_repo(tmp_path: Path) -> LocalStorageRepository:
+    return LocalStorageRepository(tmp_path, chunk_size=1000)
+
+
+def upload(file) -> UploadFile:
+    return UploadFile(file=file, size=len(CONTENT), filename="archive.zip")
+
+
+@pytest.mark.asyncio
+async def test_save_from_memory_and_download_to_disk(
+    storage_repo: LocalStorageRepository, tmp_path: Path
+) -> None:
+    await storage_repo.save_file(upload(io.BytesIO(CONTENT)), "task.zip")
+
+    path = storage_repo.path("task.zip")
+    assert path.read_bytes() == CONTENT
+    # Два уровня подкаталогов по хешу имени, временных файлов не остаётся
+    assert path.parent.parent.parent == tmp_path
+    assert list(path.parent.iterdir()) == [path]
+
+    with tempfile.TemporaryFile() as target:
+        await storage_repo.download_file("task.zip", target)
+        assert target.tell() == len(CONTENT)
+        target.seek(0)
+        assert target.read() == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_save_from_disk_and_download_to_memory(
+    storage_repo: LocalStorageRepository,
+) -> None:
+    with tempfile.TemporaryFile() as source:
+        source.write(CONTENT)
+        source.seek(0)
+        await storage_repo.save_file(upload(source), "task.zip")
+
+    with tempfile.SpooledTemporaryFile(max_size=len(CONTENT) * 2) as target:
+        await storage_repo.download_file("task.zip", target)
+        assert not target._rolled
+        target.seek(0)
+        assert target.read() == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_failed_write_keeps_previous_object(
+    storage_repo: LocalStorageRepository,
+) -> None:
+    class BrokenFile(io.BytesIO):
+        def read(self, size: int = -1) -> bytes:
+            raise OSError("Соединение разорвано")
+
+    await storage_repo.save_file(upload(io.BytesIO(CONTENT)), "task.zip")
+    with pytest.raises(OSError):
+        await storage_repo.save_file(upload(BrokenFile()), "task.zip")
+
+    path = storage_repo.path("task.zip")
+    assert path.read_bytes() == CONTENT
+    assert list(path.parent.iterdir()) == [path]
+
+
+@pytest.mark.asyncio
+async def test_remove_files(storage_repo: LocalStorageRepository) -> None:
+    await storage_repo.save_file(upload(io.BytesIO(CONTENT)), "a.zip")
+
+    failed = await storage_repo.remove_files(["a.zip", "missing.zip", "../b.zip"])
+
+    assert failed == ["../b.zip"]
+    assert not storage_repo.path("a.zip").exists()
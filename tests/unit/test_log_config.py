@@ -0,0 +1,46 @@
+import logging
+
+import orjson
+from dotenv import load_dotenv
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from base.log_config import DeferredQueueHandler, JSONFormatter, SamplingFilter  # noqa: E402
+
+
+def create_record(name: str, level: int, msg: str, *args, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra() -> None:
+    record = create_record(
+        "api.task", logging.INFO, "Задача %s создана", "task-1", task_id="task-1"
+    )
+
+    entry = orjson.loads(JSONFormatter().format(record))
+
+    assert entry["message"] == "Задача task-1 создана"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "api.task"
+    assert entry["task_id"] == "task-1"
+
+
+def test_deferred_queue_handler_does_not_format() -> None:
+    record = create_record("api", logging.INFO, "Задача %s", "task-1")
+
+    prepared = DeferredQueueHandler(None).prepare(record)  # type: ignore[arg-type]
+
+    assert prepared.msg == "Задача %s"
+    assert prepared.args == ("task-1",)
+
+
+def test_sampling_filter() -> None:
+    sampling = SamplingFilter({"api": 1.0, "api.base.rate_limit": 0.0})
+
+    assert sampling.filter(create_record("api.task", logging.INFO, ""))
+    assert not sampling.filter(create_record("api.base.rate_limit", logging.INFO, ""))
+    assert sampling.filter(create_record("api.base.rate_limit", logging.WARNING, ""))
+    assert sampling.filter(create_record("uvicorn", logging.DEBUG, ""))
@@ -0,0 +1,175 @@
+import gc
+import os
+import threading
+import tracemalloc
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Iterator, NamedTuple
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from fastapi_cache import FastAPICache
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from gateways.sonarqube.sonarqube import SonarqubeService  # noqa: E402
+from settings import get_settings  # noqa: E402
+from task.repositories import (  # noqa: E402
+    LocalStorageRepository,
+    MinioStorageRepository,
+    StorageRepository,
+)
+from task.services.task_service import TaskService  # noqa: E402
+
+MiB = 1024 * 1024
+CHUNK_SIZE = get_settings().STORAGE_CHUNK_SIZE
+
+# Пик на запрос в частях архива: запрос, снова читающий архив в память
+# целиком, выходит за предел уже на 10 МБ
+TRACED_LIMIT = 3 * CHUNK_SIZE
+# RSS шумнее: учитывает фрагментацию кучи и сам tracemalloc
+RSS_LIMIT = 5 * CHUNK_SIZE
+
+
+class MemoryPeak(NamedTuple):
+    traced: int
+    rss: int
+
+
+class ObjectResponse:
+    def __init__(self, path: Path):
+        self.file = open(path, "rb")
+
+    def stream(self, amt: int) -> Iterator[bytes]:
+        while chunk := self.file.read(amt):
+            yield chunk
+
+    def close(self) -> None:
+        self.file.close()
+
+    def release_conn(self) -> None:
+        pass
+
+
+class DiskMinio:
+    """
+    Бакет MinIO в каталоге. put_object читает тело частями по part_size,
+    как клиент minio при num_parallel_uploads=1.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def put_object(
+        self,
+        bucket_name: str,
+        object_name: str,
+        data: BinaryIO,
+        length: int,
+        part_size: int,
+        num_parallel_uploads: int,
+    ) -> None:
+        with open(self.root / object_name, "wb") as f:
+            while part := data.read(part_size):
+                f.write(part)
+
+    def get_object(self, bucket_name: str, object_name: str) -> ObjectResponse:
+        return ObjectResponse(self.root / object_name)
+
+
+def current_rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+async def measure_peak(operation: Awaitable) -> MemoryPeak:
+    """Пик выделенной памяти (tracemalloc) и прирост RSS за время операции."""
+    gc.collect()
+    rss_start = rss_peak = current_rss()
+    stop = threading.Event()
+
+    def sample_rss() -> None:
+        nonlocal rss_peak
+        while not stop.wait(0.005):
+            rss_peak = max(rss_peak, current_rss())
+
+    sampler = threading.Thread(target=sample_rss)
+    sampler.start()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    try:
+        await operation
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stop.set()
+        sampler.join()
+    return MemoryPeak(traced=peak - start, rss=rss_peak - rss_start)
+
+
+@pytest.fixture(scope="module")
+def archives(tmp_path_factory: pytest.TempPathFactory) -> dict[int, Path]:
+    """
+    Несжимаемые архивы по 1, 10 и 100 МБ, записанные на диск частями.
+    Последняя часть короче на заголовки ZIP: 100 МБ — предел MAX_FILE_SIZE.
+    """
+    root = tmp_path_factory.mktemp("archives")
+    paths = {}
+    for size_mb in (1, 10, 100):
+        path = root / f"{size_mb}mb.zip"
+        with (
+            zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive,
+            archive.open("data.bin", "w", force_zip64=True) as entry,
+        ):
+            for _ in range(size_mb - 1):
+                entry.write(os.urandom(MiB))
+            entry.write(os.urandom(MiB - 4096))
+        paths[size_mb] = path
+    return paths
+
+
+@pytest.fixture(params=["minio", "local"])
+def storage_repo(request: pytest.FixtureRequest, tmp_path: Path) -> StorageRepository:
+    if request.param == "local":
+        return LocalStorageRepository(tmp_path, chunk_size=CHUNK_SIZE)
+    return MinioStorageRepository(
+        DiskMinio(tmp_path), bucket_name="zip-bucket", chunk_size=CHUNK_SIZE
+    )
+
+
+@pytest.fixture
+def service(storage_repo: StorageRepository) -> TaskService:
+    task_repo = MagicMock()
+    task_repo.create = AsyncMock()
+    task_repo.session.commit = AsyncMock()
+    task_repo.transition_status = AsyncMock(
+        return_value=MagicMock(owner_id=None, created_at=datetime.now(timezone.utc))
+    )
+    FastAPICache.init(backend=AsyncMock(), prefix="test_prefix")
+    return TaskService(storage_repo, task_repo, SonarqubeService())
+
+
+@pytest.mark.skipif(
+    not Path("/proc/self/statm").exists(), reason="RSS читается из /proc"
+)
+@pytest.mark.parametrize("size_mb", [1, 10, 100])
+async def test_peak_memory_bounded_by_chunk_size(
+    service: TaskService, archives: dict[int, Path], size_mb: int
+) -> None:
+    path = archives[size_mb]
+    with open(path, "rb") as f:
+        upload = UploadFile(file=f, size=path.stat().st_size, filename="archive.zip")
+        created = await measure_peak(service.create_task("task_id", upload))
+    processed = await measure_peak(service.process_task("task_id"))
+
+    for stage, peak in (("create_task", created), ("process_task", processed)):
+        assert peak.traced < TRACED_LIMIT, (
+            f"{stage}, {size_mb} МБ: выделено {peak.traced / MiB:.1f} МБ"
+        )
+        assert peak.rss < RSS_LIMIT, (
+            f"{stage}, {size_mb} МБ: RSS вырос на {peak.rss / MiB:.1f} МБ"
+        )
@@ -0,0 +1,158 @@
+import asyncio
+import sqlite3
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from starlette.routing import Route
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from base.db_pool import (  # noqa: E402
+    CheckoutTimingMixin,
+    InstrumentedNullPool,
+    pool_options,
+)
+from base.metrics import (  # noqa: E402
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_TIMEOUTS,
+    EVENT_LOOP_LAG,
+    BodyReceiveMetricsMiddleware,
+    monitor_event_loop_lag,
+    stage_duration,
+)
+from settings import get_settings  # noqa: E402
+from task.api.endpoints import metrics as metrics_endpoint  # noqa: E402
+from task.enums import TaskStatus  # noqa: E402
+
+
+def histogram_count(stage: str) -> float:
+    return next(
+        sample.value
+        for sample in stage_duration(stage).collect()[0].samples
+        if sample.name.endswith("_count")
+    )
+
+
+@pytest.mark.asyncio
+async def test_body_receive_observed_for_matching_path() -> None:
+    async def endpoint(request: Request):
+        return PlainTextResponse(str(len(await request.body())))
+
+    app = Starlette(
+        routes=[
+            Route("/upload", endpoint, methods=["POST"]),
+            Route("/other", endpoint, methods=["POST"]),
+        ]
+    )
+    app.add_middleware(
+        BodyReceiveMetricsMiddleware,
+        paths=[("POST", "/upload")],
+        stage="test_receive",
+    )
+    before = histogram_count("test_receive")
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/upload", content=b"x" * 1024)
+        await client.post("/other", content=b"x")
+
+    assert response.text == "1024"
+    assert histogram_count("test_receive") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_event_loop_lag_measured() -> None:
+    monitor = asyncio.create_task(monitor_event_loop_lag(interval=0.01))
+    await asyncio.sleep(0)
+    time.sleep(0.05)  # блокирующий вызов задерживает таймер монитора
+    await asyncio.sleep(0.001)
+    monitor.cancel()
+
+    assert EVENT_LOOP_LAG._value.get() >= 0.03
+
+
+def sample_value(metric, name: str, **labels: str) -> float:
+    return next(
+        sample.value
+        for sample in metric.collect()[0].samples
+        if sample.name == name and sample.labels.items() >= labels.items()
+    )
+
+
+def test_pool_checkout_wait_and_timeouts() -> None:
+    class TimedQueuePool(CheckoutTimingMixin, QueuePool):
+        pass
+
+    pool = TimedQueuePool(
+        lambda: sqlite3.connect(":memory:"),
+        pool_size=1,
+        max_overflow=0,
+        timeout=0.01,
+        logging_name="test_pool",
+    )
+    waits = "zipservice_db_pool_checkout_wait_seconds_count"
+    timeouts = "zipservice_db_pool_timeouts_total"
+
+    connection = pool.connect()
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    connection.close()
+
+    assert sample_value(DB_POOL_CHECKOUT_WAIT, waits, pool="test_pool") == 2
+    assert sample_value(DB_POOL_TIMEOUTS, timeouts, pool="test_pool") == 1
+
+
+def test_pgbouncer_pool_options_disable_statement_caches() -> None:
+    settings = get_settings().model_copy(update={"DB_PGBOUNCER": True})
+
+    options = pool_options(settings, "primary")
+    connect_args = options["connect_args"]
+
+    assert options["poolclass"] is InstrumentedNullPool
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    # Имена выражений не повторяются между соединениями
+    name_func = connect_args["prepared_statement_name_func"]
+    assert name_func() != name_func()
+
+
+@pytest.mark.asyncio
+async def test_finished_task_counts_cached_for_ttl() -> None:
+    task_repo = MagicMock()
+    task_repo.count_by_status = AsyncMock(return_value={TaskStatus.SUCCESS: 3})
+    counts = metrics_endpoint.FinishedTaskCounts(ttl=60)
+
+    assert await counts.get(task_repo) == {TaskStatus.SUCCESS: 3}
+    assert await counts.get(task_repo) == {TaskStatus.SUCCESS: 3}
+    task_repo.count_by_status.assert_awaited_once_with(
+        metrics_endpoint.FINISHED_STATUSES
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics_token_required_when_configured(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(metrics_endpoint.settings, "METRICS_TOKEN", "secret")
+    app = FastAPI()
+    app.include_router(metrics_endpoint.router)
+    app.dependency_overrides[metrics_endpoint.get_read_only_session] = lambda: None
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        missing = await client.get("/metrics")
+        wrong = await client.get("/metrics", headers={"Authorization": "Bearer x"})
+        valid = await client.get("/metrics", headers={"Authorization": "Bearer secret"})
+
+    assert missing.status_code == wrong.status_code == 401
+    assert valid.status_code == 200
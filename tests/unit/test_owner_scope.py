@@ -0,0 +1,56 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from dotenv import load_dotenv
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from task.api.deps import scope_owner_id  # noqa: E402
+from task.api.endpoints.stats import get_stats  # noqa: E402
+from task.api.endpoints.task import export_tasks  # noqa: E402
+from task.enums import ExportFormat  # noqa: E402
+from task.exceptions import AdminRequiredException  # noqa: E402
+
+USER = {"sub": "user_id"}
+ADMIN = {"sub": "admin_id", "realm_access": {"roles": ["admin"]}}
+
+
+def test_scope_owner_id() -> None:
+    assert scope_owner_id(USER, None) == "user_id"
+    assert scope_owner_id(USER, "user_id") == "user_id"
+    assert scope_owner_id(ADMIN, None) is None
+    assert scope_owner_id(ADMIN, "user_id") == "user_id"
+
+    with pytest.raises(AdminRequiredException):
+        scope_owner_id(USER, "other_user_id")
+
+
+@pytest.mark.asyncio
+async def test_user_cannot_export_other_users_tasks() -> None:
+    task_service = MagicMock()
+
+    with pytest.raises(AdminRequiredException):
+        await export_tasks(
+            task_service, USER, ExportFormat.NDJSON, owner_id="other_user_id"
+        )
+    task_service.export_results.assert_not_called()
+
+    # Без owner_id выгружаются только собственные задачи
+    await export_tasks(task_service, USER, ExportFormat.NDJSON)
+    assert task_service.export_results.call_args.kwargs["owner_id"] == "user_id"
+
+
+@pytest.mark.asyncio
+async def test_user_cannot_read_other_users_stats() -> None:
+    stats_service = MagicMock()
+    stats_service.get_stats = AsyncMock()
+
+    with pytest.raises(AdminRequiredException):
+        await get_stats(stats_service, USER, owner_id="other_user_id")
+    stats_service.get_stats.assert_not_called()
+
+    await get_stats(stats_service, USER, owner_id="user_id")
+    await get_stats(stats_service, USER)
+    await get_stats(stats_service, ADMIN, owner_id="other_user_id")
+    assert stats_service.get_stats.await_count == 3
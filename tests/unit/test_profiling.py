@@ -0,0 +1,122 @@
+import asyncio
+import time
+from typing import Callable
+
+import pytest
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from api.endpoints.profiling import get_profile  # noqa: E402
+from base.profiling import MemoryProfiler, ProfilingMiddleware, SamplingProfiler  # noqa: E402
+
+
+class TaskService:
+    # Имя класса совпадает с сервисом: сэмплы попадают в профиль метода
+    def busy(self, seconds: float) -> None:
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+
+
+async def slow(request):
+    TaskService().busy(0.1)
+    return PlainTextResponse("slow")
+
+
+async def fast(request):
+    return PlainTextResponse("fast")
+
+
+async def in_thread(request):
+    await asyncio.to_thread(TaskService().busy, 0.1)
+    return PlainTextResponse("in_thread")
+
+
+@pytest.fixture
+async def profiler():
+    profiler = SamplingProfiler()
+    yield profiler
+    await profiler.stop()
+
+
+@pytest.fixture
+def app(make_app: Callable[..., Starlette], profiler: SamplingProfiler) -> Starlette:
+    return make_app(
+        [Route("/slow", slow), Route("/fast", fast), Route("/thread", in_thread)],
+        Middleware(ProfilingMiddleware, profiler=profiler),
+    )
+
+
+@pytest.mark.asyncio
+async def test_slow_request_profiled(
+    profiler: SamplingProfiler, app: Starlette, get: Callable
+) -> None:
+    await profiler.start(sample_rate=0, slow_threshold=0.05, interval=0.001)
+
+    await get(app, "/slow")
+    await get(app, "/fast")
+
+    status = profiler.status()
+    assert [request["route"] for request in status["slow_requests"]] == ["GET /slow"]
+    route_profile = profiler.folded("slow", "0")
+    assert "TaskService.busy" in route_profile
+    assert "ProfilingMiddleware" not in route_profile
+    method_profile = profiler.folded("method", "TaskService.busy")
+    assert method_profile.startswith("TaskService.busy")
+
+
+@pytest.mark.asyncio
+async def test_thread_pool_profiled(
+    profiler: SamplingProfiler, app: Starlette, get: Callable
+) -> None:
+    await profiler.start(sample_rate=1, interval=0.001)
+
+    await get(app, "/thread")
+
+    route_profile = profiler.folded("route", "GET /thread")
+    # Стек потока начинается с функции, переданной в пул
+    assert any(
+        line.startswith("TaskService.busy") for line in route_profile.splitlines()
+    )
+    assert profiler.folded("method", "TaskService.busy")
+
+
+@pytest.mark.asyncio
+async def test_disabled_profiler_collects_nothing(
+    profiler: SamplingProfiler, app: Starlette, get: Callable
+) -> None:
+    response = await get(app, "/slow")
+
+    assert response.text == "slow"
+    assert profiler.status()["routes"] == {}
+    assert profiler.folded("route", "GET /slow") is None
+
+
+@pytest.mark.asyncio
+async def test_missing_profile_not_found() -> None:
+    with pytest.raises(HTTPException) as error:
+        await get_profile("route", "GET /missing")
+
+    assert error.value.status_code == 404
+
+
+def test_memory_snapshot_diff() -> None:
+    memory_profiler = MemoryProfiler()
+    memory_profiler.start(frames=5)
+    try:
+        memory_profiler.snapshot()
+        allocated = [bytearray(1024) for _ in range(1000)]
+        snapshot = memory_profiler.snapshot(limit=5)
+    finally:
+        memory_profiler.stop()
+
+    assert snapshot["tracing"] is True
+    assert snapshot["diff"][0]["size_diff"] >= 1024 * 1000
+    assert len(allocated) == 1000
@@ -0,0 +1,124 @@
+from typing import Callable, Optional
+from unittest.mock import AsyncMock
+
+import pytest
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.types import Scope
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from base.rate_limit import (  # noqa: E402
+    Budget,
+    RateLimitMiddleware,
+    RateLimitRule,
+    RateLimitState,
+    content_length,
+)
+
+reads = Budget(name="reads", capacity=10, period=60)
+
+
+async def identify(scope: Scope) -> Optional[str]:
+    return "test_user_id"
+
+
+async def anonymous(scope: Scope) -> Optional[str]:
+    return None
+
+
+@pytest.fixture
+def create_app(make_app: Callable[..., Starlette]) -> Callable[..., Starlette]:
+    async def endpoint(request):
+        return PlainTextResponse("ok")
+
+    def create_app(limiter: Optional[AsyncMock], identify=identify) -> Starlette:
+        return make_app(
+            [Route("/results/{task_id}", endpoint)],
+            Middleware(
+                RateLimitMiddleware,
+                rules=[
+                    RateLimitRule(
+                        method="GET", path_prefix="/results/", budgets=[reads]
+                    )
+                ],
+                identify=identify,
+            ),
+            rate_limiter=limiter,
+        )
+
+    return create_app
+
+
+def create_limiter(allowed: bool) -> AsyncMock:
+    limiter = AsyncMock()
+    limiter.acquire = AsyncMock(
+        return_value=RateLimitState(
+            allowed=allowed,
+            retry_after=0 if allowed else 5.2,
+            budget=reads,
+            remaining=9 if allowed else 0,
+            reset=6,
+        )
+    )
+    return limiter
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_allowed_adds_headers(
+    create_app: Callable, get: Callable
+) -> None:
+    limiter = create_limiter(allowed=True)
+
+    response = await get(create_app(limiter), "/results/test_id")
+
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Limit"] == "10"
+    assert response.headers["RateLimit-Remaining"] == "9"
+    limiter.acquire.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_exceeded(create_app: Callable, get: Callable) -> None:
+    response = await get(create_app(create_limiter(allowed=False)), "/results/test_id")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "6"
+    assert response.headers["RateLimit-Remaining"] == "0"
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_skips_anonymous_and_unmatched(
+    create_app: Callable, get: Callable
+) -> None:
+    limiter = create_limiter(allowed=False)
+
+    anonymous_response = await get(
+        create_app(limiter, identify=anonymous), "/results/test_id"
+    )
+    unmatched_response = await get(create_app(limiter), path="/other")
+
+    assert anonymous_response.status_code == 200
+    assert unmatched_response.status_code == 404
+    limiter.acquire.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_fails_open(create_app: Callable, get: Callable) -> None:
+    limiter = AsyncMock()
+    limiter.acquire = AsyncMock(side_effect=ConnectionError("Redis down"))
+
+    response = await get(create_app(limiter), "/results/test_id")
+
+    assert response.status_code == 200
+
+
+def test_content_length_cost() -> None:
+    cost = content_length(default=100)
+
+    assert cost({"type": "http", "headers": [(b"content-length", b"42")]}) == 42
+    assert cost({"type": "http", "headers": []}) == 100
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+from dotenv import load_dotenv
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from base.readiness import run_checks  # noqa: E402
+
+
+async def ok() -> None:
+    pass
+
+
+async def failing() -> None:
+    raise ConnectionError("Redis down")
+
+
+async def hanging() -> None:
+    await asyncio.sleep(10)
+
+
+@pytest.mark.asyncio
+async def test_run_checks() -> None:
+    checks = await run_checks(
+        {"database": ok, "redis": failing, "storage": hanging}, timeout=0.05
+    )
+
+    assert checks["database"] == "ok"
+    assert "Redis down" in checks["redis"]
+    assert "TimeoutError" in checks["storage"]
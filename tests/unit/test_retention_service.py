@@ -0,0 +1,221 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from dotenv import load_dotenv
+from minio.deleteobjects import DeleteError
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from task.repositories import MinioStorageRepository, TaskPartition  # noqa: E402
+from task.services import retention_service  # noqa: E402
+from task.services.retention_service import (  # noqa: E402
+    RetentionService,
+    add_months,
+    partitions_ahead,
+)
+
+NOW = datetime(2025, 4, 16, 12, 0, tzinfo=timezone.utc)
+
+
+def utc(year: int, month: int) -> datetime:
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def stream(*batches: list):
+    async def stream_file_paths(name, batch_size):
+        for batch in batches:
+            yield batch
+
+    return stream_file_paths
+
+
+@pytest.fixture
+def session() -> MagicMock:
+    session = MagicMock()
+    session.commit = AsyncMock()
+    session.rollback = AsyncMock()
+    return session
+
+
+@pytest.fixture
+def partition_repo() -> MagicMock:
+    repo = MagicMock()
+    repo.try_lock = AsyncMock(return_value=True)
+    repo.set_lock_timeout = AsyncMock()
+    repo.create = AsyncMock(side_effect=lambda start, end: f"tasks_p{start:%Y%m}")
+    repo.drop = AsyncMock()
+    repo.detach = AsyncMock()
+    repo.stream_file_paths = stream()
+    return repo
+
+
+def test_add_months_crosses_year() -> None:
+    assert add_months(utc(2025, 11), 3) == utc(2026, 2)
+
+
+def test_partitions_ahead() -> None:
+    partitions = [
+        TaskPartition("tasks_legacy", utc(2025, 4)),
+        TaskPartition("tasks_p202504", utc(2025, 5)),
+        TaskPartition("tasks_p202505", utc(2025, 6)),
+    ]
+
+    assert partitions_ahead(partitions, NOW) == 1
+    assert partitions_ahead(partitions[:1], NOW) == -1
+    assert partitions_ahead([], NOW) == -1
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_creates_missing_months(
+    partition_repo: MagicMock, session: MagicMock
+) -> None:
+    partition_repo.list_partitions = AsyncMock(
+        return_value=[TaskPartition("tasks_legacy", utc(2025, 5))]
+    )
+    service = RetentionService(partition_repo, MagicMock(), months_ahead=2)
+
+    created = await service.ensure_partitions(session, NOW)
+
+    # Текущий месяц покрыт tasks_legacy, создаются два месяца впереди
+    assert created == ["tasks_p202505", "tasks_p202506"]
+    partition_repo.create.assert_any_await(utc(2025, 6), utc(2025, 7))
+
+
+@pytest.mark.asyncio
+async def test_expire_partitions_removes_files_and_drops(
+    partition_repo: MagicMock, session: MagicMock
+) -> None:
+    partition_repo.list_partitions = AsyncMock(
+        return_value=[
+            TaskPartition("tasks_p202501", utc(2025, 2)),
+            TaskPartition("tasks_p202504", utc(2025, 5)),
+        ]
+    )
+    partition_repo.stream_file_paths = stream(["a.zip", "b.zip"], ["c.zip"])
+    storage_repo = MagicMock()
+    storage_repo.remove_files = AsyncMock(return_value=[])
+    service = RetentionService(partition_repo, storage_repo, retention_days=30)
+
+    expired = await service.expire_partitions(session, utc(2025, 3))
+
+    assert expired == ["tasks_p202501"]
+    assert storage_repo.remove_files.await_count == 2
+    partition_repo.drop.assert_awaited_once_with("tasks_p202501")
+    partition_repo.detach.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_expire_partitions_keeps_partition_on_storage_errors(
+    partition_repo: MagicMock, session: MagicMock
+) -> None:
+    partition_repo.list_partitions = AsyncMock(
+        return_value=[TaskPartition("tasks_p202501", utc(2025, 2))]
+    )
+    partition_repo.stream_file_paths = stream(["a.zip"])
+    storage_repo = MagicMock()
+    storage_repo.remove_files = AsyncMock(return_value=["a.zip"])
+    service = RetentionService(partition_repo, storage_repo, archive=True)
+
+    assert await service.expire_partitions(session, utc(2025, 3)) == []
+    partition_repo.detach.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_skips_when_locked_elsewhere(
+    partition_repo: MagicMock, session: MagicMock
+) -> None:
+    partition_repo.try_lock = AsyncMock(return_value=False)
+    partition_repo.list_partitions = AsyncMock()
+    service = RetentionService(partition_repo, MagicMock(), retention_days=30)
+
+    await service.run(session, NOW)
+
+    partition_repo.list_partitions.assert_not_called()
+    partition_repo.create.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_locks_every_transaction(
+    partition_repo: MagicMock, session: MagicMock
+) -> None:
+    # Блокировка снимается при commit: второй экземпляр перехватил её
+    # после первой созданной секции
+    partition_repo.try_lock = AsyncMock(side_effect=[True, True, False])
+    partition_repo.list_partitions = AsyncMock(return_value=[])
+    service = RetentionService(partition_repo, MagicMock(), months_ahead=2)
+
+    created = await service.ensure_partitions(session, NOW)
+
+    assert created == ["tasks_p202504"]
+    session.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_expire_events_deletes_in_batches(
+    partition_repo: MagicMock, session: MagicMock
+) -> None:
+    event_repo = MagicMock()
+    event_repo.delete_older_than = AsyncMock(side_effect=[2, 2, 1])
+    service = RetentionService(partition_repo, MagicMock(), event_repo=event_repo)
+    service.EVENT_BATCH_SIZE = 2
+
+    assert await service.expire_events(session, utc(2025, 3)) == 5
+    assert event_repo.delete_older_than.await_count == 3
+    assert session.commit.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_run_fails_stale_tasks(
+    partition_repo: MagicMock, session: MagicMock
+) -> None:
+    partition_repo.list_partitions = AsyncMock(
+        return_value=[TaskPartition("tasks_p202506", utc(2025, 7))]
+    )
+    task_repo = MagicMock()
+    task_repo.fail_stale = AsyncMock(side_effect=[["task_1", "task_2"], ["task_3"]])
+    service = RetentionService(
+        partition_repo, MagicMock(), task_repo=task_repo, stale_after=60 * 60
+    )
+    service.STALE_BATCH_SIZE = 2
+
+    with patch.object(retention_service, "record_event") as record_event:
+        await service.run(session, NOW)
+
+    cutoff, limit = task_repo.fail_stale.call_args.args
+    assert cutoff == datetime(2025, 4, 16, 11, 0, tzinfo=timezone.utc)
+    assert limit == 2
+    assert task_repo.fail_stale.await_count == 2
+    assert [call.args[1] for call in record_event.call_args_list] == [
+        "task_1",
+        "task_2",
+        "task_3",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_remove_files_single_batched_call() -> None:
+    minio_client = MagicMock()
+    minio_client.remove_objects.return_value = iter(
+        [DeleteError("AccessDenied", "denied", "b.zip", None)]
+    )
+    storage_repo = MinioStorageRepository(minio_client, bucket_name="zip-bucket")
+
+    failed = await storage_repo.remove_files(["a.zip", "b.zip"])
+
+    assert failed == ["b.zip"]
+    bucket, objects = minio_client.remove_objects.call_args.args
+    assert [obj.name for obj in objects] == ["a.zip", "b.zip"]
+
+
+@pytest.mark.asyncio
+async def test_minio_bucket_created_in_check_not_constructor() -> None:
+    minio_client = MagicMock()
+    minio_client.bucket_exists.return_value = False
+    storage_repo = MinioStorageRepository(minio_client, bucket_name="zip-bucket")
+    minio_client.bucket_exists.assert_not_called()
+
+    await storage_repo.check()
+
+    minio_client.make_bucket.assert_called_once_with("zip-bucket")
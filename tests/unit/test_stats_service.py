@@ -0,0 +1,85 @@
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from dotenv import load_dotenv
+
+from gateways.sonarqube import CheckResult, Vulnerabilities, CodeSmells, Bugs
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from task.services.stats_service import StatsService  # noqa: E402
+
+
+def create_check_result() -> CheckResult:
+    return CheckResult(
+        overall_coverage=85.5,
+        bugs=Bugs(total=12, critical=2, major=5, minor=5),
+        code_smells=CodeSmells(total=20, critical=3, major=10, minor=7),
+        vulnerabilities=Vulnerabilities(total=4, critical=1, major=2, minor=1),
+    )
+
+
+@pytest.fixture
+def stats_service() -> StatsService:
+    stats_repo = MagicMock()
+    stats_repo.increment = AsyncMock()
+    stats_repo.get = AsyncMock(return_value=None)
+    return StatsService(stats_repo)
+
+
+@pytest.mark.asyncio
+async def test_record_result_updates_all_buckets(stats_service: StatsService) -> None:
+    await stats_service.record_result(
+        "test_user_id", date(2025, 4, 1), create_check_result()
+    )
+
+    buckets, delta = stats_service.stats_repo.increment.call_args.args
+    assert set(buckets) == {
+        "total",
+        "day:2025-04-01",
+        "user:test_user_id",
+        "user_day:test_user_id:2025-04-01",
+    }
+    assert delta["tasks"] == 1
+    assert delta["bugs_critical"] == 2
+    assert delta["coverage_sum"] == 85.5
+
+
+@pytest.mark.asyncio
+async def test_record_result_without_owner(stats_service: StatsService) -> None:
+    await stats_service.record_result(None, date(2025, 4, 1), create_check_result())
+
+    buckets, _ = stats_service.stats_repo.increment.call_args.args
+    assert set(buckets) == {"total", "day:2025-04-01"}
+
+
+@pytest.mark.asyncio
+async def test_get_stats(stats_service: StatsService) -> None:
+    stats = MagicMock(
+        tasks=4,
+        coverage_sum=300.0,
+        bugs_total=10,
+        bugs_critical=1,
+        code_smells_total=20,
+        code_smells_critical=2,
+        vulnerabilities_total=3,
+        vulnerabilities_critical=0,
+    )
+    stats_service.stats_repo.get = AsyncMock(return_value=stats)
+
+    response = await stats_service.get_stats(owner_id="test_user_id")
+
+    stats_service.stats_repo.get.assert_called_once_with("user:test_user_id")
+    assert response.tasks == 4
+    assert response.average_coverage == 75.0
+
+
+@pytest.mark.asyncio
+async def test_get_stats_empty_bucket(stats_service: StatsService) -> None:
+    response = await stats_service.get_stats(day=date(2025, 4, 1))
+
+    stats_service.stats_repo.get.assert_called_once_with("day:2025-04-01")
+    assert response.tasks == 0
+    assert response.average_coverage is None
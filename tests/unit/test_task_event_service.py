@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from dotenv import load_dotenv
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from task.enums import TaskStatus
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from task.repositories import task_event_repository  # noqa: E402
+from task.repositories.task_event_repository import TaskEventRepository  # noqa: E402
+from task.services import task_event_service  # noqa: E402
+from task.services.task_event_service import (  # noqa: E402
+    TaskEventBuffer,
+    TaskEventService,
+    record_event,
+)
+
+
+@pytest.fixture
+def buffer(monkeypatch: pytest.MonkeyPatch) -> TaskEventBuffer:
+    buffer = TaskEventBuffer(batch_size=2, max_size=3)
+    monkeypatch.setattr(task_event_service, "task_event_buffer", buffer)
+    return buffer
+
+
+@pytest.fixture
+def event_repo(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    repo = MagicMock()
+    repo.insert_many = AsyncMock()
+    session = MagicMock()
+    session.commit = AsyncMock()
+    session_maker = MagicMock()
+    session_maker.return_value.__aenter__ = AsyncMock(return_value=session)
+    session_maker.return_value.__aexit__ = AsyncMock(return_value=None)
+    monkeypatch.setattr(task_event_service, "async_session", session_maker)
+    monkeypatch.setattr(
+        task_event_service, "TaskEventRepository", MagicMock(return_value=repo)
+    )
+    return repo
+
+
+def test_events_published_only_after_commit(buffer: TaskEventBuffer) -> None:
+    committed, rolled_back = Session(), Session()
+    record_event(committed, "task_1", TaskStatus.PENDING)
+    record_event(rolled_back, "task_2", TaskStatus.PENDING)
+
+    assert buffer.events == []
+    committed.commit()
+    rolled_back.rollback()
+
+    assert [event["task_id"] for event in buffer.events] == ["task_1"]
+
+
+def test_buffer_drops_oldest_on_overflow(buffer: TaskEventBuffer) -> None:
+    buffer.add({"task_id": str(i)} for i in range(5))
+
+    assert [event["task_id"] for event in buffer.events] == ["2", "3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_single_batch(
+    buffer: TaskEventBuffer, event_repo: MagicMock
+) -> None:
+    buffer.add([{"task_id": "a"}, {"task_id": "b"}])
+
+    assert await buffer.flush() == 2
+    event_repo.insert_many.assert_awaited_once_with(
+        [{"task_id": "a"}, {"task_id": "b"}]
+    )
+    assert buffer.events == []
+
+
+@pytest.mark.asyncio
+async def test_flush_failure_keeps_events(
+    buffer: TaskEventBuffer, event_repo: MagicMock
+) -> None:
+    event_repo.insert_many.side_effect = ConnectionError("db down")
+    buffer.add([{"task_id": "a"}])
+
+    assert await buffer.flush() == 0
+    assert buffer.events == [{"task_id": "a"}]
+
+
+@pytest.mark.asyncio
+async def test_get_latency_maps_percentiles() -> None:
+    repo = MagicMock()
+    repo.latency_percentiles = AsyncMock(return_value=(10, [1.0, 4.5, 9.0], 0, None))
+    since = datetime(2025, 4, 1, tzinfo=timezone.utc)
+
+    latency = await TaskEventService(repo).get_latency(since)
+
+    assert latency.queue_wait.tasks == 10
+    assert latency.queue_wait.p90 == 4.5
+    assert latency.processing.tasks == 0
+    assert latency.processing.p50 is None
+
+
+async def test_insert_many_multi_row_insert(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(task_event_repository, "MAX_EVENTS_PER_INSERT", 2)
+    session = MagicMock()
+    session.execute = AsyncMock()
+    now = datetime.now(timezone.utc)
+    events = [
+        {"task_id": str(i), "status": TaskStatus.PENDING, "created_at": now}
+        for i in range(3)
+    ]
+
+    await TaskEventRepository(session).insert_many(events)
+
+    # Пачка из двух строк и остаток; каждый запрос — один оператор, не executemany
+    rows = []
+    for call in session.execute.await_args_list:
+        (statement,) = call.args
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        rows.append(sql.count("), (") + 1)
+    assert rows == [2, 1]
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from dotenv import load_dotenv
+from sqlalchemy.dialects import postgresql
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from task.enums import TaskStatus  # noqa: E402
+from task.repositories.task_repository import TaskRepository  # noqa: E402
+
+
+async def test_bulk_create_single_multi_row_insert() -> None:
+    session = MagicMock()
+    session.execute = AsyncMock()
+    tasks = [
+        {"task_id": f"00000000-0000-0000-0000-00000000000{i}", "owner_id": "user_id"}
+        for i in range(3)
+    ]
+
+    await TaskRepository(session).bulk_create(tasks)
+    await TaskRepository(session).bulk_create([])
+
+    session.execute.assert_awaited_once()
+    # Один оператор без списка параметров: не executemany
+    (statement,) = session.execute.await_args.args
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO tasks")
+    assert sql.count("), (") == len(tasks) - 1
+    assert "RETURNING" not in sql
+
+
+async def test_transition_status_prunes_by_created_at() -> None:
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock())
+    repo = TaskRepository(session)
+    created_at = datetime(2025, 4, 1, tzinfo=timezone.utc)
+
+    await repo.transition_status(
+        "task_id", (TaskStatus.PENDING,), TaskStatus.IN_PROGRESS
+    )
+    await repo.transition_status(
+        "task_id",
+        (TaskStatus.IN_PROGRESS,),
+        TaskStatus.SUCCESS,
+        created_at=created_at,
+    )
+
+    by_id, by_key = (
+        str(call.args[0].compile(dialect=postgresql.dialect()))
+        for call in session.execute.await_args_list
+    )
+    assert "tasks.created_at =" not in by_id
+    assert "tasks.created_at =" in by_key
+
+
+async def test_fail_stale_uses_unfinished_index_predicate() -> None:
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock())
+    cutoff = datetime(2025, 4, 1, tzinfo=timezone.utc)
+
+    await TaskRepository(session).fail_stale(cutoff, limit=100)
+
+    (statement,) = session.execute.await_args.args
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    # Предикат частичного индекса ix_tasks_unfinished_created_at текстом:
+    # с параметрами общий план подготовленного запроса индекс не использует
+    assert "WHERE status IN ('PENDING', 'IN_PROGRESS') AND" in sql
+    assert "ORDER BY tasks.created_at" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
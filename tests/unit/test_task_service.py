@@ -1,6 +1,9 @@
 import io
 import zipfile
 import json
+from datetime import datetime, timezone
+from uuid import uuid4
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from typing import Tuple, Optional
@@ -24,8 +27,10 @@ from task.exceptions import (
     ZipValidationException,
     ProcessingException,
     InvalidFileException,
+    TaskNotFoundException,
+    InvalidCursorException,
 )
-from task.enums import TaskStatus
+from task.enums import ExportFormat, TaskStatus
 from task.schemas import TaskResponse
 
 # Установка переменных окружения ДО импорта модулей
@@ -55,7 +60,9 @@ def task_service() -> Tuple[TaskService, MagicMock, MagicMock]:
     sonarqube_service = MagicMock()
 
     # Замокаем асинхронные методы с помощью AsyncMock
-    storage_repo.get_file = AsyncMock(return_value=create_valid_zip_bytes())
+    storage_repo.download_file = AsyncMock(
+        side_effect=lambda name, target: target.write(create_valid_zip_bytes())
+    )
     storage_repo.save_file = AsyncMock()
     sonarqube_service.check_zip = AsyncMock(
         return_value=SonarQubeResults(
@@ -81,9 +88,8 @@ def task_service() -> Tuple[TaskService, MagicMock, MagicMock]:
 def valid_file() -> MagicMock:
     file = MagicMock(spec=UploadFile)
     file.size = 1024
-    file.read = AsyncMock(return_value=create_valid_zip_bytes())
     file.seek = AsyncMock(return_value=None)
-    file.file = MagicMock()
+    file.file = io.BytesIO(create_valid_zip_bytes())
     return file
 
 
@@ -97,9 +103,8 @@ def valid_upload_file(valid_file) -> MagicMock:
 def invalid_zip_file() -> MagicMock:
     file = MagicMock(spec=UploadFile)
     file.size = 1024
-    file.read = AsyncMock(return_value=b"not a valid zip content")
     file.seek = AsyncMock(return_value=None)
-    file.file = MagicMock()
+    file.file = io.BytesIO(b"not a valid zip content")
     file.filename = "test.zip"
     return file
 
@@ -108,9 +113,8 @@ def invalid_zip_file() -> MagicMock:
 def big_file() -> MagicMock:
     file = MagicMock(spec=UploadFile)
     file.size = TaskService.MAX_FILE_SIZE + 1
-    file.read = AsyncMock(return_value=create_valid_zip_bytes())
     file.seek = AsyncMock(return_value=None)
-    file.file = MagicMock()
+    file.file = io.BytesIO(create_valid_zip_bytes())
     file.filename = "test.zip"
     return file
 
@@ -126,11 +130,13 @@ class DummyTask:
         self,
         task_id: str,
         status: TaskStatus = TaskStatus.PENDING,
-        results: Optional[str] = None,
+        results: Optional[dict] = None,
     ):
         self.task_id: str = task_id
         self.status: TaskStatus = status
-        self.results: Optional[str] = results
+        self.results: Optional[dict] = results
+        self.owner_id: Optional[str] = "test_user_id"
+        self.created_at: datetime = datetime(2025, 4, 1, tzinfo=timezone.utc)
 
 
 # -------------------- Тесты для create_task --------------------
@@ -201,12 +207,13 @@ async def test_create_task_db_failure(
 async def test_process_task_no_task_found(
     task_service: Tuple[TaskService, MagicMock, MagicMock],
 ) -> None:
-    service, _, task_repo = task_service
-    task_repo.get = AsyncMock(return_value=None)
-    result = await service.process_task("nonexistent", MagicMock(spec=AsyncSession))
-    task_repo.get.assert_called_once_with("nonexistent")
-    if hasattr(task_repo, "update"):
-        task_repo.update.assert_not_called()
+    service, storage_repo, task_repo = task_service
+    task_repo.transition_status = AsyncMock(return_value=None)
+    await service.process_task("nonexistent", MagicMock(spec=AsyncSession))
+    task_repo.transition_status.assert_called_once_with(
+        "nonexistent", (TaskStatus.PENDING,), TaskStatus.IN_PROGRESS
+    )
+    storage_repo.download_file.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -214,17 +221,83 @@ async def test_process_task_success(
     task_service: Tuple[TaskService, MagicMock, MagicMock],
 ) -> None:
     service, _, task_repo = task_service
-    dummy_task = DummyTask("test_id")
-    task_repo.get = AsyncMock(return_value=dummy_task)
-    task_repo.update = AsyncMock()
+    task_repo.transition_status = AsyncMock(return_value=DummyTask("test_id"))
 
     await service.process_task("test_id", MagicMock(spec=AsyncSession))
 
-    assert task_repo.update.call_count == 2
-    assert dummy_task.status == TaskStatus.SUCCESS
-    assert dummy_task.results is not None
-    results = json.loads(dummy_task.results)
-    assert "sonarqube" in results
+    assert task_repo.transition_status.call_count == 2
+    task_id, expected, status = task_repo.transition_status.call_args.args
+    assert expected == (TaskStatus.IN_PROGRESS,)
+    assert status == TaskStatus.SUCCESS
+    assert "sonarqube" in task_repo.transition_status.call_args.kwargs["results"]
+    # Ключ секции из первого RETURNING: UPDATE не проверяет остальные секции
+    created_at = task_repo.transition_status.return_value.created_at
+    assert task_repo.transition_status.call_args.kwargs["created_at"] == created_at
+
+
+@pytest.mark.asyncio
+async def test_process_task_invalidates_result_after_commit(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    task_repo.transition_status = AsyncMock(return_value=DummyTask("test_id"))
+    session = MagicMock(spec=AsyncSession)
+    backend = FastAPICache.get_backend()
+    calls = MagicMock()
+    calls.attach_mock(session.commit, "commit")
+    calls.attach_mock(backend.clear, "clear")
+
+    await service.process_task("test_id", session)
+
+    # Удаляется только запись этой задачи и только после фиксации
+    assert calls.mock_calls[-2:] == [
+        ("commit", (), {}),
+        ("clear", (), {"key": "test_prefix:TASK:result:test_id"}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_process_task_records_stats(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    service.stats_service = MagicMock()
+    service.stats_service.record_result = AsyncMock()
+    task_repo.transition_status = AsyncMock(return_value=DummyTask("test_id"))
+    session = MagicMock(spec=AsyncSession)
+    calls = MagicMock()
+    calls.attach_mock(session.commit, "commit")
+    calls.attach_mock(service.stats_service.record_result, "record_result")
+
+    await service.process_task("test_id", session)
+
+    owner_id, day, result, _ = service.stats_service.record_result.call_args.args
+    assert owner_id == "test_user_id"
+    assert day.isoformat() == "2025-04-01"
+    assert result.bugs.critical == 2
+    # Агрегаты — отдельной транзакцией после фиксации результата
+    assert [name for name, _, _ in calls.mock_calls] == [
+        "commit",
+        "commit",
+        "record_result",
+        "commit",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_process_task_stats_failure_keeps_result(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    service.stats_service = MagicMock()
+    service.stats_service.record_result = AsyncMock(side_effect=Exception("Deadlock"))
+    task_repo.transition_status = AsyncMock(return_value=DummyTask("test_id"))
+    session = MagicMock(spec=AsyncSession)
+
+    await service.process_task("test_id", session)
+
+    assert session.commit.await_count == 2
+    session.rollback.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -232,14 +305,345 @@ async def test_process_task_update_failure(
     task_service: Tuple[TaskService, MagicMock, MagicMock],
 ) -> None:
     service, _, task_repo = task_service
-    dummy_task = DummyTask("test_id")
-    task_repo.get = AsyncMock(return_value=dummy_task)
-    task_repo.update = AsyncMock(side_effect=Exception("Update error"))
+    task_repo.transition_status = AsyncMock(side_effect=Exception("Update error"))
+
+    with pytest.raises(ProcessingException):
+        await service.process_task("test_id", MagicMock(spec=AsyncSession))
+
+
+@pytest.mark.asyncio
+async def test_process_task_status_changed_concurrently(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    task_repo.transition_status = AsyncMock(
+        side_effect=[DummyTask("test_id"), None, None]
+    )
 
     with pytest.raises(ProcessingException):
         await service.process_task("test_id", MagicMock(spec=AsyncSession))
 
 
+@pytest.mark.asyncio
+async def test_process_task_commits_in_progress_before_analysis(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, storage_repo, task_repo = task_service
+    task_repo.transition_status = AsyncMock(return_value=DummyTask("test_id"))
+    session = MagicMock(spec=AsyncSession)
+    calls = MagicMock()
+    calls.attach_mock(session.commit, "commit")
+    calls.attach_mock(storage_repo.download_file, "download_file")
+
+    await service.process_task("test_id", session)
+
+    assert [name for name, _, _ in calls.mock_calls] == [
+        "commit",
+        "download_file",
+        "commit",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_process_task_failure_marks_task_failed(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, storage_repo, task_repo = task_service
+    task_repo.transition_status = AsyncMock(return_value=DummyTask("test_id"))
+    storage_repo.download_file = AsyncMock(side_effect=Exception("MinIO down"))
+    session = MagicMock(spec=AsyncSession)
+
+    with pytest.raises(ProcessingException):
+        await service.process_task("test_id", session)
+
+    task_id, expected, status = task_repo.transition_status.call_args.args
+    assert expected == (TaskStatus.IN_PROGRESS,)
+    assert status == TaskStatus.FAILED
+    assert task_repo.transition_status.call_args.kwargs["created_at"] is not None
+    assert session.commit.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_process_task_commit_failure_marks_task_failed(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    task_repo.transition_status = AsyncMock(return_value=DummyTask("test_id"))
+    session = MagicMock(spec=AsyncSession)
+    session.commit.side_effect = [None, ConnectionError("Connection lost"), None]
+
+    with pytest.raises(ProcessingException):
+        await service.process_task("test_id", session)
+
+    task_id, expected, status = task_repo.transition_status.call_args.args
+    assert status == TaskStatus.FAILED
+    session.rollback.assert_awaited_once()
+    assert session.commit.await_count == 3
+
+
+# -------------------- Тесты для get_task_result_json --------------------
+
+
+@pytest.mark.asyncio
+async def test_get_task_result_json_success(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    stored = '{"sonarqube": {"overall_coverage": 85.5}}'
+    task_repo.get_result_json = AsyncMock(return_value=(TaskStatus.SUCCESS, stored))
+
+    payload = await service.get_task_result_json(
+        "test_id", MagicMock(spec=AsyncSession)
+    )
+
+    assert payload.status == TaskStatus.SUCCESS
+    assert payload.etag.startswith('"SUCCESS-')
+    assert json.loads(payload.body) == {
+        "status": "SUCCESS",
+        "results": {"sonarqube": {"overall_coverage": 85.5}},
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_task_result_json_pending(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    task_repo.get_result_json = AsyncMock(return_value=(TaskStatus.PENDING, None))
+
+    payload = await service.get_task_result_json(
+        "test_id", MagicMock(spec=AsyncSession)
+    )
+
+    assert json.loads(payload.body) == {"status": "PENDING", "results": None}
+
+
+@pytest.mark.asyncio
+async def test_get_task_result_json_not_found(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    task_repo.get_result_json = AsyncMock(return_value=None)
+
+    with pytest.raises(TaskNotFoundException):
+        await service.get_task_result_json("nonexistent", MagicMock(spec=AsyncSession))
+
+
+# -------------------- Тесты для get_task_result_cached --------------------
+
+
+@pytest.mark.asyncio
+async def test_get_task_result_cached_miss_then_hit(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service, _, task_repo = task_service
+    storage: dict = {}
+
+    async def backend_set(key, value, expire=None):
+        storage[key] = value
+
+    backend = MagicMock()
+    backend.get = AsyncMock(side_effect=lambda key: storage.get(key))
+    backend.set = AsyncMock(side_effect=backend_set)
+    monkeypatch.setattr(FastAPICache, "_backend", backend)
+    task_repo.get_result_json = AsyncMock(
+        return_value=(TaskStatus.SUCCESS, '{"sonarqube": {}}')
+    )
+
+    first = await service.get_task_result_cached("test_id")
+    second = await service.get_task_result_cached("test_id")
+
+    task_repo.get_result_json.assert_called_once_with("test_id")
+    assert backend.set.call_args.args[2] == TaskService.TERMINAL_RESULT_CACHE_EXPIRE
+    assert second == first
+
+
+@pytest.mark.asyncio
+async def test_get_task_result_cached_backend_failure(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service, _, task_repo = task_service
+    backend = MagicMock()
+    backend.get = AsyncMock(side_effect=ConnectionError("Redis down"))
+    backend.set = AsyncMock(side_effect=ConnectionError("Redis down"))
+    monkeypatch.setattr(FastAPICache, "_backend", backend)
+    task_repo.get_result_json = AsyncMock(return_value=(TaskStatus.PENDING, None))
+
+    payload = await service.get_task_result_cached("test_id")
+
+    assert payload.status == TaskStatus.PENDING
+
+
+@pytest.mark.asyncio
+async def test_get_task_result_cached_replica_lag_falls_back_to_primary(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service, _, task_repo = task_service
+    backend = MagicMock()
+    backend.get = AsyncMock(return_value=None)
+    backend.set = AsyncMock()
+    monkeypatch.setattr(FastAPICache, "_backend", backend)
+    monkeypatch.setattr("task.services.task_service.has_replica", lambda: True)
+
+    primary_session = MagicMock(spec=AsyncSession)
+    session_maker = MagicMock()
+    session_maker.return_value.__aenter__ = AsyncMock(return_value=primary_session)
+    session_maker.return_value.__aexit__ = AsyncMock(return_value=None)
+    monkeypatch.setattr("task.services.task_service.read_only_session", session_maker)
+    # На реплике задачи ещё нет, в основной БД она уже создана
+    task_repo.get_result_json = AsyncMock(
+        side_effect=[None, (TaskStatus.PENDING, None)]
+    )
+
+    payload = await service.get_task_result_cached(
+        "test_id", MagicMock(spec=AsyncSession)
+    )
+
+    session_maker.assert_called_once_with(primary=True)
+    assert task_repo.session is primary_session
+    assert payload.status == TaskStatus.PENDING
+    # Незавершённый статус с реплики мог устареть и не кэшируется
+    backend.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_task_result_cached_not_found_without_replica(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service, _, task_repo = task_service
+    backend = MagicMock()
+    backend.get = AsyncMock(return_value=None)
+    monkeypatch.setattr(FastAPICache, "_backend", backend)
+    monkeypatch.setattr("task.services.task_service.has_replica", lambda: False)
+    task_repo.get_result_json = AsyncMock(return_value=None)
+
+    with pytest.raises(TaskNotFoundException):
+        await service.get_task_result_cached("test_id")
+
+    task_repo.get_result_json.assert_called_once_with("test_id")
+
+
+# -------------------- Тесты для list_tasks --------------------
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_pagination(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    created_at = datetime(2025, 4, 1, tzinfo=timezone.utc)
+    task_ids = [str(uuid4()) for _ in range(3)]
+    rows = [(task_id, TaskStatus.SUCCESS, created_at) for task_id in task_ids]
+    task_repo.list_by_owner = AsyncMock(return_value=rows)
+
+    first_page = await service.list_tasks("test_user_id", 2)
+
+    task_repo.list_by_owner.assert_called_once_with(
+        "test_user_id", 3, statuses=None, after=None
+    )
+    assert [item.task_id for item in first_page.items] == task_ids[:2]
+    assert first_page.next_cursor is not None
+
+    task_repo.list_by_owner = AsyncMock(return_value=rows[2:])
+    second_page = await service.list_tasks(
+        "test_user_id", 2, cursor=first_page.next_cursor
+    )
+
+    task_repo.list_by_owner.assert_called_once_with(
+        "test_user_id", 3, statuses=None, after=(created_at, task_ids[1])
+    )
+    assert [item.task_id for item in second_page.items] == task_ids[2:]
+    assert second_page.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_invalid_cursor(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    task_repo.list_by_owner = AsyncMock()
+
+    with pytest.raises(InvalidCursorException):
+        await service.list_tasks("test_user_id", 20, cursor="not-a-cursor")
+    task_repo.list_by_owner.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_cursor_with_invalid_task_id(
+    task_service: Tuple[TaskService, MagicMock, MagicMock],
+) -> None:
+    service, _, task_repo = task_service
+    task_repo.list_by_owner = AsyncMock()
+    # task_id — uuid, иначе запрос упал бы уже в драйвере
+    cursor = TaskService._encode_cursor(datetime(2025, 4, 1), "task_1")
+
+    with pytest.raises(InvalidCursorException):
+        await service.list_tasks("test_user_id", 20, cursor=cursor)
+    task_repo.list_by_owner.assert_not_called()
+
+
+# -------------------- Тесты для export_results --------------------
+
+
+@pytest.fixture
+def export_rows(monkeypatch: pytest.MonkeyPatch) -> list:
+    session = MagicMock(spec=AsyncSession)
+    session_maker = MagicMock()
+    session_maker.return_value.__aenter__ = AsyncMock(return_value=session)
+    session_maker.return_value.__aexit__ = AsyncMock(return_value=None)
+    monkeypatch.setattr("task.services.task_service.read_only_session", session_maker)
+
+    created_at = datetime(2025, 4, 1, tzinfo=timezone.utc)
+    return [
+        ("task_1", "test_user_id", TaskStatus.SUCCESS, created_at, '{"sonarqube": {}}'),
+        ("task_2", "test_user_id", TaskStatus.PENDING, created_at, None),
+    ]
+
+
+def stream_batches(*batches: list):
+    async def stream_results(**kwargs):
+        for batch in batches:
+            yield batch
+
+    return stream_results
+
+
+@pytest.mark.asyncio
+async def test_export_results_ndjson(
+    task_service: Tuple[TaskService, MagicMock, MagicMock], export_rows: list
+) -> None:
+    service, _, task_repo = task_service
+    task_repo.stream_results = stream_batches(export_rows[:1], export_rows[1:])
+
+    chunks = [chunk async for chunk in service.export_results(ExportFormat.NDJSON)]
+
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert len(chunks) == 2
+    assert lines[0]["task_id"] == "task_1"
+    assert lines[0]["results"] == {"sonarqube": {}}
+    assert lines[1]["status"] == "PENDING"
+    assert lines[1]["results"] is None
+
+
+@pytest.mark.asyncio
+async def test_export_results_csv(
+    task_service: Tuple[TaskService, MagicMock, MagicMock], export_rows: list
+) -> None:
+    service, _, task_repo = task_service
+    task_repo.stream_results = stream_batches(export_rows)
+
+    chunks = [chunk async for chunk in service.export_results(ExportFormat.CSV)]
+
+    lines = b"".join(chunks).decode().splitlines()
+    assert lines[0] == "task_id,owner_id,status,created_at,results"
+    assert lines[1].startswith("task_1,test_user_id,SUCCESS,")
+    assert len(lines) == 3
+
+
 # -------------------- Тесты для upload_and_process_file --------------------
 
 
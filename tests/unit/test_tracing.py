@@ -0,0 +1,84 @@
+import orjson
+import pytest
+from dotenv import load_dotenv
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+# Установка переменных окружения ДО импорта модулей
+load_dotenv(".env")
+
+from base.tracing import (  # noqa: E402
+    FileSpanExporter,
+    extract_context,
+    inject_context,
+    traced,
+    tracer,
+)
+
+exporter = InMemorySpanExporter()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tracer_provider() -> None:
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+
+@pytest.fixture(autouse=True)
+def clear_spans() -> None:
+    exporter.clear()
+
+
+@traced("test.operation")
+async def operation() -> str:
+    return "done"
+
+
+@pytest.mark.asyncio
+async def test_traced_creates_child_span() -> None:
+    with tracer.start_as_current_span("test.request"):
+        result = await operation()
+
+    child, parent = exporter.get_finished_spans()
+    assert result == "done"
+    assert child.name == "test.operation"
+    assert child.parent.span_id == parent.context.span_id
+
+
+def test_context_carried_to_background_job() -> None:
+    with tracer.start_as_current_span("test.upload"):
+        carrier = inject_context()
+
+    # Фоновая задача стартует после закрытия спана запроса
+    with tracer.start_as_current_span(
+        "test.process_task", context=extract_context(carrier)
+    ):
+        pass
+
+    upload, process = exporter.get_finished_spans()
+    assert "traceparent" in carrier
+    assert process.context.trace_id == upload.context.trace_id
+    assert process.parent.span_id == upload.context.span_id
+
+
+def test_file_exporter_writes_json_lines(tmp_path) -> None:
+    with tracer.start_as_current_span("test.parent"):
+        with tracer.start_as_current_span("test.child", attributes={"task.id": "1"}):
+            pass
+    path = tmp_path / "traces.jsonl"
+    file_exporter = FileSpanExporter(str(path))
+
+    file_exporter.export(exporter.get_finished_spans())
+    file_exporter.shutdown()
+
+    child, parent = [orjson.loads(line) for line in path.read_bytes().splitlines()]
+    assert child["name"] == "test.child"
+    assert child["attributes"] == {"task.id": "1"}
+    assert child["traceId"] == parent["traceId"]
+    assert child["parentSpanId"] == parent["spanId"]
+    assert parent["parentSpanId"] == ""